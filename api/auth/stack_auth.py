@@ -1,10 +1,9 @@
 # auth/stack_auth.py
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-import httpx
 from functools import lru_cache
 from api.core.config import settings
+from api.core.timing import span
 
 security = HTTPBearer()
 
@@ -15,6 +14,8 @@ def get_stack_public_key() -> str:
     Fetch and cache Stack's public key
     Only called once, then cached
     """
+    import httpx
+
     # Stack usually provides JWKS endpoint
     # Check your Stack dashboard for the exact URL
     response = httpx.get(
@@ -33,17 +34,21 @@ async def verify_stack_token(
     """
     Verify JWT token locally (fast, no API call)
     """
+    # Imported on first use to keep jose off the cold-start path
+    from jose import jwt, JWTError
+
     token = credentials.credentials
 
     try:
         # Decode and verify JWT locally
-        payload = jwt.decode(
-            token,
-            get_stack_public_key(),  # Cached public key
-            algorithms=["ES256"],
-            audience=settings.NEXT_PUBLIC_STACK_PROJECT_ID,
-            options={"verify_exp": True},  # Verify expiration
-        )
+        with span("auth"):
+            payload = jwt.decode(
+                token,
+                get_stack_public_key(),  # Cached public key
+                algorithms=["ES256"],
+                audience=settings.NEXT_PUBLIC_STACK_PROJECT_ID,
+                options={"verify_exp": True},  # Verify expiration
+            )
 
         return {"id": payload.get("sub"), "email": payload.get("email")}
 
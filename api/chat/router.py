@@ -3,9 +3,11 @@ Chat router for handling chat conversations and message history.
 """
 
 import uuid as uuid_lib
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 
 from api.auth.stack_auth import verify_stack_token
 from api.core.dependencies import SupabaseClient, GeminiClient
@@ -15,8 +17,6 @@ from api.core.schemas import (
     PromptRequest,
     GenerateResponse,
     ChatHistoryResponse,
-    UIMessage,
-    MessagePart,
     Message,
 )
 from api.db.service import (
@@ -30,12 +30,23 @@ from api.services.gemini import (
     stream_response,
     stream_resume_required_message,
 )
+from api.services.history import schedule_indexing
+from api.services.idempotency import (
+    REPLAYED_HEADER,
+    fingerprint,
+    run_idempotent_stream,
+)
+from api.services.speculative import find_review
+from api.services.streams import StreamBuffer, stream_registry
 
 
 router = APIRouter(
     prefix="/api", tags=["chat"], dependencies=[Depends(verify_stack_token)]
 )
 
+# Upper bound on messages returned by one history request
+MAX_HISTORY_MESSAGES = 10_000
+
 
 def patch_response_with_headers(
     response: StreamingResponse,
@@ -62,6 +73,34 @@ def patch_response_with_headers(
     return response
 
 
+def encode_chat_history(stored_messages: List[Dict[str, Any]]) -> bytes:
+    """
+    Serialize stored message rows (newest first) as a ``ChatHistoryResponse``
+    body with messages oldest first.
+
+    Rows are mapped straight to JSON instead of through ``UIMessage`` models
+    and response model validation, which dominate the cost of long histories.
+
+    Args:
+        stored_messages: Message rows from the database
+
+    Returns:
+        bytes: JSON response body
+    """
+    return orjson.dumps(
+        {
+            "messages": [
+                {
+                    "id": str(message["id"]),
+                    "role": "assistant" if message["sender"] == "model" else "user",
+                    "parts": [{"type": "text", "text": message["content"]}],
+                }
+                for message in reversed(stored_messages)
+            ]
+        }
+    )
+
+
 @router.post(
     "/generate", response_model=GenerateResponse, status_code=status.HTTP_200_OK
 )
@@ -95,21 +134,30 @@ async def handle_chat(
     gemini: GeminiClient,
     request: ChatRequest,
     protocol: str = Query("data"),
+    idempotency_key: Optional[str] = Header(None),
+    auth_user: dict = Depends(verify_stack_token),
 ) -> StreamingResponse:
     """
     Handle chat conversation with streaming response.
 
+    A retry with the same ``Idempotency-Key`` does not store the message or
+    call the model again: it attaches to the original stream, or replays it
+    once finished.
+
     Args:
         supabase: Supabase client dependency
         gemini: Gemini client dependency
         request: Chat request with messages
         protocol: Streaming protocol type
+        idempotency_key: Optional ``Idempotency-Key`` header
+        auth_user: Authenticated user data from JWT token
 
     Returns:
         StreamingResponse: Streaming chat response
 
     Raises:
-        HTTPException: If chat handling fails
+        HTTPException: If chat handling fails or the idempotency key was used
+            for a different request
     """
     if not request.messages:
         raise HTTPException(
@@ -128,36 +176,120 @@ async def handle_chat(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No message content found"
         )
 
-    thread_id = request.id if request.id else str(uuid_lib.uuid4())
+    async def start_stream() -> StreamBuffer:
+        thread_id = request.id if request.id else str(uuid_lib.uuid4())
+
+        created = await create_message(
+            supabase=supabase,
+            message=Message(thread_id=thread_id, sender="user", content=prompt),
+        )
+        schedule_indexing(gemini, supabase, created)
+
+        message_id = f"msg-{uuid_lib.uuid4().hex}"
+
+        # Buffers are registered only once their generation starts, so a
+        # failed lookup never leaves one that resumers would wait on forever
+        resume = await get_resume(supabase, thread_id)
+        if not resume:
+            log_info("Resume not found, requesting upload")
+            buffer = stream_registry.create(message_id)
+            stream_registry.start(
+                buffer, stream_resume_required_message(supabase, thread_id, message_id)
+            )
+            return buffer
 
-    await create_message(
-        supabase=supabase,
-        message=Message(thread_id=thread_id, sender="user", content=prompt),
+        job_description = await get_job_description(supabase, thread_id)
+        job_description_reference = (
+            job_description[0]["name"] if job_description else None
+        )
+        job_description_text = (
+            job_description[0].get("extracted_text") if job_description else None
+        )
+        prepared_review = await find_review(
+            supabase,
+            thread_id,
+            prompt,
+            resume[0],
+            job_description[0] if job_description else None,
+        )
+        buffer = stream_registry.create(message_id)
+        stream_registry.start(
+            buffer,
+            stream_response(
+                gemini_client=gemini,
+                supabase=supabase,
+                prompt=prompt,
+                thread_id=thread_id,
+                file_reference=resume[0]["name"],
+                job_description_reference=job_description_reference,
+                is_disconnected=buffer.is_abandoned,
+                message_id=message_id,
+                resume_text=resume[0].get("extracted_text"),
+                job_description_text=job_description_text,
+                prepared_review=prepared_review,
+            ),
+        )
+        return buffer
+
+    message_id, frames, replayed = await run_idempotent_stream(
+        idempotency_key,
+        "chat",
+        auth_user.get("id"),
+        fingerprint(request.model_dump_json(), protocol),
+        start_stream,
     )
+    response = StreamingResponse(frames, media_type="text/event-stream")
+    response.headers["X-Message-Id"] = message_id
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return patch_response_with_headers(response, protocol)
+
 
-    resume = await get_resume(supabase, thread_id)
-    if not resume:
-        log_info("Resume not found, requesting upload")
-        response = StreamingResponse(
-            stream_resume_required_message(supabase, thread_id),
-            media_type="text/event-stream",
+@router.get("/chat/stream/{message_id}", status_code=status.HTTP_200_OK)
+async def resume_chat_stream(
+    message_id: str,
+    last_event_id: Optional[str] = Header(None),
+    protocol: str = Query("data"),
+) -> StreamingResponse:
+    """
+    Resume an in-flight or recently finished chat stream.
+
+    Replays buffered frames after ``Last-Event-ID`` and then tails the live
+    generation, so reconnecting clients never trigger a new model call.
+
+    Args:
+        message_id: Assistant message identifier from the original stream
+        last_event_id: Last SSE event id the client received
+        protocol: Streaming protocol type
+
+    Returns:
+        StreamingResponse: Streaming chat response
+
+    Raises:
+        HTTPException: If the stream is unknown or can no longer be replayed
+    """
+    buffer = stream_registry.get(message_id)
+    if not buffer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Stream not found"
         )
-        return patch_response_with_headers(response, protocol)
 
-    job_description = await get_job_description(supabase, thread_id)
-    job_description_reference = job_description[0]["name"] if job_description else None
+    try:
+        cursor = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID"
+        )
+
+    if not buffer.can_resume_from(cursor):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE, detail="Stream frames no longer buffered"
+        )
 
     response = StreamingResponse(
-        stream_response(
-            gemini_client=gemini,
-            supabase=supabase,
-            prompt=prompt,
-            thread_id=thread_id,
-            file_reference=resume[0]["name"],
-            job_description_reference=job_description_reference,
-        ),
-        media_type="text/event-stream",
+        buffer.subscribe(cursor), media_type="text/event-stream"
     )
+    response.headers["X-Message-Id"] = message_id
     return patch_response_with_headers(response, protocol)
 
 
@@ -167,34 +299,30 @@ async def handle_chat(
     status_code=status.HTTP_200_OK,
 )
 async def get_chat_history(
-    thread_id: str, supabase: SupabaseClient
-) -> ChatHistoryResponse:
+    thread_id: str,
+    supabase: SupabaseClient,
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_MESSAGES),
+) -> Response:
     """
     Fetch message history for a specific chat thread.
 
     Args:
         thread_id: Thread identifier
         supabase: Supabase client dependency
+        limit: Number of most recent messages to return
 
     Returns:
-        ChatHistoryResponse: Chat history with messages
+        Response: ``ChatHistoryResponse`` JSON with messages oldest first
 
     Raises:
         HTTPException: If history retrieval fails
     """
     try:
-        ui_messages = []
-        stored_messages = await get_messages(supabase, thread_id)
-        for message in stored_messages:
-            sender = "assistant" if message["sender"] == "model" else "user"
-            ui_messages.append(
-                UIMessage(
-                    id=str(message["id"]),
-                    role=sender,  # type: ignore
-                    parts=[MessagePart(type="text", text=message["content"])],
-                )
-            )
-        return ChatHistoryResponse(messages=ui_messages[::-1])
+        stored_messages = await get_messages(supabase, thread_id, limit)
+        return Response(
+            content=encode_chat_history(stored_messages),
+            media_type="application/json",
+        )
 
     except Exception as e:
         raise HTTPException(
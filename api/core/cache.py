@@ -0,0 +1,449 @@
+"""
+Shared cache for database rows, pluggable per deployment.
+
+``memory`` keeps an LRU per process, bounded by entries and bytes; ``redis``
+uses any Redis-compatible server so every worker and instance shares hits and
+invalidations. Values are stored as JSON under a namespace, such as one
+thread's documents, and writes drop a whole namespace in one call by
+advancing its generation. Backend errors are logged and count as misses, so the cache can
+never fail a request.
+"""
+
+import itertools
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import urlsplit
+
+import anyio
+
+from .config import settings
+from .logging import log_warning
+from .metrics import CACHE_REQUESTS
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Least-recently-used map with optional per-entry TTL and a byte budget.
+
+    Not thread-safe; meant for state owned by one event loop.
+    """
+
+    def __init__(
+        self,
+        max_items: int,
+        max_bytes: Optional[int] = None,
+        on_evict: Optional[Callable[[K], None]] = None,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._on_evict = on_evict
+        # key -> (value, size in bytes, monotonic expiry or None)
+        self._entries: "OrderedDict[K, Tuple[V, int, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(key)  # type: ignore[arg-type]
+        return entry is not None and not self._expired(entry)
+
+    @staticmethod
+    def _expired(entry: Tuple[Any, int, Optional[float]]) -> bool:
+        return entry[2] is not None and entry[2] <= time.monotonic()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """
+        Look up a key and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Optional[V]: Cached value, or ``default`` if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if self._expired(entry):
+            self._remove(key)
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: K, value: V, size: int = 0, ttl: Optional[float] = None) -> None:
+        """
+        Store a value, evicting the least recently used entries if over budget.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            size: Size of the value in bytes, counted against ``max_bytes``
+            ttl: Seconds until the entry expires, or None to keep it until
+                evicted
+        """
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self.size_bytes += size
+        while len(self._entries) > self.max_items or (
+            self.max_bytes is not None
+            and self.size_bytes > self.max_bytes
+            and len(self._entries) > 1
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def pop(self, key: K) -> Optional[V]:
+        """
+        Remove a key.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[V]: Removed value, or None if the key was not cached
+        """
+        if key not in self._entries:
+            return None
+        return self._remove(key)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for key in list(self._entries):
+            self._remove(key)
+
+    def _remove(self, key: K) -> V:
+        value, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+        if self._on_evict is not None:
+            self._on_evict(key)
+        return value
+
+
+class CacheBackend(ABC):
+    """
+    Byte store with namespaced keys; subclasses implement the storage.
+
+    Each namespace has a generation that invalidation advances. Values are
+    stored with the generation read before they were loaded and only served
+    while it is current, so a load that races an invalidation never brings
+    the stale value back.
+    """
+
+    name = ""
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Tuple[Optional[bytes], int]:
+        """
+        Fetch a value and the namespace's current generation.
+
+        Args:
+            namespace: Invalidation group, e.g. ``documents:<thread_id>``
+            key: Key within the namespace
+
+        Returns:
+            Tuple[Optional[bytes], int]: Stored value, or None on a miss, and
+            the generation to pass to ``set``
+        """
+
+    @abstractmethod
+    async def set(
+        self, namespace: str, key: str, value: bytes, ttl: float, generation: int
+    ) -> None:
+        """
+        Store a value loaded at a generation.
+
+        Args:
+            namespace: Invalidation group
+            key: Key within the namespace
+            value: Serialized value
+            ttl: Seconds until the value expires
+            generation: Generation returned by the ``get`` that missed
+        """
+
+    @abstractmethod
+    async def invalidate(self, namespace: str) -> None:
+        """
+        Drop every value of a namespace by advancing its generation.
+
+        Args:
+            namespace: Invalidation group
+        """
+
+    async def close(self) -> None:
+        """Release connections held by the backend."""
+
+
+class NullBackend(CacheBackend):
+    """Backend that stores nothing, used when caching is disabled."""
+
+    name = "none"
+
+    async def get(self, namespace: str, key: str) -> Tuple[Optional[bytes], int]:
+        return None, 0
+
+    async def set(
+        self, namespace: str, key: str, value: bytes, ttl: float, generation: int
+    ) -> None:
+        return None
+
+    async def invalidate(self, namespace: str) -> None:
+        return None
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU backend; invalidation only reaches this process."""
+
+    name = "memory"
+
+    def __init__(self, max_items: int, max_bytes: int) -> None:
+        self._entries: LRUCache[Tuple[str, str], Tuple[int, bytes]] = LRUCache(
+            max_items, max_bytes
+        )
+        self._generations: LRUCache[str, int] = LRUCache(max_items)
+        # Generations are never reused, so a namespace whose generation was
+        # evicted cannot match a value stored before
+        self._counter = itertools.count(1)
+
+    def _generation(self, namespace: str) -> int:
+        generation = self._generations.get(namespace)
+        if generation is None:
+            generation = next(self._counter)
+            self._generations.set(namespace, generation)
+        return generation
+
+    async def get(self, namespace: str, key: str) -> Tuple[Optional[bytes], int]:
+        generation = self._generation(namespace)
+        entry = self._entries.get((namespace, key))
+        if entry is None or entry[0] != generation:
+            return None, generation
+        return entry[1], generation
+
+    async def set(
+        self, namespace: str, key: str, value: bytes, ttl: float, generation: int
+    ) -> None:
+        if self._generation(namespace) != generation:
+            return
+        self._entries.set(
+            (namespace, key), (generation, value), size=len(value), ttl=ttl
+        )
+
+    async def invalidate(self, namespace: str) -> None:
+        self._generations.set(namespace, next(self._counter))
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend on a Redis-compatible server, shared by every worker and instance.
+
+    Uses ``redis.asyncio`` over RESP2. A namespace's generation is a counter
+    key; invalidation is one atomic ``INCR``. Values are prefixed with the
+    generation they were loaded at, and a read fetches the counter and the
+    value in one ``MGET``, so reads and writes are one round trip each.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self, url: str, prefix: str, timeout: float, max_connections: int
+    ) -> None:
+        import redis.asyncio as redis
+
+        if urlsplit(url).scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme: {urlsplit(url).scheme}")
+        self._prefix = prefix
+        self._timeout = timeout
+        self._client = redis.Redis(
+            connection_pool=redis.BlockingConnectionPool.from_url(
+                url,
+                max_connections=max_connections,
+                timeout=timeout,
+                socket_timeout=timeout,
+                socket_connect_timeout=timeout,
+                protocol=2,
+            )
+        )
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self._prefix}:{namespace}:{key}"
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self._prefix}:{namespace}"
+
+    @staticmethod
+    def _generation_ttl_ms() -> int:
+        # Outlives every value: each write and invalidation pushes it past the
+        # longest value TTL, so a counter never expires back to a generation
+        # whose values are still stored
+        return int(settings.CACHE_TTL_SECONDS * 1000) + 1000
+
+    async def get(self, namespace: str, key: str) -> Tuple[Optional[bytes], int]:
+        with anyio.fail_after(self._timeout):
+            raw_generation, stored = await self._client.mget(
+                self._generation_key(namespace), self._key(namespace, key)
+            )
+        generation = int(raw_generation or 0)
+        if stored is None:
+            return None, generation
+        tag, _, value = stored.partition(b":")
+        if int(tag) != generation:
+            return None, generation
+        return value, generation
+
+    async def set(
+        self, namespace: str, key: str, value: bytes, ttl: float, generation: int
+    ) -> None:
+        with anyio.fail_after(self._timeout):
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.set(
+                    self._key(namespace, key),
+                    b"%d:%s" % (generation, value),
+                    px=max(int(ttl * 1000), 1),
+                )
+                pipe.pexpire(self._generation_key(namespace), self._generation_ttl_ms())
+                await pipe.execute()
+
+    async def invalidate(self, namespace: str) -> None:
+        with anyio.fail_after(self._timeout):
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.incr(self._generation_key(namespace))
+                pipe.pexpire(self._generation_key(namespace), self._generation_ttl_ms())
+                await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class Cache:
+    """JSON cache over a backend, with hit/miss metrics and fail-open errors."""
+
+    def __init__(self, backend: CacheBackend, ttl: float, max_value_bytes: int) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.max_value_bytes = max_value_bytes
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Return a cached value, or load, store and return it.
+
+        ``None`` results are not cached, so a document uploaded through
+        another instance is seen on the next read even without invalidation.
+
+        Args:
+            namespace: Invalidation group, e.g. ``documents:<thread_id>``
+            key: Key within the namespace
+            loader: Loads the value on a miss; must return JSON-serializable data
+            ttl: Seconds to keep the value, at most ``CACHE_TTL_SECONDS``
+
+        Returns:
+            Any: Cached or loaded value
+        """
+        kind = namespace.split(":", 1)[0]
+        if isinstance(self.backend, NullBackend):
+            return await loader()
+
+        try:
+            cached, generation = await self.backend.get(namespace, key)
+        except Exception as e:
+            CACHE_REQUESTS.labels(kind, "error").inc()
+            log_warning(
+                "Cache read failed",
+                extra={"backend": self.backend.name, "error": str(e)},
+            )
+            # Skip the write too, so an unavailable backend costs one timeout
+            return await loader()
+        if cached is not None:
+            CACHE_REQUESTS.labels(kind, "hit").inc()
+            return json.loads(cached)
+        CACHE_REQUESTS.labels(kind, "miss").inc()
+
+        value = await loader()
+        if value is None:
+            return value
+        encoded = json.dumps(value, separators=(",", ":")).encode()
+        if len(encoded) > self.max_value_bytes:
+            return value
+        try:
+            await self.backend.set(
+                namespace, key, encoded, min(ttl or self.ttl, self.ttl), generation
+            )
+        except Exception as e:
+            log_warning(
+                "Cache write failed",
+                extra={"backend": self.backend.name, "error": str(e)},
+            )
+        return value
+
+    async def invalidate(self, namespace: str) -> None:
+        """
+        Drop every value of a namespace, logging instead of raising on error.
+
+        Args:
+            namespace: Invalidation group
+        """
+        try:
+            await self.backend.invalidate(namespace)
+        except Exception as e:
+            log_warning(
+                "Cache invalidation failed",
+                extra={
+                    "backend": self.backend.name,
+                    "namespace": namespace,
+                    "error": str(e),
+                },
+            )
+
+
+@lru_cache(maxsize=1)
+def get_cache() -> Cache:
+    """
+    Shared cache configured by ``CACHE_BACKEND``.
+
+    Returns:
+        Cache: Cache over the ``none``, ``memory`` or ``redis`` backend
+
+    Raises:
+        ValueError: If the backend is unknown or ``redis`` has no ``CACHE_URL``
+    """
+    backend_name = settings.CACHE_BACKEND.lower()
+    backend: CacheBackend
+    if backend_name == "none":
+        backend = NullBackend()
+    elif backend_name == "memory":
+        backend = MemoryBackend(settings.CACHE_MAX_ITEMS, settings.CACHE_MAX_BYTES)
+    elif backend_name == "redis":
+        if not settings.CACHE_URL:
+            raise ValueError("CACHE_URL is required for the redis cache backend")
+        backend = RedisBackend(
+            settings.CACHE_URL,
+            settings.CACHE_KEY_PREFIX,
+            settings.CACHE_TIMEOUT_SECONDS,
+            settings.CACHE_MAX_CONNECTIONS,
+        )
+    else:
+        raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+    return Cache(backend, settings.CACHE_TTL_SECONDS, settings.CACHE_MAX_VALUE_BYTES)
@@ -2,6 +2,8 @@
 Application configuration using pydantic-settings.
 """
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,6 +19,13 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_PUBLISHABLE_DEFAULT_KEY: str
 
+    # Direct Postgres Configuration
+    DB_BACKEND: str = "postgrest"  # postgrest, or postgres for the asyncpg path
+    DATABASE_URL: Optional[str] = None  # direct or session-mode pooler URL
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_COMMAND_TIMEOUT_SECONDS: float = 10.0
+
     # Google Generative AI Configuration
     GOOGLE_GENERATIVE_AI_API_KEY: str
 
@@ -26,8 +35,83 @@ class Settings(BaseSettings):
     DEFAULT_TEMPERATURE: float = 0.5
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10 MB
 
+    # Document Extraction Configuration
+    USE_EXTRACTED_TEXT: bool = True  # send extracted text instead of the file
+    EXTRACTION_WORKERS: int = 2
+    EXTRACTION_TIMEOUT_SECONDS: float = 30.0
+    EXTRACTION_MAX_XML_BYTES: int = 20 * 1024 * 1024  # unpacked DOCX body cap
+
+    # History Retrieval Configuration
+    EMBEDDING_MODEL: str = "gemini-embedding-001"
+    EMBEDDING_DIMENSIONS: int = 256
+    HISTORY_TOP_K: int = 6  # most relevant older messages
+    HISTORY_RECENT_MESSAGES: int = 4  # newest messages always considered
+    HISTORY_TOKEN_BUDGET: int = 4000
+    HISTORY_MAX_MESSAGES: int = 50  # newest messages fetched for recency history
+    EXACT_TOKEN_COUNTS: bool = False  # count user messages with the model API
+    HISTORY_INDEX_THREADS: int = 256  # per-thread indexes kept in memory
+
+    # Speculative Review Configuration
+    PREPARE_FIRST_REVIEW: bool = False  # generate the first review at upload
+    FIRST_REVIEW_TTL_SECONDS: float = 3600.0  # how long prepared reviews are kept
+    FIRST_REVIEW_MAX_ENTRIES: int = 256  # prepared reviews kept per instance
+
+    # Batch Analysis Configuration
+    BATCH_CONCURRENCY: int = 4  # model calls in flight per batch
+    BATCH_MAX_ITEMS: int = 50  # job descriptions per batch
+    BATCH_ITEM_TIMEOUT_SECONDS: float = 60.0
+
+    # Thread Export Configuration
+    EXPORT_PAGE_SIZE: int = 1000  # messages read per query while exporting
+
+    # Upload Job Configuration
+    UPLOAD_JOB_WORKERS: int = 2  # uploads processed concurrently per instance
+    UPLOAD_JOB_QUEUE_SIZE: int = 32  # queued jobs before new ones are refused
+    UPLOAD_JOB_RETENTION_SECONDS: float = 300.0  # keep finished jobs pollable
+
+    # Cache Configuration
+    CACHE_BACKEND: str = "none"  # none, memory (per process) or redis (shared)
+    CACHE_URL: Optional[str] = None  # redis://[user:password@]host:6379/0
+    CACHE_KEY_PREFIX: str = "resummate"
+    CACHE_TTL_SECONDS: float = 300.0  # upper bound on any cached value's age
+    CACHE_MAX_ITEMS: int = 10000  # memory backend
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # memory backend
+    CACHE_MAX_VALUE_BYTES: int = 1024 * 1024  # larger values are not cached
+    CACHE_TIMEOUT_SECONDS: float = 0.25  # per redis round trip
+    CACHE_MAX_CONNECTIONS: int = 8  # redis connections per process
+
+    # File Garbage Collection Configuration
+    FILE_GC_INTERVAL_SECONDS: float = 0.0  # 0 disables the in-app collector
+    FILE_GC_MIN_AGE_SECONDS: float = 3600.0  # younger files may be mid-upload
+    FILE_GC_BATCH_SIZE: int = 10  # deletes in flight at once
+    FILE_GC_DELETES_PER_SECOND: float = 5.0
+    FILE_GC_MAX_DELETES: int = 1000  # per run
+    THREAD_ARCHIVE_AFTER_DAYS: float = 0.0  # 0 keeps idle threads
+    THREAD_ARCHIVE_BATCH_SIZE: int = 100  # threads archived per run
+
+    # Idempotency Configuration
+    IDEMPOTENCY_TTL_SECONDS: float = 3600.0  # how long keys are remembered
+    IDEMPOTENCY_MAX_KEYS: int = 1000  # keys kept per instance
+
+    # Resumable Stream Configuration
+    STREAM_BUFFER_SIZE: int = 2048  # frames kept per message for replay
+    STREAM_RESUME_GRACE_SECONDS: float = 10.0
+    STREAM_RETENTION_SECONDS: float = 60.0
+
+    # Response Compression Configuration
+    COMPRESSION_MIN_BYTES: int = 1024  # smaller bodies are sent uncompressed
+
+    # Lifecycle Configuration
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 10.0  # unfinished steps are left to requests
+    SHUTDOWN_DRAIN_SECONDS: float = 20.0  # wait for in-flight streams
+
+    # Metrics Configuration
+    METRICS_TOKEN: Optional[str] = None  # /api/metrics bearer; unset disables it
+
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
+    LOG_SAMPLE_RATE: float = 0.1  # fraction of high-volume log lines kept
 
     model_config = SettingsConfigDict(
         env_file=".env.local", extra="ignore", case_sensitive=True
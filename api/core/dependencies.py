@@ -2,37 +2,72 @@
 Dependency injection providers for the application.
 """
 
-from typing import Annotated
+from functools import lru_cache
+from typing import TYPE_CHECKING, Annotated, Any
 
 from fastapi import Depends
-from google import genai
-from supabase import Client, create_client
 
+from .cache import get_cache
 from .config import settings
 
+# The Supabase and Gemini SDKs are imported on first use rather than at
+# application import, which keeps them off the cold-start path.
+if TYPE_CHECKING:
+    from google import genai
+    from supabase import Client
 
-def get_supabase_client() -> Client:
+
+@lru_cache(maxsize=1)
+def get_supabase_client() -> "Client":
     """
     Dependency provider for Supabase client.
 
+    The client is shared across requests so its HTTP connection pool stays warm.
+
     Returns:
         Client: Configured Supabase client instance
     """
+    from supabase import create_client
+
     return create_client(
         settings.SUPABASE_URL, settings.SUPABASE_PUBLISHABLE_DEFAULT_KEY
     )
 
 
-def get_gemini_client() -> genai.Client:
+@lru_cache(maxsize=1)
+def get_gemini_client() -> "genai.Client":
     """
     Dependency provider for Google Gemini client.
 
+    The client is shared across requests so its HTTP connection pool stays warm.
+
     Returns:
         genai.Client: Configured Gemini client instance
     """
+    from google import genai
+
     return genai.Client(api_key=settings.GOOGLE_GENERATIVE_AI_API_KEY)
 
 
+async def close_clients() -> None:
+    """Close the shared clients' and cache's connection pools, if created."""
+    if get_gemini_client.cache_info().currsize:
+        gemini_client = get_gemini_client()
+        gemini_client.close()
+        await gemini_client.aio.aclose()
+        get_gemini_client.cache_clear()
+    if get_supabase_client.cache_info().currsize:
+        get_supabase_client().postgrest.session.close()
+        get_supabase_client.cache_clear()
+    if get_cache.cache_info().currsize:
+        await get_cache().backend.close()
+        get_cache.cache_clear()
+
+
 # Type aliases for dependency injection
-SupabaseClient = Annotated[Client, Depends(get_supabase_client)]
-GeminiClient = Annotated[genai.Client, Depends(get_gemini_client)]
+if TYPE_CHECKING:
+    SupabaseClient = Annotated[Client, Depends(get_supabase_client)]
+    GeminiClient = Annotated[genai.Client, Depends(get_gemini_client)]
+else:
+    SupabaseClient = Annotated[Any, Depends(get_supabase_client)]
+    GeminiClient = Annotated[Any, Depends(get_gemini_client)]
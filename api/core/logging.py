@@ -1,13 +1,74 @@
 """
 Structured logging configuration for the application.
+
+Log calls on the request path only enqueue the record; a background
+``QueueListener`` thread renders JSON lines and writes them to stdout.
 """
 
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict
 
 from .config import settings
 
+# Request identifier attached to every log record emitted while handling a request
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON objects, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, tz=timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue handler that keeps records structured for the JSON formatter."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, while args and exc_info are
+        # still valid, but leave ``extra`` attributes untouched.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 
 def setup_logging() -> logging.Logger:
     """
@@ -24,18 +85,18 @@ def setup_logging() -> logging.Logger:
     if logger.handlers:
         return logger
 
-    # Create console handler
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    # Console output happens on the listener thread, off the request path
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
 
-    # Create formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    logger.addHandler(queue_handler)
 
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
     # Prevent propagation to root logger
     logger.propagate = False
@@ -47,18 +108,23 @@ def setup_logging() -> logging.Logger:
 logger = setup_logging()
 
 
-def log_info(message: str, extra: Dict[str, Any] | None = None) -> None:
+def _should_log(sampled: bool) -> bool:
+    return not sampled or random.random() < settings.LOG_SAMPLE_RATE
+
+
+def log_info(
+    message: str, extra: Dict[str, Any] | None = None, sampled: bool = False
+) -> None:
     """
     Log an info message with optional extra context.
 
     Args:
         message: The message to log
         extra: Optional dictionary of extra context
+        sampled: Whether this is a high-volume message kept at LOG_SAMPLE_RATE
     """
-    if extra:
+    if _should_log(sampled):
         logger.info(message, extra=extra)
-    else:
-        logger.info(message)
 
 
 def log_error(message: str, extra: Dict[str, Any] | None = None) -> None:
@@ -69,10 +135,18 @@ def log_error(message: str, extra: Dict[str, Any] | None = None) -> None:
         message: The message to log
         extra: Optional dictionary of extra context
     """
-    if extra:
-        logger.error(message, extra=extra)
-    else:
-        logger.error(message)
+    logger.error(message, extra=extra)
+
+
+def log_exception(message: str, extra: Dict[str, Any] | None = None) -> None:
+    """
+    Log an error message with the active exception's traceback.
+
+    Args:
+        message: The message to log
+        extra: Optional dictionary of extra context
+    """
+    logger.exception(message, extra=extra)
 
 
 def log_warning(message: str, extra: Dict[str, Any] | None = None) -> None:
@@ -83,21 +157,19 @@ def log_warning(message: str, extra: Dict[str, Any] | None = None) -> None:
         message: The message to log
         extra: Optional dictionary of extra context
     """
-    if extra:
-        logger.warning(message, extra=extra)
-    else:
-        logger.warning(message)
+    logger.warning(message, extra=extra)
 
 
-def log_debug(message: str, extra: Dict[str, Any] | None = None) -> None:
+def log_debug(
+    message: str, extra: Dict[str, Any] | None = None, sampled: bool = False
+) -> None:
     """
     Log a debug message with optional extra context.
 
     Args:
         message: The message to log
         extra: Optional dictionary of extra context
+        sampled: Whether this is a high-volume message kept at LOG_SAMPLE_RATE
     """
-    if extra:
+    if _should_log(sampled):
         logger.debug(message, extra=extra)
-    else:
-        logger.debug(message)
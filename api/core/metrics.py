@@ -0,0 +1,308 @@
+"""
+In-process Prometheus metrics with text exposition.
+
+Observations are a bisect and two additions, so the metrics are cheap enough to
+leave on in production. Values are per process; scrape each worker separately.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+THROUGHPUT_BUCKETS: Tuple[float, ...] = (5, 10, 25, 50, 100, 200, 400, 800)
+SIZE_BUCKETS: Tuple[float, ...] = (
+    16 * 1024,
+    64 * 1024,
+    256 * 1024,
+    1024 * 1024,
+    4 * 1024 * 1024,
+    16 * 1024 * 1024,
+)
+TOKEN_BUCKETS: Tuple[float, ...] = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+REGISTRY: List["_Metric"] = []
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    """Base class for a metric family with optional labels."""
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[List["_Metric"]] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        if registry is not None:
+            registry.append(self)
+
+    def labels(self, *values: str) -> Any:
+        """
+        Get the child metric for a set of label values.
+
+        Args:
+            values: Label values in ``labelnames`` order
+
+        Returns:
+            Any: Child metric of the same type, created on first use
+        """
+        child = self._children.get(values)
+        if child is None:
+            child = self._new_child()
+            self._children[values] = child
+        return child
+
+    def _new_child(self) -> "_Metric":
+        return type(self)(self.name, self.help_text, registry=None)
+
+    def render(self) -> List[str]:
+        """
+        Render the metric family in Prometheus text format.
+
+        Returns:
+            List[str]: Exposition lines
+        """
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        series = self._children.items() if self.labelnames else [((), self)]
+        for values, child in series:
+            lines.extend(child._render_series(self.labelnames, values))
+        return lines
+
+    @abstractmethod
+    def _render_series(
+        self, labelnames: Sequence[str], values: Sequence[str]
+    ) -> List[str]:
+        """Render one labelled series as exposition lines."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter by ``amount``."""
+        self.value += amount
+
+    def _render_series(
+        self, labelnames: Sequence[str], values: Sequence[str]
+    ) -> List[str]:
+        labels = _format_labels(labelnames, values)
+        return [f"{self.name}{labels} {_format_value(self.value)}"]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge by ``amount``."""
+        self.value -= amount
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bucket bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Optional[List[_Metric]] = REGISTRY,
+    ) -> None:
+        super().__init__(name, help_text, labelnames, registry)
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus +Inf; made cumulative when rendered.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def _new_child(self) -> "Histogram":
+        return Histogram(self.name, self.help_text, buckets=self.buckets, registry=None)
+
+    def _render_series(
+        self, labelnames: Sequence[str], values: Sequence[str]
+    ) -> List[str]:
+        lines = []
+        cumulative = 0
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for le, count in zip(bounds, self.counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render_metrics() -> str:
+    """
+    Render all registered metrics in Prometheus text format.
+
+    Returns:
+        str: Exposition text
+    """
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Application metrics
+REQUEST_LATENCY = Histogram(
+    "resummate_http_request_duration_seconds",
+    "Time to response headers per route.",
+    ("method", "route", "status"),
+)
+DB_CALL_LATENCY = Histogram(
+    "resummate_db_call_duration_seconds",
+    "Latency of database service calls.",
+    ("function",),
+)
+GEMINI_TTFT = Histogram(
+    "resummate_gemini_ttft_seconds",
+    "Time from Gemini stream request to first chunk.",
+)
+GEMINI_TOKENS_PER_SECOND = Histogram(
+    "resummate_gemini_output_tokens_per_second",
+    "Gemini output token throughput per stream.",
+    buckets=THROUGHPUT_BUCKETS,
+)
+GEMINI_OUTPUT_TOKENS = Counter(
+    "resummate_gemini_output_tokens_total",
+    "Output tokens generated by Gemini.",
+)
+GEMINI_INPUT_TOKENS = Histogram(
+    "resummate_gemini_input_tokens",
+    "Prompt tokens per chat turn, by how documents were sent (text or file).",
+    ("document_mode",),
+    buckets=TOKEN_BUCKETS,
+)
+UPLOAD_SIZE = Histogram(
+    "resummate_upload_size_bytes",
+    "Size of uploaded documents.",
+    buckets=SIZE_BUCKETS,
+)
+UPLOAD_DURATION = Histogram(
+    "resummate_upload_duration_seconds",
+    "Time to upload and process a document in Gemini.",
+)
+EXTRACTION_DURATION = Histogram(
+    "resummate_document_extraction_duration_seconds",
+    "Time to extract text from an uploaded document.",
+)
+EXTRACTIONS = Counter(
+    "resummate_document_extractions_total",
+    "Document text extractions by outcome.",
+    ("outcome",),
+)
+BATCH_ITEM_DURATION = Histogram(
+    "resummate_batch_item_duration_seconds",
+    "Time to analyze one job description in a batch, including queueing.",
+)
+BATCH_ITEMS = Counter(
+    "resummate_batch_items_total",
+    "Batch analysis items by outcome.",
+    ("outcome",),
+)
+UPLOAD_JOBS_QUEUED = Gauge(
+    "resummate_upload_jobs_queued",
+    "Upload jobs waiting for a worker.",
+)
+UPLOAD_JOBS = Counter(
+    "resummate_upload_jobs_total",
+    "Upload jobs by outcome.",
+    ("outcome",),
+)
+UPLOAD_JOB_QUEUE_WAIT = Histogram(
+    "resummate_upload_job_queue_wait_seconds",
+    "Time upload jobs wait in the queue before a worker starts them.",
+)
+CACHE_REQUESTS = Counter(
+    "resummate_cache_requests_total",
+    "Shared cache lookups by namespace kind and outcome (hit, miss or error).",
+    ("kind", "outcome"),
+)
+IDEMPOTENT_REQUESTS = Counter(
+    "resummate_idempotent_requests_total",
+    "Requests with an Idempotency-Key, by whether they ran or reused a result.",
+    ("scope", "outcome"),
+)
+FIRST_REVIEWS = Counter(
+    "resummate_first_reviews_total",
+    "Speculative first reviews by outcome (generated, failed, served, fallback "
+    "or missed).",
+    ("outcome",),
+)
+FILE_GC_FILES = Counter(
+    "resummate_file_gc_files_total",
+    "Gemini files selected by the file collector, by reason and outcome.",
+    ("reason", "outcome"),
+)
+THREADS_ARCHIVED = Counter(
+    "resummate_threads_archived_total",
+    "Idle threads archived by the file collector.",
+)
+STREAMS_IN_FLIGHT = Gauge(
+    "resummate_streams_in_flight",
+    "Chat generations currently streaming.",
+)
@@ -0,0 +1,232 @@
+"""
+Pure ASGI middleware.
+
+Unlike ``@app.middleware("http")`` these do not wrap the response in a
+``BaseHTTPMiddleware`` task and memory stream, so SSE bodies reach the server
+frame by frame without extra hops.
+"""
+
+import gzip
+import time
+import uuid
+from typing import AbstractSet, Callable, Dict, Optional
+
+import anyio
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from vercel.headers import set_headers
+
+from .logging import log_info, request_id_var
+from .metrics import REQUEST_LATENCY
+from .timing import format_server_timing, start_request_timing, summarize_spans
+
+# Request headers the Vercel SDK reads from the request context
+VERCEL_HEADER_PREFIX = b"x-vercel-"
+
+# Fast settings for on-the-fly compression; higher levels cost far more CPU
+# for a few percent smaller JSON
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+# Bodies at least this large are compressed off the event loop
+THREAD_COMPRESSION_BYTES = 256 * 1024
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "br": lambda body: brotli.compress(body, quality=BROTLI_QUALITY),
+    "gzip": lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL),
+}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+
+    Brotli is preferred over gzip at equal quality values; codings with
+    ``q=0`` are refused.
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+
+    Returns:
+        Optional[str]: ``br`` or ``gzip``, or None to send the body as is
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in COMPRESSORS:
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    """Text and JSON bodies shrink well; event streams are never buffered."""
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return media_type.startswith("text/") or media_type.endswith(("json", "xml"))
+
+
+class VercelHeadersMiddleware:
+    """
+    Expose Vercel's request headers to the Vercel SDK.
+
+    Only the ``x-vercel-*`` headers (OIDC token, request id, geolocation) are
+    decoded; the rest of the request headers are never copied.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            set_headers(
+                {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in scope["headers"]
+                    if name.startswith(VERCEL_HEADER_PREFIX)
+                }
+            )
+        await self.app(scope, receive, send)
+
+
+class ServerTimingMiddleware:
+    """
+    Assign a request id, record request spans, emit a Server-Timing header and
+    observe the per-route latency histogram.
+
+    Timing stops when the response starts. Streaming responses therefore carry
+    the spans recorded before the first byte; the full breakdown is sent in the
+    stream's final metadata frame.
+    """
+
+    def __init__(self, app: ASGIApp, sampled_paths: AbstractSet[str] = frozenset()):
+        """
+        Args:
+            app: Wrapped ASGI application
+            sampled_paths: Paths whose timing log lines are sampled
+        """
+        self.app = app
+        self.sampled_paths = sampled_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        request_id_var.set(request_id)
+        spans = start_request_timing()
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                request_spans = [*spans, ("total", elapsed * 1000)]
+                status_code = message["status"]
+
+                route = scope.get("route")
+                REQUEST_LATENCY.labels(
+                    scope["method"],
+                    route.path if route else "unmatched",
+                    str(status_code),
+                ).observe(elapsed)
+
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = format_server_timing(request_spans)
+                headers["X-Request-ID"] = request_id
+                log_info(
+                    "Request timing",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status_code": status_code,
+                        **summarize_spans(request_spans),
+                    },
+                    sampled=scope["path"] in self.sampled_paths,
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+class CompressionMiddleware:
+    """
+    Compress complete response bodies with brotli or gzip.
+
+    Only responses sent in a single body message are compressed, so SSE and
+    other streaming responses pass through untouched and reach the client
+    frame by frame. Bodies smaller than ``minimum_size`` are not worth the
+    extra header and CPU and are also sent as is.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        """
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Smallest body, in bytes, that is compressed
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if "content-encoding" in headers or not is_compressible(
+                    headers.get("content-type", "")
+                ):
+                    await send(message)
+                else:
+                    # Held until the first body message shows whether the
+                    # response is complete
+                    start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(held)
+                await send(message)
+                return
+
+            compress = COMPRESSORS[encoding]
+            if len(body) >= THREAD_COMPRESSION_BYTES:
+                body = await anyio.to_thread.run_sync(compress, body)
+            else:
+                body = compress(body)
+            headers = MutableHeaders(scope=held)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -93,6 +93,8 @@ class Message(BaseModel):
     thread_id: str
     sender: str
     content: str
+    truncated: bool = False
+    token_count: Optional[int] = None  # estimated on write when not given
 
 
 class HealthCheckResponse(BaseModel):
@@ -114,6 +116,42 @@ class FileInfoResponse(BaseModel):
     contentType: str
 
 
+class DocumentUploadStatus(BaseModel):
+    """Outcome of one document in a multi-file upload."""
+
+    kind: Literal["resume", "job_description"]
+    fileName: str
+    status: Literal["uploaded", "failed"]
+    textExtracted: bool = False
+    error: Optional[str] = None
+
+
+class MultiUploadResponse(BaseModel):
+    """Response model for the multi-file upload endpoint."""
+
+    threadId: str
+    files: List[DocumentUploadStatus]
+
+
+class UploadJobResponse(BaseModel):
+    """Response model for background upload job status."""
+
+    jobId: str
+    threadId: str
+    status: Literal["queued", "processing", "saving", "succeeded", "failed"]
+    files: List[DocumentUploadStatus] = []
+    error: Optional[str] = None
+
+
+class MatchResponse(BaseModel):
+    """Response model for resume to job description keyword matching."""
+
+    score: float
+    presentTerms: List[str]
+    missingTerms: List[str]
+    cached: bool = False
+
+
 class GenerateResponse(BaseModel):
     """Response model for generate endpoint."""
 
@@ -0,0 +1,142 @@
+"""
+Lightweight per-request span recorder for Server-Timing and timing logs.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Spans recorded for the current request as (name, duration in ms) pairs. The
+# list is shared by reference with tasks spawned from the request, so a
+# background stream producer keeps appending to the same request's spans.
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "server_timing_spans", default=None
+)
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """
+    Begin recording spans for the current request.
+
+    Returns:
+        List[Tuple[str, float]]: The span list bound to the request context
+    """
+    spans: List[Tuple[str, float]] = []
+    _spans.set(spans)
+    return spans
+
+
+def record_span(name: str, duration_ms: float) -> None:
+    """
+    Record a completed span if a request is being timed.
+
+    Args:
+        name: Span name, a Server-Timing metric token
+        duration_ms: Span duration in milliseconds
+    """
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((name, duration_ms))
+
+
+@contextmanager
+def span(
+    name: str, observe: Optional[Callable[[float], None]] = None
+) -> Iterator[None]:
+    """
+    Time a block of code as a named span.
+
+    Args:
+        name: Span name, a Server-Timing metric token
+        observe: Optional callback receiving the duration in seconds,
+            e.g. a histogram's ``observe``
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        record_span(name, elapsed * 1000)
+        if observe:
+            observe(elapsed)
+
+
+def timed(
+    name: str, observe: Optional[Callable[[float], None]] = None
+) -> Callable[[F], F]:
+    """
+    Decorate a sync or async function so each call is recorded as a span.
+
+    Args:
+        name: Span name, a Server-Timing metric token
+        observe: Optional callback receiving the duration in seconds
+
+    Returns:
+        Callable[[F], F]: Decorator
+    """
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name, observe):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, observe):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def get_spans() -> List[Tuple[str, float]]:
+    """
+    Get the spans recorded so far for the current request.
+
+    Returns:
+        List[Tuple[str, float]]: Recorded (name, duration in ms) pairs
+    """
+    return list(_spans.get() or [])
+
+
+def summarize_spans(spans: List[Tuple[str, float]]) -> Dict[str, float]:
+    """
+    Sum span durations by name, rounded for logging and metadata frames.
+
+    Args:
+        spans: Recorded (name, duration in ms) pairs
+
+    Returns:
+        Dict[str, float]: Total milliseconds per span name
+    """
+    totals: Dict[str, float] = {}
+    for name, duration_ms in spans:
+        totals[name] = totals.get(name, 0.0) + duration_ms
+    return {name: round(duration_ms, 2) for name, duration_ms in totals.items()}
+
+
+def format_server_timing(spans: List[Tuple[str, float]]) -> str:
+    """
+    Render spans as a ``Server-Timing`` header value.
+
+    Args:
+        spans: Recorded (name, duration in ms) pairs
+
+    Returns:
+        str: Header value, e.g. ``auth;dur=1.2, db.get_resume;dur=30.4``
+    """
+    return ", ".join(
+        f"{name};dur={duration_ms}"
+        for name, duration_ms in summarize_spans(spans).items()
+    )
@@ -0,0 +1,68 @@
+"""
+Local token estimation for sizing model context without a tokenizer call.
+"""
+
+from typing import Any, Dict
+
+# Fixed per-message cost of role and turn markers
+MESSAGE_OVERHEAD_TOKENS = 4
+ASCII_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a message.
+
+    English text averages about four characters per token, while CJK and other
+    non-ASCII scripts are closer to one character per token, so the two are
+    counted separately. The word count is a floor for short-word text.
+
+    Args:
+        text: Message text
+
+    Returns:
+        int: Approximate tokens, including per-message overhead
+    """
+    if text.isascii():
+        estimate = len(text) // ASCII_CHARS_PER_TOKEN
+    else:
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        estimate = ascii_chars // ASCII_CHARS_PER_TOKEN + len(text) - ascii_chars
+    return max(estimate, len(text.split())) + MESSAGE_OVERHEAD_TOKENS
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """
+    Get a stored message's token count, estimating it for rows without one.
+
+    Args:
+        message: Message row with ``content`` and optional ``token_count``
+
+    Returns:
+        int: Token count
+    """
+    token_count = message.get("token_count")
+    if token_count is None:
+        return estimate_tokens(message["content"])
+    return token_count
+
+
+def truncate_to_tokens(text: str, token_budget: int) -> str:
+    """
+    Cut text to its leading part that fits a token budget.
+
+    Args:
+        text: Message text
+        token_budget: Maximum estimated tokens, including per-message overhead
+
+    Returns:
+        str: Text, shortened if its estimate exceeds the budget
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= token_budget:
+        return text
+    content_budget = max(token_budget - MESSAGE_OVERHEAD_TOKENS, 0)
+    end = len(text) * content_budget // max(tokens - MESSAGE_OVERHEAD_TOKENS, 1)
+    while end and estimate_tokens(text[:end]) > token_budget:
+        end = end * 9 // 10
+    return text[:end]
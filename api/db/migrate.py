@@ -0,0 +1,215 @@
+"""
+Versioned SQL migrations for the API's tables.
+
+Migrations are the ``NNNN_name.sql`` files in ``api/db/migrations``, applied in
+version order, each in its own transaction, and recorded in
+``schema_migrations`` with a checksum. An advisory lock keeps concurrent
+deploys from applying the same migration twice, and an applied migration
+whose file has since changed stops the run instead of being skipped.
+
+Usage:
+    python -m api.db.migrate                 # apply pending migrations
+    python -m api.db.migrate --status        # list applied and pending
+    python -m api.db.migrate --database-url postgresql://...
+"""
+
+import argparse
+import asyncio
+import hashlib
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+from api.core.config import settings
+from api.core.logging import log_info
+
+if TYPE_CHECKING:
+    import asyncpg
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Arbitrary key shared by every runner
+ADVISORY_LOCK_ID = 7_241_093_114
+_FILE_NAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+class Migration(NamedTuple):
+    """One migration file."""
+
+    version: int
+    name: str
+    sql: str
+    checksum: str
+
+
+class MigrationError(Exception):
+    """Migrations on disk and in the database disagree."""
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """
+    Read the migration files in version order.
+
+    Args:
+        directory: Directory holding ``NNNN_name.sql`` files
+
+    Returns:
+        List[Migration]: Migrations sorted by version
+
+    Raises:
+        MigrationError: If two files share a version
+    """
+    migrations: Dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILE_NAME.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"Duplicate migration version {version:04d}")
+        sql = path.read_text()
+        migrations[version] = Migration(
+            version=version,
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode()).hexdigest(),
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+async def _applied(connection: "asyncpg.Connection") -> Dict[int, str]:
+    await connection.execute(
+        """
+        create table if not exists schema_migrations (
+            version integer primary key,
+            name text not null,
+            checksum text not null,
+            applied_at timestamptz not null default now()
+        )
+        """
+    )
+    rows = await connection.fetch("select version, checksum from schema_migrations")
+    return {row["version"]: row["checksum"] for row in rows}
+
+
+def _pending(migrations: List[Migration], applied: Dict[int, str]) -> List[Migration]:
+    """
+    Select migrations not yet applied, checking applied ones are unchanged.
+
+    Raises:
+        MigrationError: If an applied migration's file changed or is missing
+    """
+    known = {migration.version for migration in migrations}
+    missing = sorted(set(applied) - known)
+    if missing:
+        raise MigrationError(
+            f"Applied migrations missing on disk: {', '.join(f'{v:04d}' for v in missing)}"
+        )
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.version:04d}_{migration.name} was edited "
+                "after being applied; add a new migration instead"
+            )
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+async def migrate(
+    database_url: str, migrations: Optional[List[Migration]] = None
+) -> List[Migration]:
+    """
+    Apply pending migrations.
+
+    Args:
+        database_url: Postgres connection URL
+        migrations: Migrations to apply, defaults to the shipped files
+
+    Returns:
+        List[Migration]: Migrations applied by this run
+
+    Raises:
+        MigrationError: If applied migrations do not match the files
+    """
+    import asyncpg
+
+    migrations = load_migrations() if migrations is None else migrations
+    connection = await asyncpg.connect(database_url)
+    try:
+        await connection.execute("select pg_advisory_lock($1)", ADVISORY_LOCK_ID)
+        try:
+            pending = _pending(migrations, await _applied(connection))
+            for migration in pending:
+                async with connection.transaction():
+                    await connection.execute(migration.sql)
+                    await connection.execute(
+                        "insert into schema_migrations (version, name, checksum) "
+                        "values ($1, $2, $3)",
+                        migration.version,
+                        migration.name,
+                        migration.checksum,
+                    )
+                log_info(
+                    "Applied migration",
+                    extra={"version": migration.version, "migration": migration.name},
+                )
+            return pending
+        finally:
+            await connection.execute("select pg_advisory_unlock($1)", ADVISORY_LOCK_ID)
+    finally:
+        await connection.close()
+
+
+async def status(database_url: str) -> Dict[str, List[Migration]]:
+    """
+    List applied and pending migrations without applying any.
+
+    Args:
+        database_url: Postgres connection URL
+
+    Returns:
+        Dict[str, List[Migration]]: ``applied`` and ``pending`` migrations
+
+    Raises:
+        MigrationError: If applied migrations do not match the files
+    """
+    import asyncpg
+
+    migrations = load_migrations()
+    connection = await asyncpg.connect(database_url)
+    try:
+        applied = await _applied(connection)
+    finally:
+        await connection.close()
+    pending = _pending(migrations, applied)
+    return {
+        "applied": [m for m in migrations if m.version in applied],
+        "pending": pending,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument(
+        "--status", action="store_true", help="list migrations, apply nothing"
+    )
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("set DATABASE_URL or pass --database-url")
+
+    if args.status:
+        result = asyncio.run(status(args.database_url))
+        for state in ("applied", "pending"):
+            for migration in result[state]:
+                print(f"{state:8} {migration.version:04d}_{migration.name}")
+        return
+
+    applied = asyncio.run(migrate(args.database_url))
+    for migration in applied:
+        print(f"applied  {migration.version:04d}_{migration.name}")
+    if not applied:
+        print("Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+-- Tables as the API first used them. "if not exists" keeps this a no-op on
+-- projects whose tables were created in the Supabase dashboard.
+
+create table if not exists "user" (
+    id text primary key,
+    display_name text,
+    primary_email text,
+    primary_email_verified boolean not null default false,
+    profile_image_url text,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists message (
+    id bigint generated by default as identity primary key,
+    thread_id text not null,
+    sender text not null,
+    content text not null,
+    sent_at timestamptz not null default now()
+);
+
+create table if not exists resume (
+    id bigint generated by default as identity primary key,
+    thread_id text not null,
+    file_name text,
+    name text,
+    mime_type text,
+    size_bytes bigint,
+    create_time timestamptz,
+    expiration_time timestamptz,
+    update_time timestamptz,
+    sha256_hash text,
+    uri text,
+    state text,
+    source text
+);
+
+create table if not exists job_description (
+    id bigint generated by default as identity primary key,
+    thread_id text not null,
+    file_name text,
+    name text,
+    mime_type text,
+    size_bytes bigint,
+    create_time timestamptz,
+    expiration_time timestamptz,
+    update_time timestamptz,
+    sha256_hash text,
+    uri text,
+    state text,
+    source text
+);
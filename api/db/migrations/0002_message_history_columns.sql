@@ -0,0 +1,7 @@
+-- Columns written with each message since history retrieval and token
+-- budgeting: whether the answer hit the output limit, the stored token count
+-- and the base64 float32 embedding.
+
+alter table message add column if not exists truncated boolean not null default false;
+alter table message add column if not exists token_count integer;
+alter table message add column if not exists embedding text;
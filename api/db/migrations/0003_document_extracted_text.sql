@@ -0,0 +1,5 @@
+-- Normalized document text extracted at upload, sent to the model instead of
+-- the Gemini file when available.
+
+alter table resume add column if not exists extracted_text text;
+alter table job_description add column if not exists extracted_text text;
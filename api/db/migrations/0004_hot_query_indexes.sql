@@ -0,0 +1,27 @@
+-- Indexes for the per-turn queries.
+
+-- get_messages and get_history_window: newest messages of a thread
+create index if not exists message_thread_id_sent_at_idx
+    on message (thread_id, sent_at desc);
+
+-- get_thread_messages: a thread's messages after the last indexed id
+create index if not exists message_thread_id_id_idx
+    on message (thread_id, id);
+
+-- One document of each kind per thread, required by the upserts on
+-- thread_id. Older duplicates, left by the select-then-insert saves, go first.
+delete from resume older
+    using resume newer
+    where older.thread_id = newer.thread_id and older.id < newer.id;
+create unique index if not exists resume_thread_id_key on resume (thread_id);
+
+delete from job_description older
+    using job_description newer
+    where older.thread_id = newer.thread_id and older.id < newer.id;
+create unique index if not exists job_description_thread_id_key
+    on job_description (thread_id);
+
+-- Finding documents by content hash, e.g. the same file uploaded twice
+create index if not exists resume_sha256_hash_idx on resume (sha256_hash);
+create index if not exists job_description_sha256_hash_idx
+    on job_description (sha256_hash);
@@ -0,0 +1,17 @@
+-- Messages of threads archived by the file garbage collector after a period
+-- with no activity, moved out of the hot message table.
+
+create table if not exists message_archive (
+    id bigint primary key,
+    thread_id text not null,
+    sender text not null,
+    content text not null,
+    sent_at timestamptz not null,
+    truncated boolean not null default false,
+    token_count integer,
+    embedding text,
+    archived_at timestamptz not null default now()
+);
+
+create index if not exists message_archive_thread_id_idx
+    on message_archive (thread_id, sent_at);
@@ -0,0 +1,5 @@
+-- Thread exports page through a thread's archived messages by id, like the
+-- live ones (see message_thread_id_id_idx).
+
+create index if not exists message_archive_thread_id_id_idx
+    on message_archive (thread_id, id);
@@ -0,0 +1,414 @@
+"""
+Direct Postgres implementation of the hot database queries.
+
+Selected with ``DB_BACKEND=postgres``. Queries go straight to Postgres over an
+asyncpg connection pool instead of through PostgREST, saving an HTTP hop and a
+JSON round trip per lookup. asyncpg prepares each statement on first use per
+connection and keeps it in the connection's statement cache, so repeated
+lookups skip parsing and planning.
+
+Rows are returned in the same JSON-compatible shape as PostgREST, so callers
+and the shared cache see no difference between backends.
+"""
+
+import asyncio
+import datetime
+import decimal
+import uuid
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from api.core.config import settings
+from api.core.logging import log_info
+
+if TYPE_CHECKING:
+    import asyncpg
+
+# Columns of the document tables written by the application
+DOCUMENT_COLUMNS = (
+    "thread_id",
+    "file_name",
+    "name",
+    "mime_type",
+    "size_bytes",
+    "create_time",
+    "expiration_time",
+    "update_time",
+    "sha256_hash",
+    "uri",
+    "state",
+    "source",
+    "extracted_text",
+)
+DOCUMENT_TABLES = ("resume", "job_description")
+# Gemini file timestamps, passed as strings by the service layer
+TIMESTAMP_COLUMNS = frozenset(("create_time", "expiration_time", "update_time"))
+
+INSERT_MESSAGE = """
+    insert into message (thread_id, sender, content, truncated, token_count)
+    values ($1, $2, $3, $4, $5)
+    returning *
+"""
+# Includes archived messages, so an archived thread's history stays readable
+SELECT_MESSAGES = """
+    select id, sender, content, sent_at from (
+        select id, sender, content, sent_at
+        from message
+        where thread_id = $1
+        union all
+        select id, sender, content, sent_at
+        from message_archive
+        where thread_id = $1
+    ) messages
+    order by sent_at desc
+    limit $2
+"""
+SELECT_THREAD_MESSAGES = """
+    select id, sender, content, sent_at, token_count, embedding from message
+    where thread_id = $1 and id > $2
+    order by id
+    limit $3
+"""
+SELECT_HISTORY_WINDOW = """
+    select id, sender, content, token_count from message
+    where thread_id = $1
+    order by sent_at desc
+    limit $2
+"""
+# Archived messages keep their ids, so one keyset covers both tables
+SELECT_MESSAGE_PAGE = """
+    select id, sender, content, sent_at, truncated, token_count from (
+        select id, sender, content, sent_at, truncated, token_count
+        from message_archive
+        where thread_id = $1 and id > $2
+        union all
+        select id, sender, content, sent_at, truncated, token_count
+        from message
+        where thread_id = $1 and id > $2
+    ) messages
+    order by id
+    limit $3
+"""
+UPDATE_TOKEN_COUNT = "update message set token_count = $2 where id = $1"
+UPDATE_EMBEDDING = "update message set embedding = $2 where id = $1"
+SELECT_DOCUMENT = "select * from {table} where thread_id = $1"
+UPSERT_DOCUMENT = """
+    insert into {table} ({columns}) values ({values})
+    on conflict (thread_id) do update set {updates}
+    returning *
+"""
+SELECT_DOCUMENT_FILE_NAMES = """
+    select name from resume where name is not null
+    union
+    select name from job_description where name is not null
+"""
+# Moves the messages of threads idle since $1 to message_archive and detaches
+# their documents from Gemini files, so the file collector deletes them
+ARCHIVE_THREADS = """
+    with dead as (
+        select thread_id from message
+        group by thread_id
+        having max(sent_at) < $1
+        order by max(sent_at)
+        limit $2
+    ), moved as (
+        delete from message using dead
+        where message.thread_id = dead.thread_id
+        returning message.*
+    ), archived as (
+        insert into message_archive (
+            id, thread_id, sender, content, sent_at, truncated, token_count, embedding
+        )
+        select id, thread_id, sender, content, sent_at, truncated, token_count, embedding
+        from moved
+        on conflict (id) do nothing
+    ), resumes as (
+        update resume set name = null, uri = null, state = 'ARCHIVED'
+        where thread_id in (select thread_id from dead)
+    ), job_descriptions as (
+        update job_description set name = null, uri = null, state = 'ARCHIVED'
+        where thread_id in (select thread_id from dead)
+    )
+    select thread_id from dead
+"""
+
+
+def _upsert_sql(table: str) -> str:
+    return UPSERT_DOCUMENT.format(
+        table=table,
+        columns=", ".join(DOCUMENT_COLUMNS),
+        values=", ".join(f"${i}" for i in range(1, len(DOCUMENT_COLUMNS) + 1)),
+        updates=", ".join(
+            f"{column} = excluded.{column}"
+            for column in DOCUMENT_COLUMNS
+            if column != "thread_id"
+        ),
+    )
+
+
+_pool: Optional["asyncpg.Pool"] = None
+_pool_lock = asyncio.Lock()
+
+
+def enabled() -> bool:
+    """
+    Check whether the hot queries should bypass PostgREST.
+
+    Returns:
+        bool: True if ``DB_BACKEND`` is ``postgres``
+    """
+    return settings.DB_BACKEND.lower() == "postgres"
+
+
+async def get_pool() -> "asyncpg.Pool":
+    """
+    Get the shared connection pool, opening it on first use.
+
+    Returns:
+        asyncpg.Pool: Connection pool for ``DATABASE_URL``
+
+    Raises:
+        ValueError: If ``DATABASE_URL`` is not set
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    async with _pool_lock:
+        if _pool is None:
+            if not settings.DATABASE_URL:
+                raise ValueError("DATABASE_URL is required for the postgres backend")
+            import asyncpg
+
+            _pool = await asyncpg.create_pool(
+                settings.DATABASE_URL,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                command_timeout=settings.DB_COMMAND_TIMEOUT_SECONDS,
+            )
+            log_info(
+                "Postgres pool opened",
+                extra={
+                    "min_size": settings.DB_POOL_MIN_SIZE,
+                    "max_size": settings.DB_POOL_MAX_SIZE,
+                },
+            )
+    return _pool
+
+
+async def close_pool() -> None:
+    """Close the connection pool, if it was opened."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def _parameter(column: str, value: Any) -> Any:
+    if column in TIMESTAMP_COLUMNS and isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _rows(records: List["asyncpg.Record"]) -> List[Dict[str, Any]]:
+    """Convert records to dicts with the JSON types PostgREST would return."""
+    return [
+        {key: _json_value(value) for key, value in record.items()} for record in records
+    ]
+
+
+async def create_message(
+    thread_id: str, sender: str, content: str, truncated: bool, token_count: int
+) -> List[Dict[str, Any]]:
+    """
+    Insert a message.
+
+    Args:
+        thread_id: Thread identifier
+        sender: ``user`` or ``model``
+        content: Message text
+        truncated: Whether the model answer was cut short
+        token_count: Stored token count
+
+    Returns:
+        List[Dict[str, Any]]: Created message row
+    """
+    pool = await get_pool()
+    return _rows(
+        await pool.fetch(
+            INSERT_MESSAGE, thread_id, sender, content, truncated, token_count
+        )
+    )
+
+
+async def get_messages(thread_id: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Fetch a thread's newest live or archived messages, newest first.
+
+    Args:
+        thread_id: Thread identifier
+        limit: Maximum number of messages
+
+    Returns:
+        List[Dict[str, Any]]: Message rows
+    """
+    pool = await get_pool()
+    return _rows(await pool.fetch(SELECT_MESSAGES, thread_id, limit))
+
+
+async def get_thread_messages(
+    thread_id: str, after_id: int, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Fetch a thread's messages after a known id, oldest first.
+
+    Args:
+        thread_id: Thread identifier
+        after_id: Only return messages with a greater id
+        limit: Maximum number of messages
+
+    Returns:
+        List[Dict[str, Any]]: Message rows
+    """
+    pool = await get_pool()
+    return _rows(await pool.fetch(SELECT_THREAD_MESSAGES, thread_id, after_id, limit))
+
+
+async def get_history_window(thread_id: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Fetch the columns of a thread's newest messages needed for model history.
+
+    Args:
+        thread_id: Thread identifier
+        limit: Maximum number of messages
+
+    Returns:
+        List[Dict[str, Any]]: Message rows, newest first
+    """
+    pool = await get_pool()
+    return _rows(await pool.fetch(SELECT_HISTORY_WINDOW, thread_id, limit))
+
+
+async def get_message_page(
+    thread_id: str, after_id: int, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Fetch a page of a thread's live and archived messages after a known id.
+
+    Args:
+        thread_id: Thread identifier
+        after_id: Only return messages with a greater id
+        limit: Maximum number of messages
+
+    Returns:
+        List[Dict[str, Any]]: Message rows without embeddings, oldest first
+    """
+    pool = await get_pool()
+    return _rows(await pool.fetch(SELECT_MESSAGE_PAGE, thread_id, after_id, limit))
+
+
+async def save_message_token_counts(token_counts: Dict[int, int]) -> None:
+    """
+    Store token counts on their message rows in one batched round trip.
+
+    Args:
+        token_counts: Token count per message id
+    """
+    pool = await get_pool()
+    await pool.executemany(UPDATE_TOKEN_COUNT, list(token_counts.items()))
+
+
+async def save_message_embeddings(embeddings: Dict[int, str]) -> None:
+    """
+    Store encoded embeddings on their message rows in one batched round trip.
+
+    Args:
+        embeddings: Encoded embedding per message id
+    """
+    pool = await get_pool()
+    await pool.executemany(UPDATE_EMBEDDING, list(embeddings.items()))
+
+
+async def get_document(table: str, thread_id: str) -> List[Dict[str, Any]]:
+    """
+    Fetch a thread's resume or job description.
+
+    Args:
+        table: ``resume`` or ``job_description``
+        thread_id: Thread identifier
+
+    Returns:
+        List[Dict[str, Any]]: Matching rows, empty if none
+    """
+    if table not in DOCUMENT_TABLES:
+        raise ValueError(f"Unknown document table: {table}")
+    pool = await get_pool()
+    return _rows(await pool.fetch(SELECT_DOCUMENT.format(table=table), thread_id))
+
+
+async def save_documents(
+    rows: Dict[str, Dict[str, Any]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Upsert document rows on ``thread_id`` in one transaction.
+
+    Args:
+        rows: Row to write, keyed by table
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Saved rows keyed by table
+    """
+    pool = await get_pool()
+    saved = {}
+    async with pool.acquire() as connection, connection.transaction():
+        for table, row in rows.items():
+            if table not in DOCUMENT_TABLES:
+                raise ValueError(f"Unknown document table: {table}")
+            saved[table] = _rows(
+                await connection.fetch(
+                    _upsert_sql(table),
+                    *(
+                        _parameter(column, row.get(column))
+                        for column in DOCUMENT_COLUMNS
+                    ),
+                )
+            )
+    return saved
+
+
+async def get_document_file_names() -> List[str]:
+    """
+    Fetch the Gemini file names referenced by any resume or job description.
+
+    Returns:
+        List[str]: Referenced file names
+    """
+    pool = await get_pool()
+    return [record["name"] for record in await pool.fetch(SELECT_DOCUMENT_FILE_NAMES)]
+
+
+async def archive_threads(inactive_before: datetime.datetime, limit: int) -> List[str]:
+    """
+    Archive threads whose newest message is older than a cutoff.
+
+    Their messages move to ``message_archive`` and their documents lose their
+    Gemini file references, in one statement.
+
+    Args:
+        inactive_before: Threads with no message since then are archived
+        limit: Maximum number of threads to archive
+
+    Returns:
+        List[str]: Archived thread identifiers
+    """
+    pool = await get_pool()
+    records = await pool.fetch(ARCHIVE_THREADS, inactive_before, limit)
+    return [record["thread_id"] for record in records]
@@ -1,21 +1,113 @@
 """
 Database service layer for Supabase operations.
+
+The hot reads and writes go to Postgres directly through ``api.db.postgres``
+when ``DB_BACKEND`` is ``postgres``; everything else uses PostgREST.
 """
 
-import traceback
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
-from google.genai.types import File
-from supabase import Client
+import anyio
 
-from api.core.logging import log_error
+from api.core.cache import get_cache
+from api.core.logging import log_exception
+from api.core.metrics import DB_CALL_LATENCY
 from api.core.schemas import Message, User
+from api.core.timing import timed
+from api.core.tokens import estimate_tokens
+from api.db import postgres
+
+if TYPE_CHECKING:
+    from google.genai.types import File
+    from supabase import Client
+
+# Document state set when a thread is archived and its Gemini file detached
+ARCHIVED_STATE = "ARCHIVED"
+
+# Columns the chat history renders; embeddings are never sent to the client
+HISTORY_COLUMNS = "id,sender,content,sent_at"
+
+# Rows per PostgREST page when listing every document's file name
+FILE_NAME_PAGE_SIZE = 1000
+
+
+def _live_documents(
+    rows: Optional[List[Dict[str, Any]]],
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Drop document rows of archived threads, which no longer have a file.
+
+    Callers then treat the document as missing and ask for a new upload.
+
+    Args:
+        rows: Document rows
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: Rows still backed by a file, or None
+    """
+    return [row for row in rows or () if row.get("state") != ARCHIVED_STATE] or None
 
 
-async def create_message(supabase: Client, message: Message) -> List[Dict[str, Any]]:
+def _timed_db_call(function: str):
+    """
+    Record a database call as a Server-Timing span and a latency histogram sample.
+
+    Args:
+        function: Service function name
+
+    Returns:
+        Decorator for the service function
+    """
+    return timed(f"db.{function}", DB_CALL_LATENCY.labels(function).observe)
+
+
+def _cached_by_thread(kind: str, key: str):
+    """
+    Serve a thread-scoped read from the shared cache.
+
+    Applied above ``_timed_db_call`` so cache hits are not recorded as
+    database calls. The cache key includes the call's remaining arguments.
+
+    Args:
+        kind: Namespace kind, ``documents`` or ``messages``
+        key: Key of the read within the thread's namespace
+
+    Returns:
+        Decorator for a service function taking ``(supabase, thread_id, ...)``
+    """
+
+    def decorator(function):
+        @wraps(function)
+        async def wrapper(supabase: "Client", thread_id: str, *args, **kwargs):
+            cache_key = ":".join(
+                [key, *map(str, args), *(f"{k}={v}" for k, v in sorted(kwargs.items()))]
+            )
+            return await get_cache().get_or_load(
+                f"{kind}:{thread_id}",
+                cache_key,
+                lambda: function(supabase, thread_id, *args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorator
+
+
+async def _invalidate_thread(thread_id: str, kind: str) -> None:
+    """Drop a thread's cached documents or messages after a write."""
+    await get_cache().invalidate(f"{kind}:{thread_id}")
+
+
+@_timed_db_call("create_message")
+async def create_message(supabase: "Client", message: Message) -> List[Dict[str, Any]]:
     """
     Create a new message in the database.
 
+    The message's token count is stored with it, estimated locally unless the
+    caller already knows the exact count.
+
     Args:
         supabase: Supabase client instance
         message: Message data to create
@@ -26,27 +118,46 @@ async def create_message(supabase: Client, message: Message) -> List[Dict[str, A
     Raises:
         Exception: If message creation fails
     """
+    token_count = (
+        message.token_count
+        if message.token_count is not None
+        else estimate_tokens(message.content)
+    )
     try:
-        data = (
-            supabase.table("message")
-            .insert(
-                {
-                    "thread_id": message.thread_id,
-                    "sender": message.sender,
-                    "content": message.content,
-                }
+        if postgres.enabled():
+            rows = await postgres.create_message(
+                message.thread_id,
+                message.sender,
+                message.content,
+                message.truncated,
+                token_count,
             )
-            .execute()
-        )
-        return data.data
+        else:
+            rows = (
+                supabase.table("message")
+                .insert(
+                    {
+                        "thread_id": message.thread_id,
+                        "sender": message.sender,
+                        "content": message.content,
+                        "truncated": message.truncated,
+                        "token_count": token_count,
+                    }
+                )
+                .execute()
+                .data
+            )
+        await _invalidate_thread(message.thread_id, "messages")
+        return rows
     except Exception as e:
-        log_error(f"Error creating message: {e}")
-        traceback.print_exc()
+        log_exception(f"Error creating message: {e}")
         raise Exception(f"Error creating message: {e}")
 
 
+@_cached_by_thread("messages", "messages")
+@_timed_db_call("get_messages")
 async def get_messages(
-    supabase: Client, thread_id: str, limit: int = 20
+    supabase: "Client", thread_id: str, limit: int = 20
 ) -> List[Dict[str, Any]]:
     """
     Retrieve messages for a specific thread.
@@ -63,9 +174,11 @@ async def get_messages(
         Exception: If message retrieval fails
     """
     try:
+        if postgres.enabled():
+            return await postgres.get_messages(thread_id, limit)
         query = (
             supabase.table("message")
-            .select("*")
+            .select(HISTORY_COLUMNS)
             .eq("thread_id", thread_id)
             .order("sent_at", desc=True)
             .limit(limit)
@@ -73,13 +186,207 @@ async def get_messages(
         data = query.execute()
         return data.data
     except Exception as e:
-        log_error(f"Error getting messages: {e}")
-        traceback.print_exc()
+        log_exception(f"Error getting messages: {e}")
         raise Exception(f"Error getting messages: {e}")
 
 
+@_timed_db_call("get_thread_messages")
+async def get_thread_messages(
+    supabase: "Client", thread_id: str, after_id: int = 0, limit: int = 1000
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve a thread's messages in insertion order, optionally after a known id.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        after_id: Only return messages with a greater id
+        limit: Maximum number of messages to retrieve
+
+    Returns:
+        List[Dict[str, Any]]: Messages, oldest first
+
+    Raises:
+        Exception: If message retrieval fails
+    """
+    try:
+        if postgres.enabled():
+            return await postgres.get_thread_messages(thread_id, after_id, limit)
+        data = (
+            supabase.table("message")
+            .select("id,sender,content,sent_at,token_count,embedding")
+            .eq("thread_id", thread_id)
+            .gt("id", after_id)
+            .order("id")
+            .limit(limit)
+            .execute()
+        )
+        return data.data
+    except Exception as e:
+        log_exception(f"Error getting thread messages: {e}")
+        raise Exception(f"Error getting thread messages: {e}")
+
+
+@_timed_db_call("get_message_page")
+async def get_message_page(
+    supabase: "Client", thread_id: str, after_id: int = 0, limit: int = 1000
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve one keyset page of a thread's messages for export.
+
+    Pages are ordered by id, so passing the last id of a page returns the next
+    one without re-reading earlier rows. Embeddings are not fetched. On the
+    Postgres backend, messages of archived threads are included.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        after_id: Only return messages with a greater id
+        limit: Maximum number of messages to retrieve
+
+    Returns:
+        List[Dict[str, Any]]: Messages, oldest first
+
+    Raises:
+        Exception: If message retrieval fails
+    """
+    try:
+        if postgres.enabled():
+            return await postgres.get_message_page(thread_id, after_id, limit)
+        data = (
+            supabase.table("message")
+            .select("id,sender,content,sent_at,truncated,token_count")
+            .eq("thread_id", thread_id)
+            .gt("id", after_id)
+            .order("id")
+            .limit(limit)
+            .execute()
+        )
+        return data.data
+    except Exception as e:
+        log_exception(f"Error getting message page: {e}")
+        raise Exception(f"Error getting message page: {e}")
+
+
+@_cached_by_thread("messages", "window")
+@_timed_db_call("get_history_window")
+async def get_history_window(
+    supabase: "Client", thread_id: str, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve the newest messages of a thread with their token counts.
+
+    One query served by the ``(thread_id, sent_at desc)`` index; only the
+    columns needed to build model history are fetched.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        limit: Maximum number of messages to retrieve
+
+    Returns:
+        List[Dict[str, Any]]: Messages, newest first
+
+    Raises:
+        Exception: If message retrieval fails
+    """
+    try:
+        if postgres.enabled():
+            return await postgres.get_history_window(thread_id, limit)
+        data = (
+            supabase.table("message")
+            .select("id,sender,content,token_count")
+            .eq("thread_id", thread_id)
+            .order("sent_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return data.data
+    except Exception as e:
+        log_exception(f"Error getting history window: {e}")
+        raise Exception(f"Error getting history window: {e}")
+
+
+def _update_message_column(
+    supabase: "Client", column: str, values: Dict[int, Any]
+) -> None:
+    """
+    Set one column on each message row, one PostgREST request per row.
+
+    Blocking; run it in a worker thread so the event loop keeps serving.
+
+    Args:
+        supabase: Supabase client instance
+        column: Column to set
+        values: Column value per message id
+    """
+    for message_id, value in values.items():
+        supabase.table("message").update({column: value}).eq("id", message_id).execute()
+
+
+@_timed_db_call("save_message_token_counts")
+async def save_message_token_counts(
+    supabase: "Client", thread_id: str, token_counts: Dict[int, int]
+) -> None:
+    """
+    Replace estimated token counts with exact ones.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread the messages belong to
+        token_counts: Token count per message id
+
+    Raises:
+        Exception: If the update fails
+    """
+    try:
+        if postgres.enabled():
+            await postgres.save_message_token_counts(token_counts)
+        else:
+            await anyio.to_thread.run_sync(
+                _update_message_column, supabase, "token_count", token_counts
+            )
+        await _invalidate_thread(thread_id, "messages")
+    except Exception as e:
+        log_exception(f"Error saving message token counts: {e}")
+        raise Exception(f"Error saving message token counts: {e}")
+
+
+@_timed_db_call("save_message_embeddings")
+async def save_message_embeddings(
+    supabase: "Client", thread_id: str, embeddings: Dict[int, str]
+) -> None:
+    """
+    Store encoded embeddings on their message rows.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread the messages belong to
+        embeddings: Encoded embedding per message id
+
+    Raises:
+        Exception: If the update fails
+    """
+    try:
+        if postgres.enabled():
+            await postgres.save_message_embeddings(embeddings)
+        else:
+            await anyio.to_thread.run_sync(
+                _update_message_column, supabase, "embedding", embeddings
+            )
+        await _invalidate_thread(thread_id, "messages")
+    except Exception as e:
+        log_exception(f"Error saving message embeddings: {e}")
+        raise Exception(f"Error saving message embeddings: {e}")
+
+
+@_timed_db_call("save_resume")
 async def save_resume(
-    supabase: Client, thread_id: str, file_name: str, resume_file: File
+    supabase: "Client",
+    thread_id: str,
+    file_name: str,
+    resume_file: "File",
+    extracted_text: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Save or update a resume file in the database.
@@ -89,6 +396,7 @@ async def save_resume(
         thread_id: Thread identifier
         file_name: Name of the file
         resume_file: Google GenAI File object
+        extracted_text: Optional normalized text of the document
 
     Returns:
         List[Dict[str, Any]]: Saved resume data
@@ -97,8 +405,14 @@ async def save_resume(
         Exception: If resume save fails
     """
     file_data = _extract_file_data(thread_id, file_name, resume_file)
+    file_data["extracted_text"] = extracted_text
 
     try:
+        if postgres.enabled():
+            saved = await postgres.save_documents({"resume": file_data})
+            await _invalidate_thread(thread_id, "documents")
+            return saved["resume"]
+
         existing_resume = (
             supabase.table("resume").select("*").eq("thread_id", thread_id).execute()
         )
@@ -113,15 +427,17 @@ async def save_resume(
         else:
             data = supabase.table("resume").insert(file_data).execute()
 
+        await _invalidate_thread(thread_id, "documents")
         return data.data
     except Exception as e:
-        log_error(f"Error saving resume: {e}")
-        traceback.print_exc()
+        log_exception(f"Error saving resume: {e}")
         raise Exception(f"Error saving resume: {e}")
 
 
+@_cached_by_thread("documents", "resume")
+@_timed_db_call("get_resume")
 async def get_resume(
-    supabase: Client, thread_id: str
+    supabase: "Client", thread_id: str
 ) -> Optional[List[Dict[str, Any]]]:
     """
     Retrieve resume for a specific thread.
@@ -131,24 +447,32 @@ async def get_resume(
         thread_id: Thread identifier
 
     Returns:
-        Optional[List[Dict[str, Any]]]: Resume data or None if not found
+        Optional[List[Dict[str, Any]]]: Resume data or None if not found or
+        archived
 
     Raises:
         Exception: If resume retrieval fails
     """
     try:
-        data = supabase.table("resume").select("*").eq("thread_id", thread_id).execute()
-        if not data.data:
-            return None
-        return data.data
+        if postgres.enabled():
+            rows = await postgres.get_document("resume", thread_id)
+        else:
+            rows = (
+                supabase.table("resume")
+                .select("*")
+                .eq("thread_id", thread_id)
+                .execute()
+                .data
+            )
+        return _live_documents(rows)
     except Exception as e:
-        log_error(f"Error getting resume: {e}")
-        traceback.print_exc()
+        log_exception(f"Error getting resume: {e}")
         raise Exception(f"Error getting resume: {e}")
 
 
+@_timed_db_call("delete_resume")
 async def delete_resume(
-    supabase: Client, thread_id: str
+    supabase: "Client", thread_id: str
 ) -> Optional[List[Dict[str, Any]]]:
     """
     Delete resume for a specific thread.
@@ -171,15 +495,20 @@ async def delete_resume(
             return None
 
         data = supabase.table("resume").delete().eq("thread_id", thread_id).execute()
+        await _invalidate_thread(thread_id, "documents")
         return data.data
     except Exception as e:
-        log_error(f"Error deleting resume: {e}")
-        traceback.print_exc()
+        log_exception(f"Error deleting resume: {e}")
         raise Exception(f"Error deleting resume: {e}")
 
 
+@_timed_db_call("save_job_description")
 async def save_job_description(
-    supabase: Client, thread_id: str, file_name: str, job_description_file: File
+    supabase: "Client",
+    thread_id: str,
+    file_name: str,
+    job_description_file: "File",
+    extracted_text: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Save or update a job description file in the database.
@@ -189,6 +518,7 @@ async def save_job_description(
         thread_id: Thread identifier
         file_name: Name of the file
         job_description_file: Google GenAI File object
+        extracted_text: Optional normalized text of the document
 
     Returns:
         List[Dict[str, Any]]: Saved job description data
@@ -197,8 +527,14 @@ async def save_job_description(
         Exception: If job description save fails
     """
     file_data = _extract_file_data(thread_id, file_name, job_description_file)
+    file_data["extracted_text"] = extracted_text
 
     try:
+        if postgres.enabled():
+            saved = await postgres.save_documents({"job_description": file_data})
+            await _invalidate_thread(thread_id, "documents")
+            return saved["job_description"]
+
         existing_job_description = (
             supabase.table("job_description")
             .select("*")
@@ -216,15 +552,17 @@ async def save_job_description(
         else:
             data = supabase.table("job_description").insert(file_data).execute()
 
+        await _invalidate_thread(thread_id, "documents")
         return data.data
     except Exception as e:
-        log_error(f"Error saving job description: {e}")
-        traceback.print_exc()
+        log_exception(f"Error saving job description: {e}")
         raise Exception(f"Error saving job description: {e}")
 
 
+@_cached_by_thread("documents", "job_description")
+@_timed_db_call("get_job_description")
 async def get_job_description(
-    supabase: Client, thread_id: str
+    supabase: "Client", thread_id: str
 ) -> Optional[List[Dict[str, Any]]]:
     """
     Retrieve job description for a specific thread.
@@ -234,29 +572,32 @@ async def get_job_description(
         thread_id: Thread identifier
 
     Returns:
-        Optional[List[Dict[str, Any]]]: Job description data or None if not found
+        Optional[List[Dict[str, Any]]]: Job description data or None if not
+        found or archived
 
     Raises:
         Exception: If job description retrieval fails
     """
     try:
-        data = (
-            supabase.table("job_description")
-            .select("*")
-            .eq("thread_id", thread_id)
-            .execute()
-        )
-        if not data.data:
-            return None
-        return data.data
+        if postgres.enabled():
+            rows = await postgres.get_document("job_description", thread_id)
+        else:
+            rows = (
+                supabase.table("job_description")
+                .select("*")
+                .eq("thread_id", thread_id)
+                .execute()
+                .data
+            )
+        return _live_documents(rows)
     except Exception as e:
-        log_error(f"Error getting job description: {e}")
-        traceback.print_exc()
+        log_exception(f"Error getting job description: {e}")
         raise Exception(f"Error getting job description: {e}")
 
 
+@_timed_db_call("delete_job_description")
 async def delete_job_description(
-    supabase: Client, thread_id: str
+    supabase: "Client", thread_id: str
 ) -> Optional[List[Dict[str, Any]]]:
     """
     Delete job description for a specific thread.
@@ -287,14 +628,133 @@ async def delete_job_description(
             .eq("thread_id", thread_id)
             .execute()
         )
+        await _invalidate_thread(thread_id, "documents")
         return data.data
     except Exception as e:
-        log_error(f"Error deleting job description: {e}")
-        traceback.print_exc()
+        log_exception(f"Error deleting job description: {e}")
         raise Exception(f"Error deleting job description: {e}")
 
 
-def _extract_file_data(thread_id: str, file_name: str, file: File) -> Dict[str, Any]:
+@_timed_db_call("save_documents")
+async def save_documents(
+    supabase: "Client",
+    thread_id: str,
+    documents: Dict[str, Tuple[str, "File", Optional[str]]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Save or replace several documents of a thread in one write per table.
+
+    Uses an upsert on ``thread_id`` instead of the select-then-write of
+    ``save_resume``; relies on the unique index on ``thread_id``.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        documents: File name, Google GenAI File object and optional extracted
+            text, keyed by table (``resume`` or ``job_description``)
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Saved rows keyed by table
+
+    Raises:
+        Exception: If saving fails
+    """
+    rows = {}
+    for table, (file_name, file, extracted_text) in documents.items():
+        rows[table] = _extract_file_data(thread_id, file_name, file)
+        rows[table]["extracted_text"] = extracted_text
+    try:
+        if postgres.enabled():
+            saved = await postgres.save_documents(rows)
+        else:
+            saved = {
+                table: supabase.table(table)
+                .upsert(file_data, on_conflict="thread_id")
+                .execute()
+                .data
+                for table, file_data in rows.items()
+            }
+        await _invalidate_thread(thread_id, "documents")
+        return saved
+    except Exception as e:
+        log_exception(f"Error saving documents: {e}")
+        raise Exception(f"Error saving documents: {e}")
+
+
+@_timed_db_call("get_document_file_names")
+async def get_document_file_names(supabase: "Client") -> Set[str]:
+    """
+    Collect the Gemini file names referenced by any resume or job description.
+
+    Args:
+        supabase: Supabase client instance
+
+    Returns:
+        Set[str]: Referenced file names
+
+    Raises:
+        Exception: If the lookup fails
+    """
+    try:
+        if postgres.enabled():
+            return set(await postgres.get_document_file_names())
+
+        names: Set[str] = set()
+        for table in ("resume", "job_description"):
+            start = 0
+            while True:
+                rows = (
+                    supabase.table(table)
+                    .select("name")
+                    .order("id")
+                    .range(start, start + FILE_NAME_PAGE_SIZE - 1)
+                    .execute()
+                    .data
+                )
+                names.update(row["name"] for row in rows if row.get("name"))
+                if len(rows) < FILE_NAME_PAGE_SIZE:
+                    break
+                start += FILE_NAME_PAGE_SIZE
+        return names
+    except Exception as e:
+        log_exception(f"Error getting document file names: {e}")
+        raise Exception(f"Error getting document file names: {e}")
+
+
+@_timed_db_call("archive_threads")
+async def archive_threads(inactive_before: datetime, limit: int) -> List[str]:
+    """
+    Archive threads with no messages since a cutoff.
+
+    Their messages move to ``message_archive`` and their documents are
+    detached from their Gemini files, which the file collector then deletes.
+    Needs the direct Postgres backend, as PostgREST cannot move rows
+    atomically.
+
+    Args:
+        inactive_before: Threads idle since then are archived
+        limit: Maximum number of threads to archive
+
+    Returns:
+        List[str]: Archived thread identifiers
+
+    Raises:
+        Exception: If archiving fails or the postgres backend is not enabled
+    """
+    if not postgres.enabled():
+        raise Exception("Archiving threads requires DB_BACKEND=postgres")
+    try:
+        thread_ids = await postgres.archive_threads(inactive_before, limit)
+        for thread_id in thread_ids:
+            await _invalidate_thread(thread_id, "messages")
+            await _invalidate_thread(thread_id, "documents")
+        return thread_ids
+    except Exception as e:
+        log_exception(f"Error archiving threads: {e}")
+        raise Exception(f"Error archiving threads: {e}")
+
+
+def _extract_file_data(thread_id: str, file_name: str, file: "File") -> Dict[str, Any]:
     """
     Extract file attributes from Google GenAI File object.
 
@@ -328,7 +788,8 @@ def _extract_file_data(thread_id: str, file_name: str, file: File) -> Dict[str,
     }
 
 
-def create_or_update_user(supabase: Client, user: User) -> List[Dict[str, Any]]:
+@_timed_db_call("create_or_update_user")
+def create_or_update_user(supabase: "Client", user: User) -> List[Dict[str, Any]]:
     """
     Create or update a user in the database.
 
@@ -371,6 +832,5 @@ def create_or_update_user(supabase: Client, user: User) -> List[Dict[str, Any]]:
             )
         return data.data
     except Exception as e:
-        log_error(f"Error creating or updating user: {e}")
-        traceback.print_exc()
+        log_exception(f"Error creating or updating user: {e}")
         raise Exception(f"Error creating or updating user: {e}")
@@ -0,0 +1 @@
+"""Jobs domain module."""
@@ -0,0 +1,82 @@
+"""
+Jobs router for polling and streaming the progress of background uploads.
+"""
+
+from typing import AsyncGenerator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from api.auth.stack_auth import verify_stack_token
+from api.core.schemas import UploadJobResponse
+from api.services.gemini import format_sse
+from api.services.uploads import UploadJob, upload_jobs
+
+router = APIRouter(
+    prefix="/api/jobs", tags=["jobs"], dependencies=[Depends(verify_stack_token)]
+)
+
+
+def _get_job(job_id: str) -> UploadJob:
+    job = upload_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+@router.get(
+    "/{job_id}", response_model=UploadJobResponse, status_code=status.HTTP_200_OK
+)
+async def get_job(job_id: str) -> UploadJobResponse:
+    """
+    Get the status of a background upload job.
+
+    Args:
+        job_id: Job identifier from the 202 upload response
+
+    Returns:
+        UploadJobResponse: Job status and, once finished, per-file results
+
+    Raises:
+        HTTPException: If the job is unknown or expired
+    """
+    return UploadJobResponse(**_get_job(job_id).to_dict())
+
+
+@router.get("/{job_id}/events", status_code=status.HTTP_200_OK)
+async def stream_job_events(
+    job_id: str, last_event_id: Optional[str] = Header(None)
+) -> StreamingResponse:
+    """
+    Stream a background upload job's progress as Server-Sent Events.
+
+    Replays events after ``Last-Event-ID`` and closes once the job finishes.
+
+    Args:
+        job_id: Job identifier from the 202 upload response
+        last_event_id: Last SSE event id the client received
+
+    Returns:
+        StreamingResponse: SSE stream of ``status`` and ``file`` events
+
+    Raises:
+        HTTPException: If the job is unknown or the event id is invalid
+    """
+    job = _get_job(job_id)
+    try:
+        cursor = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID"
+        )
+
+    async def events() -> AsyncGenerator[str, None]:
+        async for event_id, event in job.subscribe(cursor):
+            yield f"id: {event_id}\n{format_sse(event)}"
+
+    response = StreamingResponse(events(), media_type="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
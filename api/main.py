@@ -2,38 +2,141 @@
 Main FastAPI application entry point.
 """
 
-from fastapi import FastAPI, Request as FastAPIRequest, status
-from vercel.headers import set_headers
+import asyncio
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import anyio
+from fastapi import Depends, FastAPI, HTTPException, Security, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from api.chat.router import router as chat_router
 from api.resume.router import router as resume_router
 from api.job_description.router import router as job_description_router
 from api.user.router import router as user_router
-from api.core.logging import log_info, logger
+from api.thread.router import router as thread_router
+from api.jobs.router import router as jobs_router
+from api.auth.stack_auth import get_stack_public_key
+from api.core.config import settings
+from api.core.dependencies import close_clients, get_gemini_client, get_supabase_client
+from api.core.logging import log_info, log_warning, logger
+from api.core.metrics import render_metrics
+from api.core.middleware import (
+    CompressionMiddleware,
+    ServerTimingMiddleware,
+    VercelHeadersMiddleware,
+)
 from api.core.schemas import HealthCheckResponse
+from api.db import postgres
+from api.services.file_gc import file_collector
+from api.services.gemini import get_generate_config, get_stream_config
+from api.services.streams import stream_registry
+from api.services.uploads import upload_jobs
+
+
+# Routes polled by probes and scrapers; their timing lines are sampled
+SAMPLED_LOG_PATHS = {"/api/health", "/api/metrics"}
+
+metrics_security = HTTPBearer(auto_error=False)
+
+
+async def warm_up() -> None:
+    """
+    Pay the first-request costs at startup.
+
+    Imports the SDKs, builds the shared clients and static generation configs,
+    fetches the Stack public key and opens connections to Supabase and Gemini
+    (and the Postgres pool, when enabled).
+    A failed step, or one still running after ``WARMUP_TIMEOUT_SECONDS``, is
+    logged and left to the first request that needs it.
+    """
+    start = time.perf_counter()
+    import numpy  # noqa: F401
+    from jose import jwt  # noqa: F401
+
+    supabase = get_supabase_client()
+    gemini_client = get_gemini_client()
+    get_generate_config()
+    get_stream_config()
+
+    steps = {
+        "stack_public_key": anyio.to_thread.run_sync(
+            get_stack_public_key, abandon_on_cancel=True
+        ),
+        "supabase": anyio.to_thread.run_sync(
+            lambda: supabase.table("user").select("id").limit(1).execute(),
+            abandon_on_cancel=True,
+        ),
+        "gemini": gemini_client.aio.models.get(model=settings.GEMINI_MODEL),
+    }
+    if postgres.enabled():
+        steps["postgres"] = postgres.get_pool()
+    tasks = {name: asyncio.ensure_future(step) for name, step in steps.items()}
+    _, pending = await asyncio.wait(
+        tasks.values(), timeout=settings.WARMUP_TIMEOUT_SECONDS
+    )
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    for name, task in tasks.items():
+        if task in pending:
+            log_warning(
+                "Warm-up step timed out",
+                extra={
+                    "step": name,
+                    "timeout_seconds": settings.WARMUP_TIMEOUT_SECONDS,
+                },
+            )
+        elif task.exception() is not None:
+            log_warning(
+                "Warm-up step failed",
+                extra={"step": name, "error": str(task.exception())},
+            )
+    log_info(
+        "Warm-up complete",
+        extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Warm up and start the file collector on startup; drain in-flight streams
+    and upload jobs and close clients on shutdown.
+
+    Args:
+        app: FastAPI application
+    """
+    logger.info("Starting Resummate API")
+    if settings.WARMUP_ON_STARTUP:
+        await warm_up()
+    file_collector.start()
+    yield
+    logger.info("Shutting down Resummate API")
+    await file_collector.stop()
+    await asyncio.gather(
+        stream_registry.drain(settings.SHUTDOWN_DRAIN_SECONDS),
+        upload_jobs.drain(settings.SHUTDOWN_DRAIN_SECONDS),
+    )
+    await close_clients()
+    await postgres.close_pool()
 
 
 app = FastAPI(
     title="Resummate API",
     description="AI-powered resume optimization API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
-@app.middleware("http")
-async def vercel_headers_middleware(request: FastAPIRequest, call_next):
-    """
-    Middleware to set Vercel headers.
-
-    Args:
-        request: FastAPI request
-        call_next: Next middleware in chain
-
-    Returns:
-        Response from next middleware
-    """
-    set_headers(dict(request.headers))
-    return await call_next(request)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+app.add_middleware(VercelHeadersMiddleware)
+app.add_middleware(ServerTimingMiddleware, sampled_paths=SAMPLED_LOG_PATHS)
 
 
 # Include routers
@@ -41,6 +144,8 @@ app.include_router(chat_router)
 app.include_router(resume_router)
 app.include_router(job_description_router)
 app.include_router(user_router)
+app.include_router(thread_router)
+app.include_router(jobs_router)
 
 
 @app.get(
@@ -56,17 +161,46 @@ async def health_check() -> HealthCheckResponse:
     Returns:
         HealthCheckResponse: Health status
     """
-    log_info("Health check called", extra={"endpoint": "/api/health"})
+    log_info("Health check called", extra={"endpoint": "/api/health"}, sampled=True)
     return HealthCheckResponse(status="healthy")
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup."""
-    logger.info("Starting Resummate API")
+async def verify_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Security(metrics_security),
+) -> None:
+    """
+    Allow metrics scrapes that present ``METRICS_TOKEN`` as a bearer token.
+
+    Raises:
+        HTTPException: 404 while no token is configured, 401 for a missing or
+            wrong token
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown."""
-    logger.info("Shutting down Resummate API")
+@app.get(
+    "/api/metrics",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    tags=["health"],
+    dependencies=[Depends(verify_metrics_token)],
+)
+async def metrics() -> PlainTextResponse:
+    """
+    Expose application metrics in Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Prometheus exposition text
+    """
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -2,19 +2,40 @@
 Resume router for handling resume upload, retrieval, and deletion.
 """
 
+import asyncio
 import uuid as uuid_lib
-
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from typing import Optional, Union
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    UploadFile,
+    File,
+    Form,
+    Header,
+    status,
+)
+from fastapi.responses import JSONResponse
 
 from api.auth.stack_auth import verify_stack_token
 from api.core.dependencies import SupabaseClient, GeminiClient
-from api.core.schemas import FileUploadResponse, FileInfoResponse
+from api.core.schemas import FileUploadResponse, FileInfoResponse, UploadJobResponse
 from api.db.service import (
     save_resume,
     get_resume as fetch_resume,
     delete_resume as remove_resume,
 )
+from api.services.extraction import extract_document_text
 from api.services.gemini import upload_file
+from api.services.idempotency import fingerprint, run_idempotent
+from api.services.speculative import schedule_review
+from api.services.uploads import (
+    check_upload_size,
+    read_document,
+    submit_upload_job,
+    wants_async,
+)
 
 router = APIRouter(
     prefix="/api/resume", tags=["resume"], dependencies=[Depends(verify_stack_token)]
@@ -22,14 +43,20 @@ router = APIRouter(
 
 
 @router.post(
-    "/upload", response_model=FileUploadResponse, status_code=status.HTTP_200_OK
+    "/upload",
+    response_model=FileUploadResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_202_ACCEPTED: {"model": UploadJobResponse}},
 )
 async def upload_resume(
     supabase: SupabaseClient,
     gemini: GeminiClient,
     file: UploadFile = File(...),
     uuid: str = Form(None),
-) -> FileUploadResponse:
+    prefer: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    auth_user: dict = Depends(verify_stack_token),
+) -> Union[FileUploadResponse, JSONResponse]:
     """
     Upload a resume file.
 
@@ -38,34 +65,68 @@ async def upload_resume(
         gemini: Gemini client dependency
         file: Resume file to upload
         uuid: Optional thread UUID
+        prefer: Optional ``Prefer`` header; ``respond-async`` queues a
+            background job and returns 202 with the job
+        idempotency_key: Optional ``Idempotency-Key`` header; a retry with
+            the same key replays the first response instead of uploading again
+        auth_user: Authenticated user data from JWT token
 
     Returns:
-        FileUploadResponse: Success message
+        Union[FileUploadResponse, JSONResponse]: Success message, or 202 with
+        the queued job
 
     Raises:
-        HTTPException: If upload fails
+        HTTPException: If the file is too large, upload fails, the job queue
+            is full or the idempotency key was used for a different upload
     """
-    try:
-        gemini_file = await upload_file(gemini, file)
-
-        thread_id = uuid if uuid else str(uuid_lib.uuid4())
-
-        file_name = file.filename or "resume.pdf"
-        await save_resume(
-            supabase=supabase,
-            thread_id=thread_id,
-            file_name=file_name,
-            resume_file=gemini_file,
-        )
+    check_upload_size(file)
+    content = await file.read()
+    await file.seek(0)
+    request_fingerprint = fingerprint(
+        uuid, str(wants_async(prefer)), file.filename, content
+    )
 
-        return FileUploadResponse(message="Resume uploaded successfully!")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error uploading file: {e}",
-        )
+    async def handle() -> Union[FileUploadResponse, JSONResponse]:
+        if wants_async(prefer):
+            thread_id = uuid if uuid else str(uuid_lib.uuid4())
+            document = await read_document("resume", file)
+            return submit_upload_job(gemini, supabase, thread_id, [document])
+
+        try:
+            extracted_text, gemini_file = await asyncio.gather(
+                extract_document_text(content, file.filename, file.content_type),
+                upload_file(gemini, file),
+            )
+
+            thread_id = uuid if uuid else str(uuid_lib.uuid4())
+
+            file_name = file.filename or "resume.pdf"
+            await save_resume(
+                supabase=supabase,
+                thread_id=thread_id,
+                file_name=file_name,
+                resume_file=gemini_file,
+                extracted_text=extracted_text,
+            )
+
+            schedule_review(gemini, supabase, thread_id)
+
+            return FileUploadResponse(message="Resume uploaded successfully!")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error uploading file: {e}",
+            )
+
+    return await run_idempotent(
+        idempotency_key,
+        "resume_upload",
+        auth_user.get("id"),
+        request_fingerprint,
+        handle,
+    )
 
 
 @router.get(
@@ -0,0 +1,213 @@
+"""
+Batch analysis of one resume against many job descriptions.
+
+Each job description gets its own model call. Calls run on a bounded pool per
+batch and results are streamed as NDJSON in completion order, so a slow or
+failing job description never holds back the others.
+"""
+
+import asyncio
+import json
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+import anyio
+from fastapi import HTTPException
+
+from api.core.config import settings
+from api.core.logging import log_info, log_warning
+from api.core.metrics import BATCH_ITEM_DURATION, BATCH_ITEMS
+from api.services.extraction import extract_document_text, normalize_text
+from api.services.gemini import analyze_job_fit
+from api.services.matching import document_hash, get_match
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.types import File as GeminiFile
+
+
+class BatchItem(NamedTuple):
+    """One job description of a batch, as uploaded or pasted."""
+
+    index: int
+    name: str
+    content: Optional[bytes] = None
+    mime_type: Optional[str] = None
+    text: Optional[str] = None
+
+
+def format_ndjson(payload: Dict[str, Any]) -> str:
+    """
+    Format a payload as one NDJSON line.
+
+    Args:
+        payload: JSON-serializable payload
+
+    Returns:
+        str: JSON line terminated by a newline
+    """
+    return json.dumps(payload, separators=(",", ":")) + "\n"
+
+
+async def _job_description_text(item: BatchItem) -> str:
+    """
+    Get the normalized text of a batch item.
+
+    Raises:
+        ValueError: If the text is empty or cannot be read from the file
+    """
+    if item.text is not None:
+        text = normalize_text(item.text)
+    else:
+        text = await extract_document_text(
+            item.content or b"", item.name, item.mime_type
+        )
+    if not text:
+        raise ValueError("Could not read text from the job description")
+    return text
+
+
+async def _analyze_item(
+    gemini_client: "genai.Client",
+    semaphore: asyncio.Semaphore,
+    resume: Union["GeminiFile", str],
+    resume_text: Optional[str],
+    resume_hash: Optional[str],
+    item: BatchItem,
+) -> Dict[str, Any]:
+    """
+    Analyze one job description, reporting failures instead of raising.
+
+    Args:
+        gemini_client: Gemini client instance
+        semaphore: Bounds model calls in flight for the batch
+        resume: Resume file reference or extracted resume text
+        resume_text: Extracted resume text, if any, for the keyword score
+        resume_hash: Resume document hash for the keyword score cache
+        item: Job description to analyze
+
+    Returns:
+        Dict[str, Any]: Result payload with ``status`` ``ok`` or ``error``
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"index": item.index, "name": item.name}
+    try:
+        job_description = await _job_description_text(item)
+        if resume_text and resume_hash:
+            match, _ = get_match(
+                resume_hash,
+                document_hash({}, job_description),
+                resume_text,
+                job_description,
+            )
+            result["score"] = match.score
+
+        async with semaphore:
+            with anyio.fail_after(settings.BATCH_ITEM_TIMEOUT_SECONDS):
+                result["analysis"] = await analyze_job_fit(
+                    gemini_client, resume, job_description
+                )
+        result["status"] = "ok"
+    except TimeoutError:
+        result.update(status="error", error="Analysis timed out")
+    except HTTPException as e:
+        result.update(status="error", error=str(e.detail))
+    except Exception as e:
+        log_warning(
+            "Batch item failed",
+            extra={"index": item.index, "item_name": item.name, "error": str(e)},
+        )
+        result.update(status="error", error=str(e))
+
+    BATCH_ITEMS.labels(result["status"]).inc()
+    BATCH_ITEM_DURATION.observe(time.perf_counter() - started)
+    return result
+
+
+async def stream_batch_analysis(
+    gemini_client: "genai.Client",
+    resume: Union["GeminiFile", str],
+    resume_text: Optional[str],
+    resume_hash: Optional[str],
+    items: List[BatchItem],
+) -> AsyncGenerator[str, None]:
+    """
+    Analyze job descriptions concurrently and stream results as they finish.
+
+    The stream is a ``start`` line, one ``result`` line per job description
+    (with ``completed``/``total`` progress) and a final ``done`` line. If the
+    client goes away, unfinished analyses are cancelled.
+
+    Args:
+        gemini_client: Gemini client instance
+        resume: Resume file reference or extracted resume text, shared by
+            every call
+        resume_text: Extracted resume text, if any, for the keyword score
+        resume_hash: Resume document hash for the keyword score cache
+        items: Job descriptions to analyze
+
+    Yields:
+        str: NDJSON lines
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(
+            _analyze_item(
+                gemini_client, semaphore, resume, resume_text, resume_hash, item
+            )
+        )
+        for item in items
+    ]
+    succeeded = 0
+    completed = 0
+
+    yield format_ndjson({"type": "start", "total": len(items)})
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            completed += 1
+            succeeded += result["status"] == "ok"
+            yield format_ndjson(
+                {
+                    "type": "result",
+                    **result,
+                    "completed": completed,
+                    "total": len(items),
+                }
+            )
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    log_info(
+        "Batch analysis finished",
+        extra={
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": completed - succeeded,
+            "duration_ms": duration_ms,
+        },
+    )
+    yield format_ndjson(
+        {
+            "type": "done",
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": completed - succeeded,
+            "durationMs": duration_ms,
+        }
+    )
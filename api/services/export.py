@@ -0,0 +1,147 @@
+"""
+Streaming export of whole threads.
+
+A thread's messages are read in keyset pages of ``EXPORT_PAGE_SIZE`` ordered
+by id and each page is encoded and sent before the next is read, so memory
+stays constant however long the thread is. The export also carries the
+metadata of the thread's resume and job description, but not their text.
+
+Two formats are supported:
+
+- ``ndjson``: a ``thread`` line with the document metadata, one ``message``
+  line per message and a final ``done`` line with the message count.
+- ``csv``: one row per document and per message, told apart by the
+  ``record`` column.
+"""
+
+import csv
+import io
+import time
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Optional
+
+import orjson
+
+from api.core.config import settings
+from api.core.logging import log_info
+from api.db.service import get_message_page
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+MESSAGE_FIELDS = ("id", "sender", "sent_at", "truncated", "token_count", "content")
+DOCUMENT_FIELDS = (
+    "file_name",
+    "mime_type",
+    "size_bytes",
+    "sha256_hash",
+    "state",
+    "source",
+    "create_time",
+    "update_time",
+)
+CSV_FIELDS = ("record", *MESSAGE_FIELDS, *DOCUMENT_FIELDS)
+
+
+def document_metadata(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Select the exported metadata of a document row.
+
+    Args:
+        row: Resume or job description row, if the thread has one
+
+    Returns:
+        Optional[Dict[str, Any]]: Metadata, or None without a document
+    """
+    if row is None:
+        return None
+    return {field: row.get(field) for field in DOCUMENT_FIELDS}
+
+
+def _ndjson(payload: Dict[str, Any]) -> bytes:
+    return orjson.dumps(payload) + b"\n"
+
+
+class _CsvEncoder:
+    """Encodes rows to CSV bytes, reusing one buffer."""
+
+    def __init__(self) -> None:
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(
+            self._buffer, fieldnames=CSV_FIELDS, extrasaction="ignore"
+        )
+
+    def encode(self, rows: List[Dict[str, Any]], header: bool = False) -> bytes:
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        if header:
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+        return self._buffer.getvalue().encode()
+
+
+async def stream_thread_export(
+    supabase: "Client",
+    thread_id: str,
+    export_format: str,
+    documents: Dict[str, Optional[Dict[str, Any]]],
+    first_page: List[Dict[str, Any]],
+) -> AsyncGenerator[bytes, None]:
+    """
+    Stream a thread's documents and messages, one chunk per page.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        export_format: ``ndjson`` or ``csv``
+        documents: Resume and job description rows by table, None if missing
+        first_page: First page of messages, already read to check the thread
+
+    Yields:
+        bytes: Encoded chunks
+    """
+    started = time.perf_counter()
+    metadata = {table: document_metadata(row) for table, row in documents.items()}
+    csv_encoder = _CsvEncoder() if export_format == "csv" else None
+
+    if csv_encoder is None:
+        yield _ndjson({"type": "thread", "thread_id": thread_id, **metadata})
+    else:
+        yield csv_encoder.encode(
+            [
+                {"record": table, **fields}
+                for table, fields in metadata.items()
+                if fields is not None
+            ],
+            header=True,
+        )
+
+    page = first_page
+    exported = 0
+    while page:
+        exported += len(page)
+        if csv_encoder is None:
+            yield b"".join(_ndjson({"type": "message", **message}) for message in page)
+        else:
+            yield csv_encoder.encode(
+                [{"record": "message", **message} for message in page]
+            )
+        if len(page) < settings.EXPORT_PAGE_SIZE:
+            break
+        page = await get_message_page(
+            supabase, thread_id, page[-1]["id"], settings.EXPORT_PAGE_SIZE
+        )
+
+    if csv_encoder is None:
+        yield _ndjson({"type": "done", "messages": exported})
+
+    log_info(
+        "Thread exported",
+        extra={
+            "thread_id": thread_id,
+            "format": export_format,
+            "messages": exported,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    )
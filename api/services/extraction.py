@@ -0,0 +1,192 @@
+"""
+Local text extraction for uploaded resumes and job descriptions.
+
+Documents are converted to normalized plain text once at upload time so chat
+turns can send compact text instead of having Gemini re-tokenize the file.
+Parsing runs on a bounded pool of worker threads to keep the event loop free.
+"""
+
+import io
+import unicodedata
+import zipfile
+from functools import lru_cache
+from typing import List, Optional
+from xml.etree import ElementTree
+
+import anyio
+
+from api.core.config import settings
+from api.core.logging import log_info, log_warning
+from api.core.metrics import EXTRACTION_DURATION, EXTRACTIONS
+from api.core.timing import span
+
+DOCX_MIME_TYPE = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
+MIME_TYPE_KINDS = {
+    "application/pdf": "pdf",
+    DOCX_MIME_TYPE: "docx",
+    "text/plain": "text",
+    "text/markdown": "text",
+}
+EXTENSION_KINDS = {".pdf": "pdf", ".docx": "docx", ".txt": "text", ".md": "text"}
+# Below this many characters the document is likely scanned; send the file
+MIN_EXTRACTED_CHARS = 200
+
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def document_kind(file_name: Optional[str], mime_type: Optional[str]) -> Optional[str]:
+    """
+    Classify a document by MIME type, falling back to the file extension.
+
+    Args:
+        file_name: Original file name
+        mime_type: Declared content type
+
+    Returns:
+        Optional[str]: ``pdf``, ``docx``, ``text`` or None if unsupported
+    """
+    if mime_type in MIME_TYPE_KINDS:
+        return MIME_TYPE_KINDS[mime_type]
+    extension = (file_name or "").rpartition(".")[2].lower()
+    return EXTENSION_KINDS.get(f".{extension}")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize extracted text for prompting.
+
+    Applies NFKC (which also unfolds PDF ligatures), collapses whitespace
+    within lines and squeezes runs of blank lines to one.
+
+    Args:
+        text: Raw extracted text
+
+    Returns:
+        str: Normalized text
+    """
+    lines: List[str] = []
+    for line in unicodedata.normalize("NFKC", text).splitlines():
+        line = " ".join(line.split())
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def extract_text(content: bytes, kind: str) -> str:
+    """
+    Extract normalized text from a document.
+
+    Runs on a worker thread.
+
+    Args:
+        content: Document bytes
+        kind: Document kind from ``document_kind``
+
+    Returns:
+        str: Normalized text
+    """
+    if kind == "pdf":
+        raw = _extract_pdf(content)
+    elif kind == "docx":
+        raw = _extract_docx(content)
+    else:
+        raw = content.decode("utf-8", errors="replace")
+    return normalize_text(raw)
+
+
+def _extract_pdf(content: bytes) -> str:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(content))
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _extract_docx(content: bytes) -> str:
+    # A small archive can unpack to gigabytes, and a timed-out worker thread
+    # keeps running, so the body is read through a byte limit. The declared
+    # size is checked first but can lie.
+    limit = settings.EXTRACTION_MAX_XML_BYTES
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        if archive.getinfo("word/document.xml").file_size > limit:
+            return ""
+        with archive.open("word/document.xml") as member:
+            body = member.read(limit + 1)
+    if len(body) > limit:
+        return ""
+    root = ElementTree.fromstring(body)
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NAMESPACE}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NAMESPACE}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_WORD_NAMESPACE}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_WORD_NAMESPACE}br", f"{_WORD_NAMESPACE}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+@lru_cache(maxsize=1)
+def _get_limiter() -> anyio.CapacityLimiter:
+    """Bound concurrent extractions so uploads cannot exhaust worker threads."""
+    return anyio.CapacityLimiter(settings.EXTRACTION_WORKERS)
+
+
+async def extract_document_text(
+    content: bytes, file_name: Optional[str], mime_type: Optional[str]
+) -> Optional[str]:
+    """
+    Extract text from an uploaded document on a worker thread.
+
+    Failures never fail the upload; the chat falls back to the Gemini file.
+
+    Args:
+        content: Document bytes
+        file_name: Original file name
+        mime_type: Declared content type
+
+    Returns:
+        Optional[str]: Normalized text, or None if unsupported, unreadable or
+        too short to stand in for the file
+    """
+    kind = document_kind(file_name, mime_type)
+    if kind is None or len(content) > settings.MAX_UPLOAD_SIZE:
+        EXTRACTIONS.labels("unsupported").inc()
+        return None
+
+    try:
+        with span("extract_text", EXTRACTION_DURATION.observe):
+            with anyio.fail_after(settings.EXTRACTION_TIMEOUT_SECONDS):
+                text = await anyio.to_thread.run_sync(
+                    extract_text,
+                    content,
+                    kind,
+                    abandon_on_cancel=True,
+                    limiter=_get_limiter(),
+                )
+    except TimeoutError:
+        EXTRACTIONS.labels("timeout").inc()
+        log_warning("Text extraction timed out", extra={"file_name": file_name})
+        return None
+    except Exception as e:
+        EXTRACTIONS.labels("failed").inc()
+        log_warning(
+            "Text extraction failed", extra={"file_name": file_name, "error": str(e)}
+        )
+        return None
+
+    if len(text) < MIN_EXTRACTED_CHARS:
+        EXTRACTIONS.labels("empty").inc()
+        return None
+
+    EXTRACTIONS.labels("ok").inc()
+    log_info(
+        "Extracted document text",
+        extra={"file_name": file_name, "kind": kind, "chars": len(text)},
+    )
+    return text
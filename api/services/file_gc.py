@@ -0,0 +1,232 @@
+"""
+Garbage collection of Gemini files and idle threads.
+
+Deleting or replacing a document only changes its database row; the Gemini
+file it pointed to keeps counting against the project's file storage. The
+collector lists the project's files, reconciles them against the file names
+the database still references and deletes orphaned, expired and failed files
+in rate-limited batches. Files younger than ``FILE_GC_MIN_AGE_SECONDS`` are
+kept, since an upload reaches Gemini before its row is saved.
+
+With ``THREAD_ARCHIVE_AFTER_DAYS`` set, threads idle that long are archived
+first, which orphans their files in the same run.
+
+Runs every ``FILE_GC_INTERVAL_SECONDS`` inside the app, or once from a
+scheduler:
+    python -m api.services.file_gc [--dry-run]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from api.core.config import settings
+from api.core.dependencies import close_clients, get_gemini_client, get_supabase_client
+from api.core.logging import log_exception, log_info, log_warning
+from api.core.metrics import FILE_GC_FILES, THREADS_ARCHIVED
+from api.db import postgres
+from api.db.service import archive_threads, get_document_file_names
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.types import File as GeminiFile
+    from supabase import Client
+
+LIST_PAGE_SIZE = 100
+
+
+def classify(file: "GeminiFile", referenced: Set[str], now: datetime) -> Optional[str]:
+    """
+    Decide whether a Gemini file should be deleted.
+
+    Args:
+        file: Listed Gemini file
+        referenced: File names referenced by documents
+        now: Current time, timezone-aware
+
+    Returns:
+        Optional[str]: ``failed``, ``expired`` or ``orphaned``, or None to keep
+    """
+    state = getattr(file.state, "name", file.state)
+    if state == "FAILED":
+        return "failed"
+    if file.expiration_time is not None and file.expiration_time <= now:
+        return "expired"
+    if file.name in referenced:
+        return None
+    # A file of unknown age may belong to an upload still in flight
+    if file.create_time is None:
+        return None
+    if now - file.create_time < timedelta(seconds=settings.FILE_GC_MIN_AGE_SECONDS):
+        return None
+    return "orphaned"
+
+
+class FileCollector:
+    """Reconciles Gemini files against the database, once or periodically."""
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def run_once(
+        self,
+        gemini_client: "genai.Client",
+        supabase: "Client",
+        dry_run: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Archive idle threads, then delete unneeded Gemini files.
+
+        Args:
+            gemini_client: Gemini client instance
+            supabase: Supabase client instance
+            dry_run: Only report what would be archived or deleted
+
+        Returns:
+            Dict[str, int]: Counts of listed, selected and deleted files and
+            archived threads
+        """
+        async with self._lock:
+            start = time.perf_counter()
+            report = {"archived_threads": await self._archive(supabase, dry_run)}
+
+            # Files are listed before references are read, so a file saved in
+            # between is still protected by its age
+            files = [
+                file
+                async for file in await gemini_client.aio.files.list(
+                    config={"page_size": LIST_PAGE_SIZE}
+                )
+            ]
+            referenced = await get_document_file_names(supabase)
+            now = datetime.now(timezone.utc)
+
+            candidates: List[Tuple[str, str]] = []
+            for file in files:
+                reason = classify(file, referenced, now)
+                if reason is not None:
+                    candidates.append((file.name, reason))
+                    report[reason] = report.get(reason, 0) + 1
+            report["listed"] = len(files)
+            report["referenced"] = len(referenced)
+
+            candidates = candidates[: settings.FILE_GC_MAX_DELETES]
+            if dry_run:
+                for _, reason in candidates:
+                    FILE_GC_FILES.labels(reason, "dry_run").inc()
+                report["deleted"] = 0
+            else:
+                report["deleted"] = await self._delete(gemini_client, candidates)
+
+            log_info(
+                "File collection complete",
+                extra={
+                    **report,
+                    "dry_run": dry_run,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                },
+            )
+            return report
+
+    async def _archive(self, supabase: "Client", dry_run: bool) -> int:
+        """Archive threads idle for ``THREAD_ARCHIVE_AFTER_DAYS``, if enabled."""
+        if settings.THREAD_ARCHIVE_AFTER_DAYS <= 0 or dry_run:
+            return 0
+        if not postgres.enabled():
+            log_warning("Thread archiving skipped: it requires DB_BACKEND=postgres")
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            days=settings.THREAD_ARCHIVE_AFTER_DAYS
+        )
+        thread_ids = await archive_threads(cutoff, settings.THREAD_ARCHIVE_BATCH_SIZE)
+        THREADS_ARCHIVED.inc(len(thread_ids))
+        return len(thread_ids)
+
+    async def _delete(
+        self, gemini_client: "genai.Client", candidates: List[Tuple[str, str]]
+    ) -> int:
+        """
+        Delete files in batches of ``FILE_GC_BATCH_SIZE``, pacing the batches
+        to ``FILE_GC_DELETES_PER_SECOND``.
+        """
+        deleted = 0
+        batch_size = max(1, settings.FILE_GC_BATCH_SIZE)
+        for offset in range(0, len(candidates), batch_size):
+            batch = candidates[offset : offset + batch_size]
+            began = time.monotonic()
+            results = await asyncio.gather(
+                *(gemini_client.aio.files.delete(name=name) for name, _ in batch),
+                return_exceptions=True,
+            )
+            for (name, reason), result in zip(batch, results):
+                # A file that is already gone counts as deleted
+                if (
+                    isinstance(result, Exception)
+                    and getattr(result, "code", None) != 404
+                ):
+                    log_warning(
+                        "Gemini file delete failed",
+                        extra={"file": name, "reason": reason, "error": str(result)},
+                    )
+                    FILE_GC_FILES.labels(reason, "error").inc()
+                else:
+                    FILE_GC_FILES.labels(reason, "deleted").inc()
+                    deleted += 1
+            if offset + batch_size < len(candidates):
+                pause = len(batch) / settings.FILE_GC_DELETES_PER_SECOND
+                await asyncio.sleep(max(0.0, pause - (time.monotonic() - began)))
+        return deleted
+
+    def start(self) -> None:
+        """Run the collector every ``FILE_GC_INTERVAL_SECONDS`` until stopped."""
+        if self._task is None and settings.FILE_GC_INTERVAL_SECONDS > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the periodic collector, cancelling a run in progress."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.FILE_GC_INTERVAL_SECONDS)
+            try:
+                await self.run_once(get_gemini_client(), get_supabase_client())
+            except Exception as e:
+                log_exception(f"File collection failed: {e}")
+
+
+# Global file collector
+file_collector = FileCollector()
+
+
+async def _run_cli(dry_run: bool) -> Dict[str, int]:
+    try:
+        return await file_collector.run_once(
+            get_gemini_client(), get_supabase_client(), dry_run=dry_run
+        )
+    finally:
+        await close_clients()
+        await postgres.close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="report, archive and delete nothing"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(_run_cli(args.dry_run))
+    for name, count in report.items():
+        print(f"{name:18} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,108 @@
 Gemini AI service for handling AI operations.
 """
 
+import asyncio
 import json
 import os
 import tempfile
 import time
-import traceback
 import uuid
-from typing import Any, AsyncGenerator, Dict, List, Optional
-
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import anyio
 from fastapi import HTTPException, UploadFile
-from google import genai
-from google.genai import types
-from google.genai.types import File as GeminiFile
-from supabase import Client
 
 from api.core.config import settings
-from api.core.logging import log_info, log_error
+from api.core.logging import log_info, log_exception, log_warning
+from api.core.metrics import (
+    FIRST_REVIEWS,
+    GEMINI_INPUT_TOKENS,
+    GEMINI_OUTPUT_TOKENS,
+    GEMINI_TOKENS_PER_SECOND,
+    GEMINI_TTFT,
+    UPLOAD_DURATION,
+    UPLOAD_SIZE,
+)
 from api.core.schemas import Message
-from api.db.service import create_message, get_messages
+from api.core.timing import get_spans, record_span, span, summarize_spans
+from api.db.service import create_message
+from api.services.history import get_relevant_history, schedule_indexing
+
+# Interval between Gemini file processing status checks
+UPLOAD_POLL_SECONDS = 1.0
+# Answer to chat messages sent before a resume was uploaded
+RESUME_REQUIRED_MESSAGE = "Please upload a resume before chatting with Resummate."
+
+# The Gemini and Supabase SDKs are imported lazily to keep cold starts fast
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+    from google.genai.types import File as GeminiFile
+    from supabase import Client
+
+
+def format_sse(payload: Dict[str, Any]) -> str:
+    """
+    Format a payload as a Server-Sent Events data frame.
+
+    Args:
+        payload: JSON-serializable frame payload
+
+    Returns:
+        str: SSE formatted frame
+    """
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
 
 
-async def generate_response(gemini_client: genai.Client, prompt: str) -> str:
+@lru_cache(maxsize=1)
+def get_generate_config() -> "types.GenerateContentConfig":
+    """
+    Get the shared generation config without tools.
+
+    Built once per process; warmed up at application startup.
+
+    Returns:
+        types.GenerateContentConfig: Generation config
+    """
+    from google.genai import types
+
+    from api.services.prompts import get_system_prompt
+
+    return types.GenerateContentConfig(
+        system_instruction=get_system_prompt(),
+        max_output_tokens=settings.MAX_OUTPUT_TOKENS,
+        temperature=settings.DEFAULT_TEMPERATURE,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_stream_config() -> "types.GenerateContentConfig":
+    """
+    Get the shared streaming config with the function-calling tools.
+
+    Built once per process; warmed up at application startup.
+
+    Returns:
+        types.GenerateContentConfig: Generation config with tools
+    """
+    from api.services.tools import get_tools
+
+    return get_generate_config().model_copy(update={"tools": [get_tools()]})
+
+
+async def generate_response(gemini_client: "genai.Client", prompt: str) -> str:
     """
     Generate a text response from Gemini API.
 
@@ -33,21 +114,90 @@ async def generate_response(gemini_client: genai.Client, prompt: str) -> str:
     Returns:
         str: Generated response text
     """
-    from api.services.prompts import get_system_prompt
-
     response = gemini_client.models.generate_content(
         model=settings.GEMINI_MODEL,
         contents=prompt,
-        config=types.GenerateContentConfig(
-            system_instruction=get_system_prompt(),
-            max_output_tokens=settings.MAX_OUTPUT_TOKENS,
-            temperature=settings.DEFAULT_TEMPERATURE,
-        ),
+        config=get_generate_config(),
     )
     return response.text
 
 
-async def upload_file(gemini_client: genai.Client, file: UploadFile) -> GeminiFile:
+async def analyze_job_fit(
+    gemini_client: "genai.Client",
+    resume: Union["GeminiFile", str],
+    job_description: str,
+) -> str:
+    """
+    Generate a short fit analysis of a resume against one job description.
+
+    Args:
+        gemini_client: Gemini client instance
+        resume: Resume file reference or extracted resume text
+        job_description: Job description text
+
+    Returns:
+        str: Generated analysis text
+    """
+    from api.services.prompts import get_batch_analysis_prompt
+
+    response = await gemini_client.aio.models.generate_content(
+        model=settings.GEMINI_MODEL,
+        contents=[
+            get_batch_analysis_prompt(),
+            _format_document("Resume", resume) if isinstance(resume, str) else resume,
+            _format_document("Job description", job_description),
+        ],
+        config=get_generate_config(),
+    )
+    usage = response.usage_metadata
+    if usage and usage.prompt_token_count:
+        document_mode = "text" if isinstance(resume, str) else "file"
+        GEMINI_INPUT_TOKENS.labels(document_mode).observe(usage.prompt_token_count)
+    return response.text or ""
+
+
+async def generate_first_review(
+    gemini_client: "genai.Client",
+    resume: Union["GeminiFile", str],
+    job_description: Optional[Union["GeminiFile", str]] = None,
+) -> Tuple[str, int]:
+    """
+    Generate the standard first-pass review of a resume, with a job fit summary
+    when a job description is given.
+
+    Args:
+        gemini_client: Gemini client instance
+        resume: Resume file reference or extracted resume text
+        job_description: Optional job description file reference or text
+
+    Returns:
+        Tuple[str, int]: Review text and its output token count
+    """
+    from api.services.prompts import get_first_review_prompt
+
+    contents: List[Any] = [
+        get_first_review_prompt(job_description is not None),
+        _format_document("Resume", resume) if isinstance(resume, str) else resume,
+    ]
+    if job_description is not None:
+        contents.append(
+            _format_document("Job description", job_description)
+            if isinstance(job_description, str)
+            else job_description
+        )
+    response = await gemini_client.aio.models.generate_content(
+        model=settings.GEMINI_MODEL,
+        contents=contents,
+        config=get_generate_config(),
+    )
+    usage = response.usage_metadata
+    output_tokens = (usage.candidates_token_count if usage else None) or 0
+    if output_tokens:
+        GEMINI_OUTPUT_TOKENS.inc(output_tokens)
+    return response.text or "", output_tokens
+
+
+async def upload_file(gemini_client: "genai.Client", file: UploadFile) -> "GeminiFile":
     """
     Upload a file to Gemini API.
 
@@ -65,25 +215,53 @@ async def upload_file(gemini_client: genai.Client, file: UploadFile) -> GeminiFi
         raise HTTPException(
             status_code=413, detail="File size exceeds the allowed limit"
         )
+    return await upload_bytes(gemini_client, await file.read(), file.filename)
 
-    suffix = os.path.splitext(file.filename)[1] if file.filename else ""
+
+async def upload_bytes(
+    gemini_client: "genai.Client", content: bytes, file_name: Optional[str]
+) -> "GeminiFile":
+    """
+    Upload document bytes to Gemini API and wait until they are processed.
+
+    Used directly by background upload jobs, which outlive the request's
+    ``UploadFile``.
+
+    Args:
+        gemini_client: Gemini client instance
+        content: Document bytes
+        file_name: Original file name, used for the file extension
+
+    Returns:
+        GeminiFile: Uploaded file reference
+
+    Raises:
+        HTTPException: If file size exceeds limit or upload fails
+    """
+    if len(content) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413, detail="File size exceeds the allowed limit"
+        )
+
+    suffix = os.path.splitext(file_name)[1] if file_name else ""
 
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-        content = await file.read()
         temp_file.write(content)
         temp_path = temp_file.name
+    UPLOAD_SIZE.observe(len(content))
 
     try:
-        gemini_file = gemini_client.files.upload(file=temp_path)
+        # Async calls and sleeps so concurrent uploads do not block each other
+        with span("gemini.upload", UPLOAD_DURATION.observe):
+            gemini_file = await gemini_client.aio.files.upload(file=temp_path)
 
-        while gemini_file.state.name == "PROCESSING":
-            time.sleep(1)
-            gemini_file = gemini_client.files.get(name=gemini_file.name)
+            while gemini_file.state.name == "PROCESSING":
+                await asyncio.sleep(UPLOAD_POLL_SECONDS)
+                gemini_file = await gemini_client.aio.files.get(name=gemini_file.name)
 
         return gemini_file
     except Exception as e:
-        log_error(f"Error uploading file to Gemini: {e}")
-        traceback.print_exc()
+        log_exception(f"Error uploading file to Gemini: {e}")
         raise HTTPException(status_code=500, detail=f"Error uploading file: {e}")
     finally:
         if os.path.exists(temp_path):
@@ -91,32 +269,35 @@ async def upload_file(gemini_client: genai.Client, file: UploadFile) -> GeminiFi
 
 
 async def handle_function_call(
-    gemini_client: genai.Client,
-    supabase: Client,
+    gemini_client: "genai.Client",
+    supabase: "Client",
     thread_id: str,
     user_message: str,
-    resume: GeminiFile,
-    job_description: Optional[GeminiFile] = None,
+    resume: Union["GeminiFile", str],
+    job_description: Optional[Union["GeminiFile", str]] = None,
 ) -> str:
     """
     Handle function calls from Gemini API with message history.
 
+    The history is the thread's newest messages plus the older ones most
+    relevant to the user's message, within ``HISTORY_TOKEN_BUDGET``.
+
     Args:
         gemini_client: Gemini client instance
         supabase: Supabase client instance
         thread_id: Thread identifier
         user_message: User's message
-        resume: Resume file reference
-        job_description: Optional job description file reference
+        resume: Resume file reference or extracted text
+        job_description: Optional job description file reference or text
 
     Returns:
         str: Generated response text
     """
-    from api.services.prompts import get_system_prompt
-
     retrieved_history = []
-    past_messages = await get_messages(supabase, thread_id)
-    for past_message in past_messages[::-1]:
+    past_messages = await get_relevant_history(
+        gemini_client, supabase, thread_id, user_message
+    )
+    for past_message in past_messages:
         retrieved_history.append(
             {
                 "role": past_message["sender"],
@@ -124,13 +305,9 @@ async def handle_function_call(
             }
         )
 
-    chat = gemini_client.chats.create(
+    chat = gemini_client.aio.chats.create(
         model=settings.GEMINI_MODEL,
-        config={
-            "system_instruction": get_system_prompt(),
-            "max_output_tokens": settings.MAX_OUTPUT_TOKENS,
-            "temperature": settings.DEFAULT_TEMPERATURE,
-        },
+        config=get_generate_config(),
         history=retrieved_history,
     )
 
@@ -138,21 +315,31 @@ async def handle_function_call(
     if job_description:
         message_content.append(job_description)
 
-    response = chat.send_message(message_content)
+    response = await chat.send_message(message_content)
     return response.text
 
 
 async def stream_response(
-    gemini_client: genai.Client,
-    supabase: Client,
+    gemini_client: "genai.Client",
+    supabase: "Client",
     prompt: str,
     thread_id: str,
     file_reference: str,
     job_description_reference: Optional[str] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    message_id: Optional[str] = None,
+    resume_text: Optional[str] = None,
+    job_description_text: Optional[str] = None,
+    prepared_review: Optional["asyncio.Future[Tuple[str, int]]"] = None,
 ) -> AsyncGenerator[str, None]:
     """
     Stream a response from Gemini API with SSE format.
 
+    If the client disconnects mid-answer, the upstream Gemini stream is closed
+    and the partial answer is persisted with ``truncated=True``. A prepared
+    review, when given, is served as the answer instead of calling the model,
+    falling back to live generation if it failed.
+
     Args:
         gemini_client: Gemini client instance
         supabase: Supabase client instance
@@ -160,62 +347,114 @@ async def stream_response(
         thread_id: Thread identifier
         file_reference: Resume file reference
         job_description_reference: Optional job description file reference
+        is_disconnected: Optional callable reporting whether the client has gone away
+        message_id: Optional assistant message identifier, generated if omitted
+        resume_text: Optional extracted resume text, sent instead of the file
+            when ``USE_EXTRACTED_TEXT`` is on
+        job_description_text: Optional extracted job description text
+        prepared_review: Optional speculative review of the thread's documents
+            and its output token count, possibly still generating
 
     Yields:
         str: SSE formatted response chunks
     """
-    from api.services.prompts import get_system_prompt
-    from api.services.tools import get_tools
-
-    def format_sse(payload: Dict[str, Any]) -> str:
-        return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
-
-    message_id = f"msg-{uuid.uuid4().hex}"
+    message_id = message_id or f"msg-{uuid.uuid4().hex}"
     text_stream_id = "text-1"
     text_started = False
 
     yield format_sse({"type": "start", "messageId": message_id})
 
-    config = types.GenerateContentConfig(
-        system_instruction=get_system_prompt(),
-        max_output_tokens=settings.MAX_OUTPUT_TOKENS,
-        temperature=settings.DEFAULT_TEMPERATURE,
-        tools=[get_tools()],
-    )
-
-    retrieved_resume = gemini_client.files.get(name=file_reference)
-    log_info(f"Retrieved resume: {retrieved_resume.name}")
+    if prepared_review is not None:
+        try:
+            # Shielded: the review is shared with other threads' first turns
+            with span("gemini.prepared_review"):
+                review, review_tokens = await asyncio.shield(prepared_review)
+        except Exception as e:
+            log_warning("Prepared review unavailable", extra={"error": str(e)})
+            review, review_tokens = "", 0
+        if review:
+            FIRST_REVIEWS.labels("served").inc()
+            async for frame in _stream_prepared_review(
+                gemini_client, supabase, thread_id, message_id, review, review_tokens
+            ):
+                yield frame
+            return
+        FIRST_REVIEWS.labels("fallback").inc()
+
+    document_modes = set()
+    if settings.USE_EXTRACTED_TEXT and resume_text:
+        retrieved_resume = _format_document("Resume", resume_text)
+        document_modes.add("text")
+    else:
+        with span("gemini.files_get"):
+            retrieved_resume = await gemini_client.aio.files.get(name=file_reference)
+        log_info(f"Retrieved resume: {retrieved_resume.name}")
+        document_modes.add("file")
 
     retrieved_job_description = None
     if job_description_reference:
-        retrieved_job_description = gemini_client.files.get(
-            name=job_description_reference
-        )
-        log_info(f"Retrieved job description: {retrieved_job_description.name}")
+        if settings.USE_EXTRACTED_TEXT and job_description_text:
+            retrieved_job_description = _format_document(
+                "Job description", job_description_text
+            )
+            document_modes.add("text")
+        else:
+            with span("gemini.files_get"):
+                retrieved_job_description = await gemini_client.aio.files.get(
+                    name=job_description_reference
+                )
+            log_info(f"Retrieved job description: {retrieved_job_description.name}")
+            document_modes.add("file")
+    document_mode = document_modes.pop() if len(document_modes) == 1 else "mixed"
 
-    try:
-        accumulated_content = ""
+    accumulated_content = ""
+    input_tokens = 0
+    output_tokens = 0
+    persisted = False
+    stream = None
 
+    try:
         contents: List[Any] = [prompt, retrieved_resume]
         if retrieved_job_description:
             contents.append(retrieved_job_description)
 
-        stream = gemini_client.models.generate_content_stream(
-            model=settings.GEMINI_MODEL, contents=contents, config=config
+        stream_started = time.perf_counter()
+        first_chunk = True
+        stream = await gemini_client.aio.models.generate_content_stream(
+            model=settings.GEMINI_MODEL,
+            contents=contents,
+            config=get_stream_config(),
         )
 
-        for chunk in stream:
+        async for chunk in stream:
+            if first_chunk:
+                ttft = time.perf_counter() - stream_started
+                record_span("gemini.ttft", ttft * 1000)
+                GEMINI_TTFT.observe(ttft)
+                first_chunk = False
+
+            if is_disconnected and await is_disconnected():
+                await stream.aclose()
+                await _save_truncated_message(
+                    supabase, thread_id, accumulated_content, output_tokens
+                )
+                return
+
+            output_tokens = _get_output_tokens(chunk, output_tokens)
+            if chunk.usage_metadata and chunk.usage_metadata.prompt_token_count:
+                input_tokens = chunk.usage_metadata.prompt_token_count
             function_call = chunk.candidates[0].content.parts[0].function_call
             if function_call:
                 log_info("Making Gemini function call")
-                response = await handle_function_call(
-                    gemini_client,
-                    supabase,
-                    thread_id,
-                    prompt,
-                    retrieved_resume,
-                    retrieved_job_description,
-                )
+                with span("gemini.function_call"):
+                    response = await handle_function_call(
+                        gemini_client,
+                        supabase,
+                        thread_id,
+                        prompt,
+                        retrieved_resume,
+                        retrieved_job_description,
+                    )
                 if response:
                     if not text_started:
                         yield format_sse({"type": "text-start", "id": text_stream_id})
@@ -225,7 +464,7 @@ async def stream_response(
                     )
                     accumulated_content += response
             elif chunk.text:
-                log_info("Skipping Gemini function call")
+                log_info("Skipping Gemini function call", sampled=True)
                 if not text_started:
                     yield format_sse({"type": "text-start", "id": text_stream_id})
                     text_started = True
@@ -234,22 +473,62 @@ async def stream_response(
                 )
                 accumulated_content += chunk.text
 
+        stream_seconds = time.perf_counter() - stream_started
+        record_span("gemini.stream", stream_seconds * 1000)
+        if output_tokens:
+            GEMINI_OUTPUT_TOKENS.inc(output_tokens)
+            GEMINI_TOKENS_PER_SECOND.observe(output_tokens / stream_seconds)
+        if input_tokens:
+            GEMINI_INPUT_TOKENS.labels(document_mode).observe(input_tokens)
+
         if text_started:
             yield format_sse({"type": "text-end", "id": text_stream_id})
 
         if accumulated_content:
-            await create_message(
+            created = await create_message(
                 supabase,
                 Message(
-                    thread_id=thread_id, sender="model", content=accumulated_content
+                    thread_id=thread_id,
+                    sender="model",
+                    content=accumulated_content,
+                    token_count=output_tokens or None,
                 ),
             )
-
+            schedule_indexing(gemini_client, supabase, created)
+        persisted = True
+
+        server_timing = summarize_spans(get_spans())
+        log_info(
+            "Stream timing",
+            extra={
+                "thread_id": thread_id,
+                "message_id": message_id,
+                "document_mode": document_mode,
+                "input_tokens": input_tokens,
+                **server_timing,
+            },
+        )
+        yield format_sse(
+            {
+                "type": "message-metadata",
+                "messageMetadata": {"serverTiming": server_timing},
+            }
+        )
         yield format_sse({"type": "finish"})
         yield "data: [DONE]\n\n"
+    except (asyncio.CancelledError, GeneratorExit):
+        # The ASGI server cancels the response task when the client goes away;
+        # shield the write so the partial answer still lands in the database.
+        if not persisted:
+            with anyio.CancelScope(shield=True):
+                if stream is not None:
+                    await stream.aclose()
+                await _save_truncated_message(
+                    supabase, thread_id, accumulated_content, output_tokens
+                )
+        raise
     except Exception as e:
-        log_error(f"Error in stream_response: {e}")
-        traceback.print_exc()
+        log_exception(f"Error in stream_response: {e}")
         if text_started:
             yield format_sse({"type": "text-end", "id": text_stream_id})
         yield format_sse({"type": "finish"})
@@ -257,8 +536,128 @@ async def stream_response(
         raise
 
 
+async def _stream_prepared_review(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    thread_id: str,
+    message_id: str,
+    review: str,
+    output_tokens: int,
+) -> AsyncGenerator[str, None]:
+    """
+    Stream a prepared review as the answer and persist it.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        message_id: Assistant message identifier
+        review: Prepared review text
+        output_tokens: Output tokens the review took to generate
+
+    Yields:
+        str: SSE formatted response chunks after ``start``
+    """
+    text_stream_id = "text-1"
+    yield format_sse({"type": "text-start", "id": text_stream_id})
+    yield format_sse({"type": "text-delta", "id": text_stream_id, "delta": review})
+    yield format_sse({"type": "text-end", "id": text_stream_id})
+
+    created = await create_message(
+        supabase,
+        Message(
+            thread_id=thread_id,
+            sender="model",
+            content=review,
+            token_count=output_tokens or None,
+        ),
+    )
+    schedule_indexing(gemini_client, supabase, created)
+
+    server_timing = summarize_spans(get_spans())
+    log_info(
+        "Served prepared review",
+        extra={"thread_id": thread_id, "message_id": message_id, **server_timing},
+    )
+    yield format_sse(
+        {
+            "type": "message-metadata",
+            "messageMetadata": {"serverTiming": server_timing},
+        }
+    )
+    yield format_sse({"type": "finish"})
+    yield "data: [DONE]\n\n"
+
+
+def _format_document(label: str, text: str) -> str:
+    """
+    Wrap extracted document text as a delimited prompt part.
+
+    Args:
+        label: Document label, e.g. "Resume"
+        text: Extracted document text
+
+    Returns:
+        str: Prompt part
+    """
+    return f"{label}:\n<document>\n{text}\n</document>"
+
+
+def _get_output_tokens(chunk: "types.GenerateContentResponse", current: int) -> int:
+    """
+    Read the cumulative output token count reported on a stream chunk.
+
+    Args:
+        chunk: Streamed Gemini response chunk
+        current: Last known output token count
+
+    Returns:
+        int: Updated output token count
+    """
+    usage = chunk.usage_metadata
+    if usage and usage.candidates_token_count:
+        return usage.candidates_token_count
+    return current
+
+
+async def _save_truncated_message(
+    supabase: "Client", thread_id: str, content: str, output_tokens: int
+) -> None:
+    """
+    Persist a partial answer after the client disconnected mid-stream.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        content: Text generated before the disconnect
+        output_tokens: Output tokens generated before the disconnect
+    """
+    tokens_saved = max(settings.MAX_OUTPUT_TOKENS - output_tokens, 0)
+    GEMINI_OUTPUT_TOKENS.inc(output_tokens)
+    log_warning(
+        "Client disconnected, cancelled Gemini stream",
+        extra={
+            "thread_id": thread_id,
+            "output_tokens": output_tokens,
+            "tokens_saved": tokens_saved,
+        },
+    )
+
+    if content:
+        await create_message(
+            supabase,
+            Message(
+                thread_id=thread_id,
+                sender="model",
+                content=content,
+                truncated=True,
+                token_count=output_tokens or None,
+            ),
+        )
+
+
 async def stream_resume_required_message(
-    supabase: Client, thread_id: str
+    supabase: "Client", thread_id: str, message_id: Optional[str] = None
 ) -> AsyncGenerator[str, None]:
     """
     Stream a message requesting resume upload.
@@ -266,17 +665,15 @@ async def stream_resume_required_message(
     Args:
         supabase: Supabase client instance
         thread_id: Thread identifier
+        message_id: Optional assistant message identifier, generated if omitted
 
     Yields:
         str: SSE formatted response chunks
     """
 
-    def format_sse(payload: Dict[str, Any]) -> str:
-        return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
-
-    message_id = f"msg-{uuid.uuid4().hex}"
+    message_id = message_id or f"msg-{uuid.uuid4().hex}"
     text_stream_id = "text-1"
-    message_text = "Please upload a resume before chatting with Resummate."
+    message_text = RESUME_REQUIRED_MESSAGE
 
     yield format_sse({"type": "start", "messageId": message_id})
     yield format_sse({"type": "text-start", "id": text_stream_id})
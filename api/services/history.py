@@ -0,0 +1,509 @@
+"""
+Relevance-based chat history retrieval.
+
+Each message is embedded once, when it is created, and the vector is stored on
+the message row as base64-encoded float32. Per-thread indexes hold the
+normalized vectors in a NumPy matrix so a cosine search over a thread is a
+single matrix-vector product. History for a turn is the newest few messages
+plus the most relevant older ones, packed into a token budget.
+"""
+
+import asyncio
+import base64
+import hashlib
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Optional, Set
+
+from api.core.cache import LRUCache
+from api.core.config import settings
+from api.core.logging import log_info, log_warning
+from api.core.timing import span
+from api.core.tokens import estimate_tokens, message_tokens, truncate_to_tokens
+from api.db.service import (
+    get_history_window,
+    get_thread_messages,
+    save_message_embeddings,
+    save_message_token_counts,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+    from google import genai
+    from supabase import Client
+
+# Characters embedded per message; the embedding model truncates beyond ~2k tokens
+MAX_EMBEDDED_CHARS = 6000
+# Messages per embed_content request
+EMBED_BATCH_SIZE = 100
+# Messages without a stored vector embedded per search (backfills old threads)
+MAX_BACKFILL = 100
+TEXT_CACHE_SIZE = 256
+# Messages read per query when loading or catching up an index
+CATCH_UP_PAGE_SIZE = 1000
+
+_indexes: "LRUCache[str, ThreadIndex]" = LRUCache(settings.HISTORY_INDEX_THREADS)
+# Embeddings of recent texts by hash; futures so concurrent callers share a call
+_text_vectors: "LRUCache[str, asyncio.Future]" = LRUCache(TEXT_CACHE_SIZE)
+# Strong references to fire-and-forget indexing tasks
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def encode_embedding(vector: "np.ndarray") -> str:
+    """
+    Encode a vector compactly for storage.
+
+    Args:
+        vector: Embedding vector
+
+    Returns:
+        str: Base64 of the float32 bytes
+    """
+    import numpy as np
+
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+
+def decode_embedding(encoded: str) -> "np.ndarray":
+    """
+    Decode a stored vector.
+
+    Args:
+        encoded: Base64 of float32 bytes
+
+    Returns:
+        np.ndarray: Embedding vector
+    """
+    import numpy as np
+
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+async def embed_texts(gemini_client: "genai.Client", texts: List[str]) -> "np.ndarray":
+    """
+    Embed texts with the Gemini embedding model.
+
+    Args:
+        gemini_client: Gemini client instance
+        texts: Texts to embed
+
+    Returns:
+        np.ndarray: Normalized float32 vectors, one row per text
+    """
+    import numpy as np
+    from google.genai import types
+
+    config = types.EmbedContentConfig(
+        task_type="SEMANTIC_SIMILARITY",
+        output_dimensionality=settings.EMBEDDING_DIMENSIONS,
+    )
+    rows = []
+    with span("gemini.embed"):
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            response = await gemini_client.aio.models.embed_content(
+                model=settings.EMBEDDING_MODEL,
+                contents=[
+                    text[:MAX_EMBEDDED_CHARS]
+                    for text in texts[start : start + EMBED_BATCH_SIZE]
+                ],
+                config=config,
+            )
+            rows.extend(embedding.values for embedding in response.embeddings)
+    return _normalize(np.asarray(rows, dtype=np.float32))
+
+
+class ThreadIndex:
+    """In-memory vector index over one thread's messages."""
+
+    def __init__(self, dimensions: int) -> None:
+        import numpy as np
+
+        self.messages: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self.has_vector = np.zeros(0, dtype=bool)
+        self.last_id = 0
+        # Serializes catch-up so concurrent turns never add the same rows twice
+        self.lock = asyncio.Lock()
+
+    def add(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Append messages, oldest first, decoding any stored embeddings.
+
+        Args:
+            messages: Message rows with ``id``, ``sender``, ``content`` and an
+                optional encoded ``embedding``
+        """
+        import numpy as np
+
+        dimensions = self.vectors.shape[1]
+        vectors = np.zeros((len(messages), dimensions), dtype=np.float32)
+        has_vector = np.zeros(len(messages), dtype=bool)
+        for row, message in enumerate(messages):
+            encoded = message.pop("embedding", None)
+            if encoded:
+                vector = decode_embedding(encoded)
+                if vector.shape[0] == dimensions:
+                    vectors[row] = vector
+                    has_vector[row] = True
+            self.messages.append(message)
+            self.last_id = max(self.last_id, message["id"])
+        self.vectors = np.vstack([self.vectors, _normalize(vectors)])
+        self.has_vector = np.concatenate([self.has_vector, has_vector])
+
+    def set_vectors(self, positions: List[int], vectors: "np.ndarray") -> None:
+        """
+        Fill in vectors for already indexed messages.
+
+        Args:
+            positions: Message positions in the index
+            vectors: Normalized vectors, one row per position
+        """
+        self.vectors[positions] = vectors
+        self.has_vector[positions] = True
+
+    def missing_vectors(self, limit: int) -> List[int]:
+        """
+        Positions of the newest messages that have no vector yet.
+
+        Args:
+            limit: Maximum number of positions
+
+        Returns:
+            List[int]: Message positions
+        """
+        import numpy as np
+
+        return [int(position) for position in np.flatnonzero(~self.has_vector)][-limit:]
+
+    def select(
+        self,
+        query: Optional["np.ndarray"],
+        top_k: int,
+        recent: int,
+        token_budget: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Pick the newest messages, then the most similar older ones, within a
+        token budget.
+
+        Args:
+            query: Normalized query vector, or None for recency only
+            top_k: Number of relevant older messages to consider
+            recent: Number of newest messages to consider first
+            token_budget: Maximum tokens of the selection
+
+        Returns:
+            List[Dict[str, Any]]: Selected messages, oldest first
+        """
+        import numpy as np
+
+        count = len(self.messages)
+        recent_start = max(count - recent, 0)
+        candidates = list(range(count - 1, recent_start - 1, -1))
+
+        if query is not None and recent_start and top_k:
+            scores = self.vectors[:recent_start] @ query
+            scores[~self.has_vector[:recent_start]] = -np.inf
+            k = min(top_k, recent_start)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            candidates.extend(int(i) for i in best if np.isfinite(scores[i]))
+
+        selected = []
+        used = 0
+        for position in candidates:
+            tokens = message_tokens(self.messages[position])
+            if used + tokens > token_budget:
+                continue
+            used += tokens
+            selected.append(position)
+        return [self.messages[position] for position in sorted(selected)]
+
+
+def pack_recent(
+    messages: List[Dict[str, Any]], token_budget: int
+) -> List[Dict[str, Any]]:
+    """
+    Keep the newest contiguous run of messages that fits a token budget.
+
+    The newest message is always kept, truncated to the budget when it alone
+    exceeds it, so a turn never goes to the model without context.
+
+    Args:
+        messages: Messages, newest first, with ``token_count``
+        token_budget: Maximum tokens of the selection
+
+    Returns:
+        List[Dict[str, Any]]: Selected messages, oldest first
+    """
+    selected = []
+    used = 0
+    for message in messages:
+        used += message_tokens(message)
+        if used > token_budget:
+            if not selected:
+                content = truncate_to_tokens(message["content"], token_budget)
+                selected.append(
+                    {
+                        **message,
+                        "content": content,
+                        "truncated": True,
+                        "token_count": estimate_tokens(content),
+                    }
+                )
+            break
+        selected.append(message)
+    selected.reverse()
+    return selected
+
+
+async def get_recent_history(
+    supabase: "Client", thread_id: str
+) -> List[Dict[str, Any]]:
+    """
+    Build a turn's history from the newest messages within the token budget.
+
+    Uses the stored token counts, so a few long answers shorten the window
+    instead of overflowing the context.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+
+    Returns:
+        List[Dict[str, Any]]: Messages, oldest first, within
+        ``HISTORY_TOKEN_BUDGET``
+    """
+    window = await get_history_window(
+        supabase, thread_id, settings.HISTORY_MAX_MESSAGES
+    )
+    return pack_recent(window, settings.HISTORY_TOKEN_BUDGET)
+
+
+async def _get_index(supabase: "Client", thread_id: str) -> ThreadIndex:
+    """
+    Get a thread's index, loading it or catching up with newer messages.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+
+    Returns:
+        ThreadIndex: Up-to-date index for the thread
+    """
+    index = _indexes.get(thread_id)
+    if index is None:
+        index = ThreadIndex(settings.EMBEDDING_DIMENSIONS)
+        _indexes.set(thread_id, index)
+
+    # Another worker may have written messages since; fetch only the new rows,
+    # page by page until a short page shows the index is current
+    async with index.lock:
+        while True:
+            newer = await get_thread_messages(
+                supabase, thread_id, after_id=index.last_id, limit=CATCH_UP_PAGE_SIZE
+            )
+            if newer:
+                index.add(newer)
+            if len(newer) < CATCH_UP_PAGE_SIZE:
+                return index
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+async def _text_vector(gemini_client: "genai.Client", text: str) -> "np.ndarray":
+    """
+    Embed one text, sharing the result with identical recent or in-flight texts.
+
+    Args:
+        gemini_client: Gemini client instance
+        text: Text to embed
+
+    Returns:
+        np.ndarray: Normalized vector
+    """
+    key = _text_key(text)
+    future = _text_vectors.get(key)
+    if future is None or (future.done() and future.exception()):
+        future = asyncio.ensure_future(embed_texts(gemini_client, [text]))
+        _text_vectors.set(key, future)
+    return (await asyncio.shield(future))[0]
+
+
+async def _embed_missing(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    thread_id: str,
+    index: ThreadIndex,
+) -> None:
+    """Embed messages stored without a vector, persisting them in the background."""
+    import numpy as np
+
+    positions = index.missing_vectors(MAX_BACKFILL)
+    if not positions:
+        return
+
+    # Messages being indexed in the background are awaited, the rest batched
+    pending = [
+        position
+        for position in positions
+        if _text_key(index.messages[position]["content"]) in _text_vectors
+    ]
+    backfill = [position for position in positions if position not in pending]
+    for position in pending:
+        vector = await _text_vector(gemini_client, index.messages[position]["content"])
+        index.set_vectors([position], vector[np.newaxis])
+    if not backfill:
+        return
+
+    vectors = await embed_texts(
+        gemini_client, [index.messages[position]["content"] for position in backfill]
+    )
+    index.set_vectors(backfill, vectors)
+    # The index is already searchable; persisting the vectors is off the turn
+    _spawn(
+        _persist_embeddings(
+            supabase,
+            thread_id,
+            {
+                index.messages[position]["id"]: encode_embedding(vector)
+                for position, vector in zip(backfill, vectors)
+            },
+        )
+    )
+
+
+async def _persist_embeddings(
+    supabase: "Client", thread_id: str, embeddings: Dict[int, str]
+) -> None:
+    """Store backfilled vectors, leaving failures to the next backfill."""
+    try:
+        await save_message_embeddings(supabase, thread_id, embeddings)
+    except Exception as e:
+        log_warning(
+            "Embedding backfill save failed",
+            extra={"thread_id": thread_id, "error": str(e)},
+        )
+
+
+async def get_relevant_history(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    thread_id: str,
+    query: str,
+) -> List[Dict[str, Any]]:
+    """
+    Build a turn's history from the newest and the most relevant messages.
+
+    Falls back to recency alone if embedding fails.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        query: Text the history should be relevant to, usually the user prompt
+
+    Returns:
+        List[Dict[str, Any]]: Messages, oldest first, within the token budget
+    """
+    index = await _get_index(supabase, thread_id)
+    query_vector = None
+    try:
+        await _embed_missing(gemini_client, supabase, thread_id, index)
+        query_vector = await _text_vector(gemini_client, query)
+    except Exception as e:
+        log_warning(
+            "History embedding failed, using recent messages only",
+            extra={"thread_id": thread_id, "error": str(e)},
+        )
+
+    with span("history.select"):
+        selected = index.select(
+            query_vector,
+            settings.HISTORY_TOP_K,
+            settings.HISTORY_RECENT_MESSAGES,
+            settings.HISTORY_TOKEN_BUDGET,
+        )
+    log_info(
+        "Selected history",
+        extra={
+            "thread_id": thread_id,
+            "indexed": len(index.messages),
+            "selected": len(selected),
+        },
+        sampled=True,
+    )
+    return selected
+
+
+async def index_message(
+    gemini_client: "genai.Client", supabase: "Client", message: Dict[str, Any]
+) -> None:
+    """
+    Embed a newly created message and store its vector.
+
+    With ``EXACT_TOKEN_COUNTS`` on, user messages also get their estimated
+    token count replaced by the model's count; model messages are stored with
+    the exact count from the response usage.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        message: Created message row
+    """
+    if settings.EXACT_TOKEN_COUNTS and message.get("sender") == "user":
+        try:
+            response = await gemini_client.aio.models.count_tokens(
+                model=settings.GEMINI_MODEL, contents=message["content"]
+            )
+            await save_message_token_counts(
+                supabase, message["thread_id"], {message["id"]: response.total_tokens}
+            )
+        except Exception as e:
+            log_warning(
+                "Message token count failed",
+                extra={"message_id": message.get("id"), "error": str(e)},
+            )
+
+    try:
+        vector = await _text_vector(gemini_client, message["content"])
+        await save_message_embeddings(
+            supabase, message["thread_id"], {message["id"]: encode_embedding(vector)}
+        )
+    except Exception as e:
+        # The next search backfills the vector
+        log_warning(
+            "Message embedding failed",
+            extra={"message_id": message.get("id"), "error": str(e)},
+        )
+
+
+def schedule_indexing(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    messages: List[Dict[str, Any]],
+) -> None:
+    """
+    Embed created messages in the background, off the response path.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        messages: Rows returned by ``create_message``
+    """
+    for message in messages:
+        _spawn(index_message(gemini_client, supabase, message))
+
+
+def _spawn(coroutine: Coroutine[Any, Any, None]) -> None:
+    """Run a coroutine in the background, keeping a reference until it ends."""
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,303 @@
+"""
+Idempotency-Key support for chat and upload requests.
+
+The first request with a key runs normally and its result is recorded with a
+fingerprint of the request. Retries with the same key wait for or replay that
+result instead of running again, so a double-click or network retry never
+creates a second message, model generation or Gemini upload.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from api.core.cache import LRUCache
+from api.core.config import settings
+from api.core.logging import log_info
+from api.core.metrics import IDEMPOTENT_REQUESTS
+from api.services.streams import StreamBuffer, stream_registry
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyRecord:
+    """Fingerprint and eventual result of the first request with a key."""
+
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Complete SSE body of a finished stream, kept after its buffer expires
+        self.stream_body: Optional[str] = None
+
+    def snapshot_stream(self, buffer: StreamBuffer) -> None:
+        """
+        Keep a finished stream's frames for replay once its buffer expires.
+
+        Args:
+            buffer: Stream buffer of the recorded response
+        """
+        task = buffer.task
+        if task is None:
+            return
+
+        def snapshot(_: asyncio.Task) -> None:
+            # A stream longer than the buffer cannot be replayed in full
+            if buffer.oldest_event_id == 0:
+                self.stream_body = "".join(buffer.frames)
+
+        task.add_done_callback(snapshot)
+
+
+class IdempotencyStore:
+    """In-process map of idempotency keys to records, bounded by TTL and size."""
+
+    def __init__(self) -> None:
+        self._records: "LRUCache[str, IdempotencyRecord]" = LRUCache(
+            settings.IDEMPOTENCY_MAX_KEYS
+        )
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[IdempotencyRecord, bool]:
+        """
+        Look up a key, or claim it for a new request.
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Fingerprint of the request
+
+        Returns:
+            Tuple[IdempotencyRecord, bool]: Record and whether it was created
+
+        Raises:
+            HTTPException: If the key was used for a different request
+        """
+        record = self._records.get(key)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            return record, False
+
+        record = IdempotencyRecord(fingerprint)
+        self._records.set(key, record, ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+        return record, True
+
+    def discard(self, key: str) -> None:
+        """
+        Forget a key whose first request failed, so a retry runs again.
+
+        Args:
+            key: Scoped idempotency key
+        """
+        self._records.pop(key)
+
+
+# Global idempotency store
+idempotency_store = IdempotencyStore()
+
+
+def fingerprint(*parts: Union[str, bytes, None]) -> str:
+    """
+    Hash the parts of a request that define its meaning.
+
+    Multipart bodies are fingerprinted by their fields and file contents, not
+    their raw bytes, because a retried form gets a new boundary.
+
+    Args:
+        *parts: Request fields and file contents
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\x00"
+        elif isinstance(part, str):
+            part = part.encode()
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def validate_key(key: str) -> None:
+    """
+    Reject keys that cannot be stored.
+
+    Args:
+        key: ``Idempotency-Key`` header value
+
+    Raises:
+        HTTPException: If the key is empty or too long
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+
+
+def _replay(result: Any) -> Response:
+    """Rebuild a fresh response from a recorded route result."""
+    if isinstance(result, BaseModel):
+        response: Response = JSONResponse(result.model_dump(mode="json"))
+    elif isinstance(result, Response):
+        response = Response(
+            content=result.body,
+            status_code=result.status_code,
+            headers={
+                name: value
+                for name, value in result.headers.items()
+                if name != "content-length"
+            },
+            media_type=result.media_type,
+        )
+    else:
+        response = JSONResponse(result)
+    response.headers[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _scoped_key(scope: str, user_id: Optional[str], key: str) -> str:
+    """Key of an idempotency record, unique per route and user."""
+    return f"{scope}:{user_id or ''}:{key}"
+
+
+async def _run_first(
+    scoped_key: str,
+    record: IdempotencyRecord,
+    handler: Callable[[], Awaitable[Any]],
+    result_of: Callable[[Any], Any] = lambda result: result,
+) -> Any:
+    """Run the first request for a key and record its result or failure."""
+    try:
+        result = await handler()
+    except BaseException as e:
+        idempotency_store.discard(scoped_key)
+        if isinstance(e, asyncio.CancelledError):
+            error: BaseException = HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Original request was cancelled; retry",
+            )
+        else:
+            error = e
+        record.result.set_exception(error)
+        record.result.exception()  # attached retries re-raise it; mark retrieved
+        raise
+    record.result.set_result(result_of(result))
+    return result
+
+
+async def _reuse(scope: str, record: IdempotencyRecord) -> Any:
+    """Wait for or fetch the recorded result of the first request."""
+    outcome = "replayed" if record.result.done() else "attached"
+    IDEMPOTENT_REQUESTS.labels(scope, outcome).inc()
+    log_info("Idempotent request reused", extra={"scope": scope, "outcome": outcome})
+    return await asyncio.shield(record.result)
+
+
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    user_id: Optional[str],
+    request_fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Run a JSON route handler at most once per idempotency key.
+
+    A retry of a finished request replays its response; a retry of one still
+    running waits for it. Failed requests are forgotten so they can be retried.
+
+    Args:
+        key: ``Idempotency-Key`` header value, or None to just run the handler
+        scope: Route name the key is scoped to
+        user_id: Authenticated user the key is scoped to, so users sending
+            the same key never share a record
+        request_fingerprint: Fingerprint of the request
+        handler: Route body
+
+    Returns:
+        Any: Handler result, or a replayed response with ``Idempotent-Replayed``
+
+    Raises:
+        HTTPException: If the key is invalid or reused for another request
+    """
+    if key is None:
+        return await handler()
+    validate_key(key)
+    scoped_key = _scoped_key(scope, user_id, key)
+
+    record, created = idempotency_store.begin(scoped_key, request_fingerprint)
+    if not created:
+        return _replay(await _reuse(scope, record))
+
+    IDEMPOTENT_REQUESTS.labels(scope, "new").inc()
+    return await _run_first(scoped_key, record, handler)
+
+
+async def _replay_body(body: str) -> AsyncGenerator[str, None]:
+    yield body
+
+
+async def run_idempotent_stream(
+    key: Optional[str],
+    scope: str,
+    user_id: Optional[str],
+    request_fingerprint: str,
+    start: Callable[[], Awaitable[StreamBuffer]],
+) -> Tuple[str, AsyncGenerator[str, None], bool]:
+    """
+    Start a resumable stream at most once per idempotency key.
+
+    A retry attaches to the stream of the first request: it replays the
+    buffered frames and tails the live generation, or replays the finished
+    stream's body after the buffer has expired.
+
+    Args:
+        key: ``Idempotency-Key`` header value, or None to just start the stream
+        scope: Route name the key is scoped to
+        user_id: Authenticated user the key is scoped to, so users sending
+            the same key never share a record
+        request_fingerprint: Fingerprint of the request
+        start: Creates the message and starts the stream, returning its buffer
+
+    Returns:
+        Tuple[str, AsyncGenerator[str, None], bool]: Message id, SSE frames
+        and whether they are a replay
+
+    Raises:
+        HTTPException: If the key is invalid or reused for another request, or
+            the recorded stream can no longer be replayed
+    """
+    if key is None:
+        buffer = await start()
+        return buffer.message_id, buffer.subscribe(), False
+    validate_key(key)
+    scoped_key = _scoped_key(scope, user_id, key)
+
+    record, created = idempotency_store.begin(scoped_key, request_fingerprint)
+    if created:
+        IDEMPOTENT_REQUESTS.labels(scope, "new").inc()
+        buffer = await _run_first(
+            scoped_key, record, start, lambda buffer: buffer.message_id
+        )
+        record.snapshot_stream(buffer)
+        return buffer.message_id, buffer.subscribe(), False
+
+    message_id = await _reuse(scope, record)
+    live = stream_registry.get(message_id)
+    if live is not None and live.can_resume_from(None):
+        return message_id, live.subscribe(), True
+    if record.stream_body is not None:
+        return message_id, _replay_body(record.stream_body), True
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Original response is no longer available",
+    )
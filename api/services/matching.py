@@ -0,0 +1,337 @@
+"""
+Deterministic ATS-style keyword matching between a resume and a job description.
+
+Both documents are reduced to weighted term vectors: tokens are normalized,
+mapped through a synonym table to canonical skills, and weighted with
+sublinear term frequency times a static IDF prior (generic job-ad vocabulary is
+down-weighted, known skills are boosted). The score is the share of the job
+description's term weight that the resume covers.
+"""
+
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from api.core.cache import LRUCache
+
+# Canonical forms for common skill spellings, abbreviations and phrases
+SYNONYMS: Dict[str, str] = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "react.js": "react",
+    "reactjs": "react",
+    "vue.js": "vue",
+    "vuejs": "vue",
+    "nextjs": "next.js",
+    "py": "python",
+    "go lang": "golang",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "ms azure": "azure",
+    "microsoft azure": "azure",
+    "ci": "ci/cd",
+    "cd": "ci/cd",
+    "cicd": "ci/cd",
+    "continuous integration": "ci/cd",
+    "continuous delivery": "ci/cd",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "llm": "large language models",
+    "llms": "large language models",
+    "restful": "rest",
+    "rest api": "rest",
+    "restful api": "rest",
+    "gql": "graphql",
+    "tf": "tensorflow",
+    "sklearn": "scikit-learn",
+    "scikit": "scikit-learn",
+    "ux": "user experience",
+    "ui": "user interface",
+    "oop": "object-oriented programming",
+    "object oriented programming": "object-oriented programming",
+    "tdd": "test-driven development",
+    "test driven development": "test-driven development",
+    "sre": "site reliability engineering",
+    "devops": "devops",
+    "dev ops": "devops",
+}
+# Multi-word skills matched as phrases
+PHRASES = frozenset(
+    [phrase for phrase in SYNONYMS if " " in phrase]
+    + [
+        "machine learning",
+        "deep learning",
+        "data science",
+        "data engineering",
+        "data analysis",
+        "data pipelines",
+        "distributed systems",
+        "system design",
+        "computer science",
+        "project management",
+        "product management",
+        "stakeholder management",
+        "unit testing",
+        "code review",
+        "agile methodologies",
+        "cloud infrastructure",
+        "infrastructure as code",
+        "natural language processing",
+        "computer vision",
+        "large language models",
+        "user experience",
+        "user interface",
+        "spring boot",
+        "ruby on rails",
+        "power bi",
+        "site reliability engineering",
+        "artificial intelligence",
+    ]
+)
+# Terms known to be skills; boosted because they are what ATS filters look for
+SKILLS = frozenset(
+    set(SYNONYMS.values())
+    | PHRASES
+    | set(
+        """
+        python java c++ c# rust ruby php scala kotlin swift sql nosql mysql redis
+        kafka spark hadoop airflow dbt snowflake docker terraform ansible linux
+        git fastapi django flask express angular svelte html css tailwind pandas
+        numpy pytorch keras tableau excel figma jira agile scrum kanban
+        microservices grpc websockets oauth security testing pytest jest cypress
+        selenium elasticsearch rabbitmq serverless lambda bigquery dynamodb
+        cassandra supabase firebase vercel prometheus grafana observability
+        leadership mentoring analytics etl api
+        """.split()
+    )
+)
+# Job-ad filler that survives stopword removal but carries little signal
+GENERIC_TERMS = frozenset(
+    """
+    ability able about across apply based benefits build building candidate
+    company culture customer customers day deliver degree demonstrated
+    description design desired develop developing environment equal excellent
+    experience experienced familiarity fast good great help high ideal include
+    including job join knowledge looking make many must new nice opportunity paced
+    plus position preferred proficiency proficient qualifications related
+    required requirements responsibilities responsible role senior skill skills
+    solid strong
+    support team teams understanding using work working world year years
+    """.split()
+)
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been being but by can could did do does for from had
+    has have he her his i if in into is it its me more most my no not of on or
+    our out over own same she should so some such than that the their them then
+    there these they this those through to too under up very was we were what
+    when where which while who whom why will with would you your yours also
+    other any all each both few only just well etc e.g i.e via per within
+    """.split()
+)
+
+SKILL_IDF = 2.0
+DEFAULT_IDF = 1.0
+GENERIC_IDF = 0.25
+MAX_TERMS = 25
+CACHE_SIZE = 256
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_LETTER = re.compile(r"[a-z]")
+_NOT_PLURAL = ("ss", "us", "is")
+
+
+class MatchResult(NamedTuple):
+    """Keyword coverage of a job description by a resume."""
+
+    score: float
+    present: List[str]
+    missing: List[str]
+
+
+_cache: "LRUCache[Tuple[str, str], MatchResult]" = LRUCache(CACHE_SIZE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized tokens, keeping tech spellings like c++ or ci/cd.
+
+    Args:
+        text: Document text
+
+    Returns:
+        List[str]: Lowercase tokens
+    """
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(normalized):
+        token = token.rstrip(".")
+        # "python/fastapi" is two skills; "ci/cd" is one
+        if "/" in token and token not in SKILLS:
+            tokens.extend(part for part in token.split("/") if part)
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def _canonical(token: str) -> str:
+    if token in SYNONYMS:
+        return SYNONYMS[token]
+    if token in SKILLS or token in GENERIC_TERMS:
+        return token
+    # Light plural folding: "services" -> "service", "apis" -> "api"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(_NOT_PLURAL):
+        singular = token[:-1]
+        return SYNONYMS.get(singular, singular)
+    return token
+
+
+def _phrase(tokens: List[str]) -> Optional[str]:
+    phrase = " ".join(tokens)
+    if phrase in PHRASES:
+        return phrase
+    if phrase.endswith("s") and phrase[:-1] in PHRASES:
+        return phrase[:-1]
+    return None
+
+
+def extract_terms(text: str) -> Counter:
+    """
+    Count canonical terms in a document.
+
+    Known phrases are matched first and their words are not counted again;
+    stopwords and tokens without letters are dropped.
+
+    Args:
+        text: Document text
+
+    Returns:
+        Counter: Canonical term frequencies
+    """
+    tokens = tokenize(text)
+    terms: Counter = Counter()
+    index = 0
+    while index < len(tokens):
+        for length in (3, 2):
+            phrase = _phrase(tokens[index : index + length])
+            if phrase:
+                terms[SYNONYMS.get(phrase, phrase)] += 1
+                index += length
+                break
+        else:
+            token = tokens[index]
+            if token not in STOPWORDS and len(token) > 1 and _LETTER.search(token):
+                terms[_canonical(token)] += 1
+            index += 1
+    return terms
+
+
+def term_weights(terms: Counter) -> Dict[str, float]:
+    """
+    Weight terms by sublinear frequency times the static IDF prior.
+
+    Args:
+        terms: Canonical term frequencies
+
+    Returns:
+        Dict[str, float]: Weight per term
+    """
+    weights = {}
+    for term, count in terms.items():
+        if term in SKILLS:
+            idf = SKILL_IDF
+        elif term in GENERIC_TERMS:
+            idf = GENERIC_IDF
+        else:
+            idf = DEFAULT_IDF
+        weights[term] = (1 + math.log(count)) * idf
+    return weights
+
+
+def match_documents(resume_text: str, job_description_text: str) -> MatchResult:
+    """
+    Score how well a resume covers a job description's keywords.
+
+    Args:
+        resume_text: Resume text
+        job_description_text: Job description text
+
+    Returns:
+        MatchResult: Score in [0, 100] and the heaviest present/missing terms
+    """
+    resume_terms = extract_terms(resume_text)
+    weights = term_weights(extract_terms(job_description_text))
+    total = sum(weights.values())
+    if not total:
+        return MatchResult(score=0.0, present=[], missing=[])
+
+    ranked = sorted(weights.items(), key=lambda item: (-item[1], item[0]))
+    present = [term for term, _ in ranked if term in resume_terms]
+    missing = [
+        term
+        for term, _ in ranked
+        if term not in resume_terms and term not in GENERIC_TERMS
+    ]
+    covered = sum(weight for term, weight in weights.items() if term in resume_terms)
+    return MatchResult(
+        score=round(covered / total * 100, 1),
+        present=present[:MAX_TERMS],
+        missing=missing[:MAX_TERMS],
+    )
+
+
+def document_hash(row: Dict[str, object], text: str) -> str:
+    """
+    Identify a document version by its stored hash, else by its text.
+
+    Args:
+        row: Resume or job description row
+        text: Extracted text of the row
+
+    Returns:
+        str: Stable document hash
+    """
+    stored = row.get("sha256_hash")
+    if stored:
+        return str(stored)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def get_match(
+    resume_hash: str,
+    job_description_hash: str,
+    resume_text: str,
+    job_description_text: str,
+) -> Tuple[MatchResult, bool]:
+    """
+    Match two documents, reusing the result for an unchanged document pair.
+
+    Args:
+        resume_hash: Resume document hash
+        job_description_hash: Job description document hash
+        resume_text: Resume text
+        job_description_text: Job description text
+
+    Returns:
+        Tuple[MatchResult, bool]: Match result and whether it came from cache
+    """
+    key = (resume_hash, job_description_hash)
+    cached: Optional[MatchResult] = _cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    result = match_documents(resume_text, job_description_text)
+    _cache.set(key, result)
+    return result, False
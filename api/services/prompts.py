@@ -5,10 +5,12 @@ System prompts and message conversion utilities.
 import json
 from typing import Any, Dict, List
 
-from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
-
 from api.core.schemas import ClientMessage
 
+# An OpenAI chat completion message param, kept as a plain dict so the openai
+# SDK is not needed at runtime
+ChatCompletionMessageParam = Dict[str, Any]
+
 
 def get_system_prompt() -> str:
     """
@@ -142,6 +144,46 @@ def get_system_prompt() -> str:
     """.strip()
 
 
+def get_batch_analysis_prompt() -> str:
+    """
+    Get the per-job-description prompt for batch analysis.
+
+    Sent alongside the system prompt, the resume and one job description.
+
+    Returns:
+        str: Prompt text
+    """
+    return """
+    Evaluate how well the attached resume fits the attached job description.
+    Answer in at most 150 words with three short sections:
+    **Fit** (Strong, Moderate or Weak, with one sentence why),
+    **Strengths** (up to three matching qualifications) and
+    **Gaps** (up to three missing or weak requirements).
+    Do not ask follow-up questions.
+    """.strip()
+
+
+def get_first_review_prompt(with_job_description: bool) -> str:
+    """
+    Get the standard first-turn review request, prepared before it is asked.
+
+    Sent alongside the system prompt and the thread's documents, as if the
+    user had asked for a review.
+
+    Args:
+        with_job_description: Whether a job description is attached
+
+    Returns:
+        str: Prompt text
+    """
+    if with_job_description:
+        return (
+            "Review my resume and summarize how well it fits the attached "
+            "job description."
+        )
+    return "Review my resume."
+
+
 def convert_to_openai_messages(
     messages: List[ClientMessage],
 ) -> List[ChatCompletionMessageParam]:
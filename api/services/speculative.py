@@ -0,0 +1,230 @@
+"""
+Speculative first-pass reviews.
+
+Nearly every thread opens with a request to review the resume, which would
+otherwise wait on a cold model call. With ``PREPARE_FIRST_REVIEW`` on, saving
+a thread's documents starts generating the standard first-pass review (with a
+job fit summary when the thread has a job description) in the background. It
+is kept per instance, keyed by the document hashes, so a thread's first
+message asking for a review is answered from it, waiting for it if it is
+still generating. Other prompts and later turns are generated live.
+"""
+
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple, Union
+
+from api.core.cache import LRUCache
+from api.core.config import settings
+from api.core.logging import log_exception, log_info, log_warning
+from api.core.metrics import FIRST_REVIEWS
+from api.db.service import get_history_window, get_job_description, get_resume
+from api.services.gemini import RESUME_REQUIRED_MESSAGE, generate_first_review
+from api.services.matching import document_hash
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.types import File as GeminiFile
+    from supabase import Client
+
+# Longer prompts carry instructions a prepared review would ignore
+MAX_PROMPT_CHARS = 120
+# Messages read to tell whether a chat message opens its thread
+FIRST_TURN_WINDOW = 6
+_RESUME = r"\b(resume|résumé|cv)\b"
+REVIEW_PROMPT = re.compile(
+    rf"\b(review|feedback|critique|assess|evaluate|analy[sz]e|check|thoughts)\b.*{_RESUME}"
+    rf"|{_RESUME}.*\b(review|feedback|critique)\b"
+    rf"|^(how('s| is| does)|is) my {_RESUME}"
+)
+FIT_PROMPT = re.compile(
+    r"\b(fit|match|qualified|suited)\b.*\b(job|role|position|description|jd)\b"
+)
+
+_reviews: "LRUCache[str, asyncio.Task]" = LRUCache(settings.FIRST_REVIEW_MAX_ENTRIES)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def review_key(
+    resume: Dict[str, Any], job_description: Optional[Dict[str, Any]]
+) -> str:
+    """
+    Identify a review by the versions of the documents it covers.
+
+    Args:
+        resume: Resume row
+        job_description: Job description row, if the thread has one
+
+    Returns:
+        str: Review key
+    """
+    resume_hash = document_hash(resume, resume.get("extracted_text") or "")
+    if job_description is None:
+        return resume_hash
+    job_description_hash = document_hash(
+        job_description, job_description.get("extracted_text") or ""
+    )
+    return f"{resume_hash}:{job_description_hash}"
+
+
+def matches_review_prompt(prompt: str, with_job_description: bool) -> bool:
+    """
+    Check whether a prompt asks for what the prepared review answers.
+
+    Args:
+        prompt: User prompt
+        with_job_description: Whether the review covers a job description
+
+    Returns:
+        bool: True for short requests to review the resume, or to assess job
+        fit when a job description is attached
+    """
+    text = prompt.strip().lower()
+    if len(text) > MAX_PROMPT_CHARS:
+        return False
+    if REVIEW_PROMPT.search(text):
+        return True
+    return with_job_description and bool(FIT_PROMPT.search(text))
+
+
+async def _document(
+    gemini_client: "genai.Client", row: Dict[str, Any]
+) -> Union["GeminiFile", str]:
+    """Pick the extracted text or the Gemini file, as ``stream_response`` does."""
+    text = row.get("extracted_text")
+    if settings.USE_EXTRACTED_TEXT and text:
+        return text
+    return await gemini_client.aio.files.get(name=row["name"])
+
+
+async def _generate(
+    gemini_client: "genai.Client",
+    resume: Dict[str, Any],
+    job_description: Optional[Dict[str, Any]],
+) -> Tuple[str, int]:
+    start = time.perf_counter()
+    review = await generate_first_review(
+        gemini_client,
+        await _document(gemini_client, resume),
+        await _document(gemini_client, job_description) if job_description else None,
+    )
+    log_info(
+        "Prepared first review",
+        extra={
+            "thread_id": resume.get("thread_id"),
+            "output_tokens": review[1],
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        },
+    )
+    return review
+
+
+def _finished(key: str, task: asyncio.Task) -> None:
+    """Count a generation and forget it if it failed, so an upload can retry."""
+    error = None if task.cancelled() else task.exception()
+    if task.cancelled() or error is not None:
+        FIRST_REVIEWS.labels("failed").inc()
+        log_warning("First review generation failed", extra={"error": str(error)})
+        if _reviews.get(key) is task:
+            _reviews.pop(key)
+        return
+    FIRST_REVIEWS.labels("generated").inc()
+
+
+async def prepare_review(
+    gemini_client: "genai.Client", supabase: "Client", thread_id: str
+) -> None:
+    """
+    Start generating the first review of a thread's current documents.
+
+    Does nothing if the thread has no resume or the same documents already
+    have a review, prepared or in progress.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+    """
+    try:
+        resume = await get_resume(supabase, thread_id)
+        if not resume:
+            return
+        job_description = await get_job_description(supabase, thread_id)
+        job_description_row = job_description[0] if job_description else None
+        key = review_key(resume[0], job_description_row)
+        if key in _reviews:
+            return
+        task = asyncio.create_task(
+            _generate(gemini_client, resume[0], job_description_row)
+        )
+        _reviews.set(key, task, ttl=settings.FIRST_REVIEW_TTL_SECONDS)
+        task.add_done_callback(lambda done: _finished(key, done))
+    except Exception as e:
+        log_exception(f"Error preparing first review: {e}")
+
+
+def schedule_review(
+    gemini_client: "genai.Client", supabase: "Client", thread_id: str
+) -> None:
+    """
+    Prepare a thread's first review in the background, if enabled.
+
+    Called after a thread's documents are saved.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+    """
+    if not settings.PREPARE_FIRST_REVIEW:
+        return
+    task = asyncio.create_task(prepare_review(gemini_client, supabase, thread_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def find_review(
+    supabase: "Client",
+    thread_id: str,
+    prompt: str,
+    resume: Dict[str, Any],
+    job_description: Optional[Dict[str, Any]],
+) -> Optional[asyncio.Task]:
+    """
+    Find a prepared review that answers a thread's first message.
+
+    Must be called after the user's message is stored. Messages asking for a
+    resume upload before one existed do not count as earlier turns.
+
+    Args:
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        prompt: User prompt
+        resume: The thread's resume row
+        job_description: The thread's job description row, if any
+
+    Returns:
+        Optional[asyncio.Task]: Review generation to pass to
+        ``stream_response``, or None to generate live
+    """
+    if not settings.PREPARE_FIRST_REVIEW or not matches_review_prompt(
+        prompt, job_description is not None
+    ):
+        return None
+    task = _reviews.get(review_key(resume, job_description))
+    if task is None:
+        FIRST_REVIEWS.labels("missed").inc()
+        return None
+
+    recent = await get_history_window(supabase, thread_id, FIRST_TURN_WINDOW)
+    if len(recent) >= FIRST_TURN_WINDOW:
+        return None
+    # recent[0] is the message being answered
+    for message in recent[1:]:
+        if (
+            message["sender"] == "model"
+            and message["content"] != RESUME_REQUIRED_MESSAGE
+        ):
+            return None
+    return task
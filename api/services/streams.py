@@ -0,0 +1,241 @@
+"""
+Resumable SSE streams backed by bounded per-message frame buffers.
+"""
+
+import asyncio
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncGenerator, Deque, Dict, Optional
+
+from api.core.config import settings
+from api.core.logging import log_error, log_info, log_warning
+from api.core.metrics import STREAMS_IN_FLIGHT
+
+
+class StreamGoneError(Exception):
+    """Raised when requested frames have already been evicted from the buffer."""
+
+
+class StreamBuffer:
+    """
+    Ring buffer of SSE frames for one in-flight assistant message.
+
+    The model generation runs as a background task writing into the buffer, and
+    any number of HTTP responses tail it. Frames are numbered from 0 so clients
+    can resume with ``Last-Event-ID``.
+    """
+
+    def __init__(self, message_id: str, max_frames: int) -> None:
+        self.message_id = message_id
+        self.frames: Deque[str] = deque(maxlen=max_frames)
+        self.next_event_id = 0
+        self.done = False
+        self.subscribers = 0
+        self.detached_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def oldest_event_id(self) -> int:
+        """Event id of the oldest frame still held in the buffer."""
+        return self.next_event_id - len(self.frames)
+
+    def start(self, generator: AsyncGenerator[str, None]) -> asyncio.Task:
+        """
+        Run a frame generator in the background, buffering its output.
+
+        Args:
+            generator: SSE frame generator to drain
+
+        Returns:
+            asyncio.Task: Producer task
+        """
+        self.task = asyncio.create_task(self._produce(generator))
+        return self.task
+
+    def append(self, frame: str) -> None:
+        """
+        Number a frame and add it to the buffer, waking any subscribers.
+
+        Args:
+            frame: SSE formatted frame
+        """
+        self.frames.append(f"id: {self.next_event_id}\n{frame}")
+        self.next_event_id += 1
+        self._notify()
+
+    def close(self) -> None:
+        """Mark the stream as finished."""
+        self.done = True
+        self._notify()
+
+    def can_resume_from(self, last_event_id: Optional[int]) -> bool:
+        """
+        Check whether every frame after ``last_event_id`` is still buffered.
+
+        Args:
+            last_event_id: Last event id the client received, or None
+
+        Returns:
+            bool: True if the stream can be replayed without gaps
+        """
+        start = 0 if last_event_id is None else last_event_id + 1
+        return start >= self.oldest_event_id
+
+    async def is_abandoned(self) -> bool:
+        """
+        Report whether no client has been attached for longer than the grace period.
+
+        Returns:
+            bool: True if the upstream generation should be cancelled
+        """
+        return (
+            self.subscribers == 0
+            and time.monotonic() - self.detached_at
+            > settings.STREAM_RESUME_GRACE_SECONDS
+        )
+
+    async def subscribe(
+        self, last_event_id: Optional[int] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Replay buffered frames after ``last_event_id`` and then tail the live stream.
+
+        Args:
+            last_event_id: Last event id the client received, or None for all
+
+        Yields:
+            str: SSE formatted frames with event ids
+
+        Raises:
+            StreamGoneError: If frames the client needs were already evicted
+        """
+        cursor = -1 if last_event_id is None else last_event_id
+        self.subscribers += 1
+        try:
+            while True:
+                changed = self._changed
+                if cursor + 1 < self.oldest_event_id:
+                    raise StreamGoneError(
+                        f"Frames after {cursor} were evicted from {self.message_id}"
+                    )
+
+                pending = list(
+                    islice(self.frames, cursor + 1 - self.oldest_event_id, None)
+                )
+                cursor = self.next_event_id - 1
+                for frame in pending:
+                    yield frame
+
+                if self.done and cursor == self.next_event_id - 1:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            self.detached_at = time.monotonic()
+
+    async def _produce(self, generator: AsyncGenerator[str, None]) -> None:
+        STREAMS_IN_FLIGHT.inc()
+        try:
+            async for frame in generator:
+                self.append(frame)
+        except Exception as e:
+            log_error(f"Error producing stream {self.message_id}: {e}")
+        finally:
+            STREAMS_IN_FLIGHT.dec()
+            self.close()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class StreamRegistry:
+    """In-process registry of resumable streams keyed by message id."""
+
+    def __init__(self) -> None:
+        self._buffers: Dict[str, StreamBuffer] = {}
+
+    def create(self, message_id: str) -> StreamBuffer:
+        """
+        Register a new stream buffer.
+
+        Args:
+            message_id: Assistant message identifier
+
+        Returns:
+            StreamBuffer: Empty buffer for the message
+        """
+        buffer = StreamBuffer(message_id, settings.STREAM_BUFFER_SIZE)
+        self._buffers[message_id] = buffer
+        return buffer
+
+    def start(
+        self, buffer: StreamBuffer, generator: AsyncGenerator[str, None]
+    ) -> StreamBuffer:
+        """
+        Start producing into a buffer and expire it once retention elapses.
+
+        Args:
+            buffer: Buffer returned by ``create``
+            generator: SSE frame generator to drain
+
+        Returns:
+            StreamBuffer: The started buffer
+        """
+        task = buffer.start(generator)
+        task.add_done_callback(lambda _: self._schedule_expiry(buffer))
+        return buffer
+
+    def get(self, message_id: str) -> Optional[StreamBuffer]:
+        """
+        Look up a stream buffer.
+
+        Args:
+            message_id: Assistant message identifier
+
+        Returns:
+            Optional[StreamBuffer]: Buffer or None if unknown or expired
+        """
+        return self._buffers.get(message_id)
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Wait for in-flight streams to finish, cancelling any still running.
+
+        Cancelled generations persist their partial answer as truncated.
+
+        Args:
+            timeout: Seconds to wait before cancelling
+        """
+        tasks = [
+            buffer.task
+            for buffer in self._buffers.values()
+            if buffer.task and not buffer.task.done()
+        ]
+        if not tasks:
+            return
+        log_info("Draining streams", extra={"in_flight": len(tasks)})
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            log_warning("Cancelled streams on shutdown", extra={"count": len(pending)})
+
+    def _schedule_expiry(self, buffer: StreamBuffer) -> None:
+        asyncio.get_running_loop().call_later(
+            settings.STREAM_RETENTION_SECONDS,
+            self._buffers.pop,
+            buffer.message_id,
+            None,
+        )
+        log_info(
+            "Stream finished",
+            extra={"message_id": buffer.message_id, "frames": buffer.next_event_id},
+        )
+
+
+# Global stream registry
+stream_registry = StreamRegistry()
@@ -2,12 +2,14 @@
 Tool definitions and implementations for AI function calling.
 """
 
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from google.genai import types
-from supabase import Client
+from api.services.history import get_recent_history, get_relevant_history
 
-from api.db.service import get_messages
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+    from supabase import Client
 
 
 def get_message_history_function() -> Dict[str, Any]:
@@ -33,26 +35,42 @@ def get_message_history_function() -> Dict[str, Any]:
     }
 
 
-async def get_message_history(supabase: Client, thread_id: str) -> List[str]:
+async def get_message_history(
+    supabase: "Client",
+    thread_id: str,
+    gemini_client: Optional["genai.Client"] = None,
+    query: Optional[str] = None,
+) -> List[str]:
     """
     Get the message history for a given thread.
 
+    With a Gemini client and a query, returns the newest messages plus the
+    older ones most relevant to the query; otherwise the most recent messages.
+    Either way the history fits ``HISTORY_TOKEN_BUDGET``.
+
     Args:
         supabase: Supabase client instance
         thread_id: Thread identifier
+        gemini_client: Optional Gemini client instance for relevance search
+        query: Optional text the history should be relevant to
 
     Returns:
         List[str]: List of message contents
     """
-    data = await get_messages(supabase, thread_id)
+    if gemini_client is not None and query:
+        data = await get_relevant_history(gemini_client, supabase, thread_id, query)
+        return [message["content"] for message in data]
+    data = await get_recent_history(supabase, thread_id)
     return [message["content"] for message in data]
 
 
-def get_tools() -> types.Tool:
+def get_tools() -> "types.Tool":
     """
     Get the tool definitions for Gemini API.
 
     Returns:
         types.Tool: Tool configuration for the model
     """
+    from google.genai import types
+
     return types.Tool(function_declarations=[get_message_history_function()])
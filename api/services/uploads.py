@@ -0,0 +1,472 @@
+"""
+Document uploads: Gemini upload plus text extraction, run inline or as
+background jobs.
+
+A job is queued with the document bytes and processed by a fixed pool of
+workers, so the upload request returns immediately with 202 and a job id.
+Progress is kept as a list of events that clients poll or tail over SSE.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from vercel.cache.context import get_context
+
+from api.core.config import settings
+from api.core.logging import log_exception, log_info, log_warning
+from api.core.metrics import UPLOAD_JOB_QUEUE_WAIT, UPLOAD_JOBS, UPLOAD_JOBS_QUEUED
+from api.core.schemas import DocumentUploadStatus
+from api.db.service import save_documents
+from api.services.extraction import extract_document_text
+from api.services.gemini import upload_bytes
+from api.services.speculative import schedule_review
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai.types import File as GeminiFile
+    from supabase import Client
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when the upload job queue cannot take another job."""
+
+
+class PendingDocument(NamedTuple):
+    """An uploaded document read into memory."""
+
+    kind: str
+    file_name: str
+    content: bytes
+    mime_type: Optional[str]
+
+
+async def process_document(
+    gemini_client: "genai.Client", document: PendingDocument
+) -> Tuple["GeminiFile", Optional[str]]:
+    """
+    Upload a document to Gemini while extracting its text.
+
+    Args:
+        gemini_client: Gemini client instance
+        document: Document to process
+
+    Returns:
+        Tuple[GeminiFile, Optional[str]]: Gemini file and extracted text
+    """
+    extracted_text, gemini_file = await asyncio.gather(
+        extract_document_text(document.content, document.file_name, document.mime_type),
+        upload_bytes(gemini_client, document.content, document.file_name),
+    )
+    return gemini_file, extracted_text
+
+
+def _failed_status(document: PendingDocument, error: BaseException) -> Dict[str, Any]:
+    detail = error.detail if isinstance(error, HTTPException) else str(error)
+    return DocumentUploadStatus(
+        kind=document.kind, fileName=document.file_name, status="failed", error=detail
+    ).model_dump()
+
+
+async def upload_documents(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    thread_id: str,
+    documents: List[PendingDocument],
+    job: Optional["UploadJob"] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Process documents concurrently and save the successful ones together.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        documents: Documents to upload, at most one per kind
+        job: Optional job to report progress to
+
+    Returns:
+        List[Dict[str, Any]]: Per-file ``DocumentUploadStatus`` payloads
+
+    Raises:
+        Exception: If saving the documents fails
+    """
+
+    async def process(document: PendingDocument) -> Tuple["GeminiFile", Optional[str]]:
+        try:
+            result = await process_document(gemini_client, document)
+        except BaseException as e:
+            if job:
+                job.record("file", **_failed_status(document, e))
+            raise
+        if job:
+            job.record(
+                "file", kind=document.kind, fileName=document.file_name, status="ready"
+            )
+        return result
+
+    results = await asyncio.gather(
+        *(process(document) for document in documents), return_exceptions=True
+    )
+
+    statuses = []
+    rows: Dict[str, Tuple[str, "GeminiFile", Optional[str]]] = {}
+    for document, result in zip(documents, results):
+        if isinstance(result, BaseException):
+            statuses.append(_failed_status(document, result))
+            continue
+        gemini_file, extracted_text = result
+        rows[document.kind] = (document.file_name, gemini_file, extracted_text)
+        statuses.append(
+            DocumentUploadStatus(
+                kind=document.kind,
+                fileName=document.file_name,
+                status="uploaded",
+                textExtracted=extracted_text is not None,
+            ).model_dump()
+        )
+
+    if rows:
+        if job:
+            job.set_status("saving")
+        await save_documents(supabase, thread_id, rows)
+        schedule_review(gemini_client, supabase, thread_id)
+
+    log_info(
+        "Uploaded documents",
+        extra={
+            "thread_id": thread_id,
+            "uploaded": len(rows),
+            "failed": len(documents) - len(rows),
+        },
+    )
+    return statuses
+
+
+class UploadJob:
+    """
+    State and event log of one background upload.
+
+    Status moves from ``queued`` to ``processing`` and ``saving`` and ends in
+    ``succeeded`` (at least one document saved) or ``failed``.
+    """
+
+    def __init__(
+        self,
+        thread_id: str,
+        documents: List[PendingDocument],
+        gemini_client: "genai.Client",
+        supabase: "Client",
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.thread_id = thread_id
+        self.documents = documents
+        self.gemini_client = gemini_client
+        self.supabase = supabase
+        self.status = "queued"
+        self.files: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.queued_at = time.monotonic()
+        self.finished = asyncio.Event()
+        self._changed = asyncio.Event()
+        self.set_status("queued")
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has reached a terminal status."""
+        return self.status in TERMINAL_STATUSES
+
+    def record(self, event_type: str, **details: Any) -> None:
+        """
+        Append a progress event, waking any subscribers.
+
+        Args:
+            event_type: Event type, ``status`` or ``file``
+            **details: Event payload
+        """
+        self.events.append({"type": event_type, "jobId": self.id, **details})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_status(self, status: str, **details: Any) -> None:
+        """
+        Move the job to a new status and record it as an event.
+
+        Args:
+            status: New status
+            **details: Extra event payload
+        """
+        self.status = status
+        self.record("status", status=status, **details)
+        if self.done:
+            self.documents = []  # release the document bytes
+            self.finished.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Snapshot the job for the poll endpoint.
+
+        Returns:
+            Dict[str, Any]: ``UploadJobResponse`` fields
+        """
+        return {
+            "jobId": self.id,
+            "threadId": self.thread_id,
+            "status": self.status,
+            "files": self.files,
+            "error": self.error,
+        }
+
+    async def subscribe(
+        self, last_event_id: Optional[int] = None
+    ) -> AsyncGenerator[Tuple[int, Dict[str, Any]], None]:
+        """
+        Replay events after ``last_event_id`` and then tail new ones until the
+        job finishes.
+
+        Args:
+            last_event_id: Index of the last event the client received
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Event index and payload
+        """
+        cursor = -1 if last_event_id is None else last_event_id
+        while True:
+            changed = self._changed
+            for index in range(cursor + 1, len(self.events)):
+                yield index, self.events[index]
+            cursor = len(self.events) - 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class UploadJobQueue:
+    """
+    Bounded in-process queue of upload jobs with a fixed pool of workers.
+
+    Workers start on the first submitted job. Finished jobs stay pollable for
+    ``UPLOAD_JOB_RETENTION_SECONDS``.
+    """
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, UploadJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def submit(self, job: UploadJob) -> UploadJob:
+        """
+        Queue a job for the workers.
+
+        Args:
+            job: Job to run
+
+        Returns:
+            UploadJob: The queued job
+
+        Raises:
+            QueueFullError: If ``UPLOAD_JOB_QUEUE_SIZE`` jobs are already waiting
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.UPLOAD_JOB_QUEUE_SIZE)
+            self._workers = [
+                asyncio.create_task(self._work())
+                for _ in range(settings.UPLOAD_JOB_WORKERS)
+            ]
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            UPLOAD_JOBS.labels("rejected").inc()
+            raise QueueFullError("Upload queue is full")
+
+        self._jobs[job.id] = job
+        UPLOAD_JOBS_QUEUED.inc()
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Optional[UploadJob]: Job or None if unknown or expired
+        """
+        return self._jobs.get(job_id)
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Wait for queued and running jobs to finish, then stop the workers.
+
+        Args:
+            timeout: Seconds to wait before cancelling
+        """
+        if self._queue is None:
+            return
+        unfinished = [job for job in self._jobs.values() if not job.done]
+        if unfinished:
+            log_info("Draining upload jobs", extra={"unfinished": len(unfinished)})
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                log_warning(
+                    "Cancelled upload jobs on shutdown",
+                    extra={"count": len([job for job in unfinished if not job.done])},
+                )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            UPLOAD_JOBS_QUEUED.dec()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: UploadJob) -> None:
+        UPLOAD_JOB_QUEUE_WAIT.observe(time.monotonic() - job.queued_at)
+        job.set_status("processing")
+        try:
+            job.files = await upload_documents(
+                job.gemini_client, job.supabase, job.thread_id, job.documents, job
+            )
+            uploaded = any(file["status"] == "uploaded" for file in job.files)
+            job.set_status("succeeded" if uploaded else "failed", files=job.files)
+        except asyncio.CancelledError:
+            job.error = "Upload cancelled"
+            job.set_status("failed", error=job.error)
+            raise
+        except Exception as e:
+            log_exception(f"Upload job {job.id} failed: {e}")
+            job.error = str(e)
+            job.set_status("failed", error=job.error)
+        finally:
+            UPLOAD_JOBS.labels(job.status).inc()
+            asyncio.get_running_loop().call_later(
+                settings.UPLOAD_JOB_RETENTION_SECONDS, self._jobs.pop, job.id, None
+            )
+
+
+# Global upload job queue
+upload_jobs = UploadJobQueue()
+
+
+def wants_async(prefer: Optional[str]) -> bool:
+    """
+    Check whether the client asked for a background job (RFC 7240).
+
+    Args:
+        prefer: ``Prefer`` request header
+
+    Returns:
+        bool: True if the header contains ``respond-async``
+    """
+    return bool(prefer) and "respond-async" in prefer.lower()
+
+
+def check_upload_size(file: UploadFile) -> None:
+    """
+    Reject a file over ``MAX_UPLOAD_SIZE`` before it is read into memory.
+
+    Args:
+        file: Uploaded file
+
+    Raises:
+        HTTPException: If the file is too large
+    """
+    if file.size and file.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{file.filename} exceeds the allowed size",
+        )
+
+
+async def read_document(kind: str, file: UploadFile) -> PendingDocument:
+    """
+    Read an uploaded file into memory so it can outlive the request.
+
+    Args:
+        kind: Document kind, ``resume`` or ``job_description``
+        file: Uploaded file
+
+    Returns:
+        PendingDocument: Document bytes and metadata
+    """
+    return PendingDocument(
+        kind=kind,
+        file_name=file.filename or f"{kind}.pdf",
+        content=await file.read(),
+        mime_type=file.content_type,
+    )
+
+
+def submit_upload_job(
+    gemini_client: "genai.Client",
+    supabase: "Client",
+    thread_id: str,
+    documents: List[PendingDocument],
+) -> JSONResponse:
+    """
+    Queue documents for background upload and answer 202 Accepted.
+
+    On Vercel the job is registered with ``waitUntil`` so the function keeps
+    running after the response until the job finishes.
+
+    Args:
+        gemini_client: Gemini client instance
+        supabase: Supabase client instance
+        thread_id: Thread identifier
+        documents: Documents read with ``read_document``
+
+    Returns:
+        JSONResponse: 202 with the ``UploadJobResponse`` and a ``Location``
+        header pointing at the job
+
+    Raises:
+        HTTPException: If the job queue is full
+    """
+    try:
+        job = upload_jobs.submit(
+            UploadJob(thread_id, documents, gemini_client, supabase)
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
+
+    wait_until = get_context().wait_until
+    if wait_until:
+        wait_until(job.finished.wait())
+
+    log_info(
+        "Queued upload job",
+        extra={"job_id": job.id, "thread_id": thread_id, "files": len(documents)},
+    )
+    return JSONResponse(
+        status_code=202,
+        content=job.to_dict(),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
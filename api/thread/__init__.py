@@ -0,0 +1 @@
+"""Thread domain module."""
@@ -0,0 +1,338 @@
+"""
+Thread router for uploading a thread's documents and analyses over them.
+"""
+
+import re
+import uuid as uuid_lib
+from typing import List, Literal, Optional, Union
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api.auth.stack_auth import verify_stack_token
+from api.core.config import settings
+from api.core.dependencies import GeminiClient, SupabaseClient
+from api.core.schemas import MatchResponse, MultiUploadResponse, UploadJobResponse
+from api.core.timing import span
+from api.db.service import get_job_description, get_message_page, get_resume
+from api.services.batch import BatchItem, stream_batch_analysis
+from api.services.export import EXPORT_MEDIA_TYPES, stream_thread_export
+from api.services.idempotency import fingerprint, run_idempotent
+from api.services.matching import document_hash, get_match
+from api.services.uploads import (
+    check_upload_size,
+    read_document,
+    submit_upload_job,
+    upload_documents,
+    wants_async,
+)
+
+router = APIRouter(
+    prefix="/api/thread", tags=["thread"], dependencies=[Depends(verify_stack_token)]
+)
+
+
+@router.post(
+    "/upload",
+    response_model=MultiUploadResponse,
+    status_code=status.HTTP_200_OK,
+    responses={status.HTTP_202_ACCEPTED: {"model": UploadJobResponse}},
+)
+async def upload_thread_documents(
+    supabase: SupabaseClient,
+    gemini: GeminiClient,
+    resume: Optional[UploadFile] = File(None),
+    job_description: Optional[UploadFile] = File(None),
+    uuid: str = Form(None),
+    prefer: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    auth_user: dict = Depends(verify_stack_token),
+) -> Union[MultiUploadResponse, JSONResponse]:
+    """
+    Upload a thread's resume and job description in one request.
+
+    Both documents are uploaded to Gemini and extracted concurrently, and
+    their rows are written together. A document that fails is reported in its
+    status without failing the other. With ``Prefer: respond-async`` the work
+    runs as a background job and the response is 202 with the job.
+
+    Args:
+        supabase: Supabase client dependency
+        gemini: Gemini client dependency
+        resume: Optional resume file
+        job_description: Optional job description file
+        uuid: Optional thread UUID
+        prefer: Optional ``Prefer`` header
+        idempotency_key: Optional ``Idempotency-Key`` header; a retry with
+            the same key replays the first response instead of uploading again
+        auth_user: Authenticated user data from JWT token
+
+    Returns:
+        Union[MultiUploadResponse, JSONResponse]: Thread id and per-file
+        status, or 202 with the queued job
+
+    Raises:
+        HTTPException: If no file is given, a file is too large, the job
+            queue is full, saving
+            the documents fails or the idempotency key was used for a
+            different upload
+    """
+    uploads = [
+        (kind, file)
+        for kind, file in (("resume", resume), ("job_description", job_description))
+        if file is not None
+    ]
+    if not uploads:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide a resume and/or a job description file",
+        )
+
+    for _, file in uploads:
+        check_upload_size(file)
+    documents = [await read_document(kind, file) for kind, file in uploads]
+    request_fingerprint = fingerprint(
+        uuid,
+        str(wants_async(prefer)),
+        *(
+            part
+            for document in documents
+            for part in (document.kind, document.file_name, document.content)
+        ),
+    )
+
+    async def handle() -> Union[MultiUploadResponse, JSONResponse]:
+        thread_id = uuid if uuid else str(uuid_lib.uuid4())
+        if wants_async(prefer):
+            return submit_upload_job(gemini, supabase, thread_id, documents)
+
+        try:
+            statuses = await upload_documents(gemini, supabase, thread_id, documents)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error saving documents: {e}",
+            )
+        return MultiUploadResponse(threadId=thread_id, files=statuses)
+
+    return await run_idempotent(
+        idempotency_key,
+        "thread_upload",
+        auth_user.get("id"),
+        request_fingerprint,
+        handle,
+    )
+
+
+@router.get(
+    "/{thread_id}/match", response_model=MatchResponse, status_code=status.HTTP_200_OK
+)
+async def match_thread(thread_id: str, supabase: SupabaseClient) -> MatchResponse:
+    """
+    Score the thread's resume against its job description by keyword coverage.
+
+    Deterministic and local: no model call. Results are cached per pair of
+    document hashes, so re-uploading either document invalidates them.
+
+    Args:
+        thread_id: Thread identifier
+        supabase: Supabase client dependency
+
+    Returns:
+        MatchResponse: Score with the present and missing job description terms
+
+    Raises:
+        HTTPException: If a document is missing or has no extracted text
+    """
+    resume = await get_resume(supabase, thread_id)
+    if not resume:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found"
+        )
+    job_description = await get_job_description(supabase, thread_id)
+    if not job_description:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job description not found"
+        )
+
+    resume_text = resume[0].get("extracted_text")
+    job_description_text = job_description[0].get("extracted_text")
+    if not resume_text or not job_description_text:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Document text unavailable; upload a text-based PDF or DOCX",
+        )
+
+    with span("match"):
+        result, cached = get_match(
+            document_hash(resume[0], resume_text),
+            document_hash(job_description[0], job_description_text),
+            resume_text,
+            job_description_text,
+        )
+
+    return MatchResponse(
+        score=result.score,
+        presentTerms=result.present,
+        missingTerms=result.missing,
+        cached=cached,
+    )
+
+
+@router.post("/{thread_id}/batch-analysis", status_code=status.HTTP_200_OK)
+async def batch_analysis(
+    thread_id: str,
+    supabase: SupabaseClient,
+    gemini: GeminiClient,
+    files: List[UploadFile] = File(default=[]),
+    texts: List[str] = Form(default=[]),
+) -> StreamingResponse:
+    """
+    Analyze the thread's resume against many job descriptions at once.
+
+    Job descriptions can be uploaded as files, pasted as text, or both. The
+    stored resume is reused for every call. Results stream as NDJSON as each
+    analysis finishes; a failed job description is reported on its own line
+    and does not fail the batch.
+
+    Args:
+        thread_id: Thread identifier
+        supabase: Supabase client dependency
+        gemini: Gemini client dependency
+        files: Job description files
+        texts: Job description texts
+
+    Returns:
+        StreamingResponse: NDJSON stream of ``start``, ``result`` and ``done``
+        lines
+
+    Raises:
+        HTTPException: If the batch is empty or too large, a file is too
+            large, or the thread has no resume
+    """
+    total = len(files) + len(texts)
+    if not total:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Provide at least one job description file or text",
+        )
+    if total > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BATCH_MAX_ITEMS} job descriptions per batch",
+        )
+
+    resume = await get_resume(supabase, thread_id)
+    if not resume:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Resume not found"
+        )
+
+    # Read uploads now: the form is closed once the streaming response starts
+    items = []
+    for file in files:
+        if file.size and file.size > settings.MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{file.filename} exceeds the allowed size",
+            )
+        items.append(
+            BatchItem(
+                index=len(items),
+                name=file.filename or f"job-description-{len(items) + 1}",
+                content=await file.read(),
+                mime_type=file.content_type,
+            )
+        )
+    for text in texts:
+        items.append(
+            BatchItem(
+                index=len(items), name=f"job-description-{len(items) + 1}", text=text
+            )
+        )
+
+    resume_text = resume[0].get("extracted_text")
+    if settings.USE_EXTRACTED_TEXT and resume_text:
+        resume_document = resume_text
+    else:
+        with span("gemini.files_get"):
+            resume_document = await gemini.aio.files.get(name=resume[0]["name"])
+
+    response = StreamingResponse(
+        stream_batch_analysis(
+            gemini,
+            resume_document,
+            resume_text,
+            document_hash(resume[0], resume_text) if resume_text else None,
+            items,
+        ),
+        media_type="application/x-ndjson",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@router.get("/{thread_id}/export", status_code=status.HTTP_200_OK)
+async def export_thread(
+    thread_id: str,
+    supabase: SupabaseClient,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+) -> StreamingResponse:
+    """
+    Download a whole thread: its document metadata and every message.
+
+    Messages are streamed page by page in the order they were written, so
+    threads of any length are exported with constant memory.
+
+    Args:
+        thread_id: Thread identifier
+        supabase: Supabase client dependency
+        export_format: ``ndjson`` (default) or ``csv``
+
+    Returns:
+        StreamingResponse: NDJSON or CSV attachment
+
+    Raises:
+        HTTPException: If the thread has no documents and no messages
+    """
+    resume = await get_resume(supabase, thread_id)
+    job_description = await get_job_description(supabase, thread_id)
+    first_page = await get_message_page(
+        supabase, thread_id, limit=settings.EXPORT_PAGE_SIZE
+    )
+    if not resume and not job_description and not first_page:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found"
+        )
+
+    response = StreamingResponse(
+        stream_thread_export(
+            supabase,
+            thread_id,
+            export_format,
+            {
+                "resume": resume[0] if resume else None,
+                "job_description": job_description[0] if job_description else None,
+            },
+            first_page,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+    )
+    file_name = re.sub(r"[^A-Za-z0-9_.-]", "_", thread_id)
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="thread-{file_name}.{export_format}"'
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
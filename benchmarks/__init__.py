@@ -0,0 +1 @@
+"""Benchmarks for the Resummate API, runnable without Supabase or Gemini."""
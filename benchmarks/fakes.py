@@ -0,0 +1,490 @@
+"""
+In-process stand-ins for Supabase (PostgREST), Gemini and Redis used by the
+benchmarks.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from google.genai import errors, types
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Columns filled by the database when a row is inserted without them
+COLUMN_DEFAULTS = {
+    "message": {"sent_at": lambda: datetime.now(timezone.utc).isoformat()},
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+# Approximate prompt cost of an uploaded two-page PDF (page images plus text)
+FILE_PROMPT_TOKENS = 1500
+
+
+class PostgrestStub:
+    """
+    Minimal PostgREST-compatible table store.
+
+    Supports the subset the Supabase client emits for this API: ``select``
+    of ``*`` or a column list, ``eq``/``neq``/``gt``/``gte``/``lt``/``lte``/``is``
+    filters, ``order``, ``limit``/``offset``, inserts, upserts with
+    ``on_conflict``, updates and deletes, all returning the affected rows.
+    """
+
+    def __init__(self) -> None:
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+        self.app = Starlette(
+            routes=[
+                Route(
+                    "/rest/v1/{table}",
+                    self.handle,
+                    methods=["GET", "POST", "PATCH", "DELETE"],
+                )
+            ]
+        )
+
+    def insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a row directly, applying column defaults.
+
+        Args:
+            table: Table name
+            row: Row data
+
+        Returns:
+            Dict[str, Any]: Stored row
+        """
+        stored = {"id": next(self._ids)}
+        for column, default in COLUMN_DEFAULTS.get(table, {}).items():
+            stored[column] = default()
+        stored.update(row)
+        self.tables.setdefault(table, []).append(stored)
+        return stored
+
+    async def handle(self, request: Request) -> JSONResponse:
+        table = request.path_params["table"]
+        rows = self.tables.setdefault(table, [])
+        filters = [
+            (column, value)
+            for column, value in request.query_params.multi_items()
+            if column not in RESERVED_PARAMS
+        ]
+
+        if request.method == "GET":
+            return JSONResponse(self._select(rows, filters, request.query_params))
+
+        if request.method == "POST":
+            body = await request.json()
+            payload = body if isinstance(body, list) else [body]
+            on_conflict = request.query_params.get("on_conflict")
+            merge = "merge-duplicates" in request.headers.get("prefer", "")
+            stored = [
+                self._upsert(table, row, on_conflict)
+                if merge and on_conflict
+                else self.insert(table, row)
+                for row in payload
+            ]
+            return JSONResponse(stored, status_code=201)
+
+        matched = [row for row in rows if _matches(row, filters)]
+        if request.method == "PATCH":
+            changes = await request.json()
+            for row in matched:
+                row.update(changes)
+        else:
+            ids = {id(row) for row in matched}
+            self.tables[table] = [row for row in rows if id(row) not in ids]
+        return JSONResponse(matched)
+
+    def _select(
+        self,
+        rows: List[Dict[str, Any]],
+        filters: List[Tuple[str, str]],
+        params: Any,
+    ) -> List[Dict[str, Any]]:
+        result = [row for row in rows if _matches(row, filters)]
+        for clause in reversed(params.get("order", "").split(",")):
+            if clause:
+                column, _, direction = clause.partition(".")
+                result.sort(
+                    key=lambda row: (row.get(column) is None, row.get(column)),
+                    reverse=direction.startswith("desc"),
+                )
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        result = result[offset : offset + int(limit) if limit else None]
+        columns = params.get("select", "*")
+        if columns == "*":
+            return result
+        selected = columns.split(",")
+        return [{column: row.get(column) for column in selected} for row in result]
+
+    def _upsert(
+        self, table: str, row: Dict[str, Any], on_conflict: str
+    ) -> Dict[str, Any]:
+        keys = on_conflict.split(",")
+        for existing in self.tables.setdefault(table, []):
+            if all(existing.get(key) == row.get(key) for key in keys):
+                existing.update(row)
+                return existing
+        return self.insert(table, row)
+
+
+def _matches(row: Dict[str, Any], filters: List[Tuple[str, str]]) -> bool:
+    for column, expression in filters:
+        operator, _, raw = expression.partition(".")
+        value = row.get(column)
+        if operator == "is":
+            if (value is None) != (raw == "null"):
+                return False
+            continue
+        if value is None:
+            return False
+        expected: Any = raw
+        if isinstance(value, bool):
+            expected = raw == "true"
+        elif isinstance(value, (int, float)):
+            expected = type(value)(raw)
+        if operator == "eq" and not value == expected:
+            return False
+        if operator == "neq" and not value != expected:
+            return False
+        if operator == "gt" and not value > expected:
+            return False
+        if operator == "gte" and not value >= expected:
+            return False
+        if operator == "lt" and not value < expected:
+            return False
+        if operator == "lte" and not value <= expected:
+            return False
+    return True
+
+
+@dataclass
+class FakeGeminiConfig:
+    """Latency profile for the fake Gemini client."""
+
+    ttft: float = 0.3
+    token_delay: float = 0.02
+    tokens: int = 60
+    upload_delay: float = 0.5
+
+
+class FakeGemini:
+    """
+    Stand-in for ``genai.Client`` that streams canned tokens with fixed latency.
+
+    Only the surface this API uses is implemented: ``files.upload``/``files.get``,
+    ``models.generate_content`` and their ``aio`` counterparts, plus
+    ``aio.files.list``/``delete``, ``aio.models.embed_content``/``count_tokens``
+    and ``aio.chats``. Uploaded files are kept in ``stored_files``.
+    """
+
+    def __init__(self, config: Optional[FakeGeminiConfig] = None) -> None:
+        self.config = config or FakeGeminiConfig()
+        self.stored_files: Dict[str, types.File] = {}
+        self.files = SimpleNamespace(upload=self._upload, get=self._get_file)
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+        self.aio = SimpleNamespace(
+            files=SimpleNamespace(
+                upload=self._aupload,
+                get=self._aget_file,
+                list=self._alist_files,
+                delete=self._adelete_file,
+            ),
+            models=SimpleNamespace(
+                generate_content_stream=self._generate_content_stream,
+                generate_content=self._agenerate_content,
+                embed_content=self._embed_content,
+                count_tokens=self._count_tokens,
+            ),
+            chats=SimpleNamespace(create=self._create_chat),
+        )
+
+    def _upload(self, file: str, **_: Any) -> types.File:
+        with open(file, "rb") as handle:
+            content = handle.read()
+        time.sleep(self.config.upload_delay)
+        return self._uploaded(content)
+
+    def _uploaded(self, content: bytes) -> types.File:
+        now = datetime.now(timezone.utc)
+        file = types.File(
+            name=f"files/{uuid.uuid4().hex[:12]}",
+            mime_type="application/pdf",
+            size_bytes=len(content),
+            sha256_hash=hashlib.sha256(content).hexdigest(),
+            uri="https://example.invalid/file",
+            state=types.FileState.ACTIVE,
+            create_time=now,
+            expiration_time=now + timedelta(hours=48),
+        )
+        self.stored_files[file.name] = file
+        return file
+
+    async def _aupload(self, file: str, **_: Any) -> types.File:
+        with open(file, "rb") as handle:
+            content = handle.read()
+        await asyncio.sleep(self.config.upload_delay)
+        return self._uploaded(content)
+
+    def _get_file(self, name: str) -> types.File:
+        return types.File(
+            name=name,
+            mime_type="application/pdf",
+            uri="https://example.invalid/file",
+            state=types.FileState.ACTIVE,
+        )
+
+    async def _aget_file(self, name: str) -> types.File:
+        return self._get_file(name)
+
+    async def _alist_files(self, **_: Any) -> AsyncIterator[types.File]:
+        async def pages() -> AsyncIterator[types.File]:
+            for file in list(self.stored_files.values()):
+                yield file
+
+        return pages()
+
+    async def _adelete_file(self, name: str, **_: Any) -> types.DeleteFileResponse:
+        if self.stored_files.pop(name, None) is None:
+            raise errors.ClientError(
+                404, {"error": {"code": 404, "message": name, "status": "NOT_FOUND"}}
+            )
+        return types.DeleteFileResponse()
+
+    def _response(
+        self, text: str, output_tokens: int, prompt_tokens: Optional[int] = None
+    ) -> types.GenerateContentResponse:
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(role="model", parts=[types.Part(text=text)])
+                )
+            ],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+            ),
+        )
+
+    @staticmethod
+    def _prompt_tokens(contents: Any) -> int:
+        """Estimate prompt tokens: ~4 characters per token, flat cost per file."""
+        items = contents if isinstance(contents, list) else [contents]
+        return sum(
+            FILE_PROMPT_TOKENS if isinstance(item, types.File) else len(str(item)) // 4
+            for item in items
+        )
+
+    def _generate_content(self, **_: Any) -> types.GenerateContentResponse:
+        time.sleep(self.config.ttft + self.config.token_delay * self.config.tokens)
+        return self._response("token " * self.config.tokens, self.config.tokens)
+
+    async def _agenerate_content(self, **_: Any) -> types.GenerateContentResponse:
+        await asyncio.sleep(
+            self.config.ttft + self.config.token_delay * self.config.tokens
+        )
+        return self._response("token " * self.config.tokens, self.config.tokens)
+
+    async def _generate_content_stream(
+        self, contents: Any = None, **_: Any
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        prompt_tokens = self._prompt_tokens(contents)
+
+        async def stream() -> AsyncIterator[types.GenerateContentResponse]:
+            await asyncio.sleep(self.config.ttft)
+            for index in range(self.config.tokens):
+                if index:
+                    await asyncio.sleep(self.config.token_delay)
+                yield self._response("token ", index + 1, prompt_tokens)
+
+        return stream()
+
+    async def _embed_content(
+        self, contents: List[str], config: Any = None, **_: Any
+    ) -> types.EmbedContentResponse:
+        """Hash each word into a bucket: texts sharing words get similar vectors."""
+        dimensions = getattr(config, "output_dimensionality", None) or 256
+        embeddings = []
+        for text in contents:
+            values = [0.0] * dimensions
+            for word in text.lower().split():
+                digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+                values[int.from_bytes(digest, "big") % dimensions] += 1.0
+            embeddings.append(types.ContentEmbedding(values=values))
+        return types.EmbedContentResponse(embeddings=embeddings)
+
+    async def _count_tokens(
+        self, contents: Any = None, **_: Any
+    ) -> types.CountTokensResponse:
+        return types.CountTokensResponse(total_tokens=self._prompt_tokens(contents))
+
+    def _create_chat(self, **_: Any) -> SimpleNamespace:
+        async def send_message(*args: Any, **kwargs: Any) -> Any:
+            return await self._agenerate_content()
+
+        return SimpleNamespace(send_message=send_message)
+
+
+class FakeRedis:
+    """
+    Minimal Redis-protocol server for the shared cache backend.
+
+    Speaks RESP2 and implements ``PING``, ``GET``, ``MGET``, ``SET`` (with
+    ``PX``), ``INCR``/``INCRBY``, ``DEL`` and ``PEXPIRE``, with lazy expiry. Runs its own
+    event loop on a background thread.
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[bytes, Any] = {}
+        self.expiry: Dict[bytes, float] = {}
+        self.commands = 0
+        self._loop = asyncio.new_event_loop()
+
+    def start(self) -> str:
+        """
+        Start the server.
+
+        Returns:
+            str: ``redis://`` URL of the server
+        """
+        port = free_port()
+        ready = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(
+                asyncio.start_server(self._serve, "127.0.0.1", port)
+            )
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return f"redis://127.0.0.1:{port}/0"
+
+    def stop(self) -> None:
+        """Stop the server's event loop."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _live(self, key: bytes) -> Any:
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return self.data.get(key)
+
+    def _run(self, command: List[bytes]) -> bytes:
+        self.commands += 1
+        name, args = command[0].upper(), command[1:]
+        if name in (b"PING", b"SELECT", b"AUTH"):
+            return b"+OK\r\n" if name != b"PING" else b"+PONG\r\n"
+        if name == b"GET":
+            value = self._live(args[0])
+            if value is None:
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            self.data[args[0]] = args[1]
+            self.expiry.pop(args[0], None)
+            if len(args) > 3 and args[2].upper() == b"PX":
+                self.expiry[args[0]] = time.monotonic() + int(args[3]) / 1000
+            return b"+OK\r\n"
+        if name == b"DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args)
+            return b":%d\r\n" % removed
+        if name == b"MGET":
+            values = [self._live(key) for key in args]
+            return b"*%d\r\n" % len(values) + b"".join(
+                b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+                for value in values
+            )
+        if name in (b"INCR", b"INCRBY"):
+            value = int(self._live(args[0]) or 0) + (int(args[1]) if args[1:] else 1)
+            self.data[args[0]] = str(value).encode()
+            return b":%d\r\n" % value
+        if name == b"PEXPIRE":
+            if self._live(args[0]) is None:
+                return b":0\r\n"
+            self.expiry[args[0]] = time.monotonic() + int(args[1]) / 1000
+            return b":1\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                command = []
+                for _ in range(int(header[1:])):
+                    length = int((await reader.readline())[1:])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._run(command))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def free_port() -> int:
+    """
+    Reserve an unused local TCP port.
+
+    Returns:
+        int: Port number
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app: Any, port: int) -> uvicorn.Server:
+    """
+    Run an ASGI app with uvicorn on a background thread and wait until it is up.
+
+    Args:
+        app: ASGI application
+        port: Local port to bind
+
+    Returns:
+        uvicorn.Server: Running server; set ``should_exit`` to stop it
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def configure_environment() -> None:
+    """Provide placeholder settings so ``api`` imports without real credentials."""
+    for key in (
+        "NEXT_PUBLIC_STACK_PROJECT_ID",
+        "NEXT_PUBLIC_STACK_PUBLISHABLE_CLIENT_KEY",
+        "STACK_SECRET_SERVER_KEY",
+        "SUPABASE_PUBLISHABLE_DEFAULT_KEY",
+        "GOOGLE_GENERATIVE_AI_API_KEY",
+    ):
+        os.environ.setdefault(key, "benchmark")
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("WARMUP_ON_STARTUP", "false")
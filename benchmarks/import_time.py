@@ -0,0 +1,104 @@
+"""
+Import-time profile for the API cold start.
+
+Imports ``api.main`` in fresh interpreters with ``-X importtime``, reports the
+median total and the slowest top-level packages, and checks the import-time
+budget and that heavy SDKs stay off the cold-start path.
+
+Usage:
+    python -m benchmarks.import_time --runs 5 --budget-ms 800
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.fakes import configure_environment
+
+TARGET = "api.main"
+# SDKs that must be imported lazily, on the first request that needs them
+LAZY_MODULES = ("google.genai", "supabase", "jose", "numpy", "asyncpg", "openai")
+
+
+def profile_once() -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Import the target in a fresh interpreter.
+
+    Returns:
+        Tuple[float, Dict[str, float], List[str]]: Total ms, cumulative ms per
+        top-level package, and every imported module name
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+        check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, raw_name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = raw_name.strip()
+        # Nested imports are indented two spaces per level after "| "
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        cumulative = cumulative.strip()
+        modules.append(name)
+        if name == TARGET:
+            total = int(cumulative) / 1000
+        elif depth <= 1:
+            packages[name.split(".")[0]] += int(cumulative) / 1000
+    return total, packages, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    configure_environment()
+    totals = []
+    packages: Dict[str, List[float]] = defaultdict(list)
+    modules: List[str] = []
+    for _ in range(args.runs):
+        total, per_package, modules = profile_once()
+        totals.append(total)
+        for name, ms in per_package.items():
+            packages[name].append(ms)
+
+    median_total = statistics.median(totals)
+    print(f"import {TARGET}: median {median_total:.0f} ms over {args.runs} runs")
+    print(f"{'package':30} {'cumulative ms':>14}")
+    ranked = sorted(packages.items(), key=lambda item: -statistics.median(item[1]))
+    for name, samples in ranked[: args.top]:
+        print(f"{name:30} {statistics.median(samples):14.1f}")
+
+    failures = []
+    eager = [
+        name
+        for name in LAZY_MODULES
+        if any(module == name or module.startswith(f"{name}.") for module in modules)
+    ]
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if median_total > args.budget_ms:
+        failures.append(f"{median_total:.0f} ms exceeds {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
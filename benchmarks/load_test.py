@@ -0,0 +1,315 @@
+"""
+End-to-end load test for the Resummate API against in-process fakes.
+
+Runs ``api.main:app`` under uvicorn with the Supabase client pointed at a local
+PostgREST stub and Gemini replaced by ``FakeGemini``, then drives the chat,
+upload and history endpoints with a concurrent HTTP load generator.
+
+Usage:
+    python -m benchmarks.load_test --scenario all --concurrency 20 --requests 200
+    python -m benchmarks.load_test --cache redis  # shared cache on FakeRedis
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fakes import (
+    FakeGemini,
+    FakeGeminiConfig,
+    FakeRedis,
+    PostgrestStub,
+    configure_environment,
+    free_port,
+    serve_in_thread,
+)
+
+SCENARIOS = ("chat", "upload", "history")
+SEED_THREADS = 50
+SEED_MESSAGES = 40
+RESUME_BYTES = b"%PDF-1.4\n" + b"Experienced backend engineer. " * 400
+# Seeded resumes carry extracted text; set USE_EXTRACTED_TEXT=false to compare
+RESUME_TEXT = "Experienced backend engineer. Reduced p95 latency by 40%.\n" * 40
+
+
+@dataclass
+class ScenarioResult:
+    """Latency samples collected for one scenario."""
+
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    ttfts: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize throughput and latency percentiles.
+
+        Returns:
+            Dict[str, Any]: RPS and p50/p95/p99 latency and TTFT in ms
+        """
+        completed = len(self.latencies)
+        summary: Dict[str, Any] = {
+            "scenario": self.name,
+            "requests": completed + self.errors,
+            "errors": self.errors,
+            "rps": round(completed / self.elapsed, 2) if self.elapsed else 0.0,
+        }
+        for label, samples in (("latency", self.latencies), ("ttft", self.ttfts)):
+            for pct in (50, 95, 99):
+                value = percentile(samples, pct)
+                summary[f"{label}_p{pct}_ms"] = (
+                    round(value * 1000, 1) if value is not None else None
+                )
+        return summary
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        samples: Observed values
+        pct: Percentile in [0, 100]
+
+    Returns:
+        Optional[float]: Percentile value, or None without samples
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class LoadTestHarness:
+    """Boots the API with fakes and seeds data for the scenarios."""
+
+    def __init__(
+        self, gemini_config: FakeGeminiConfig, cache: Optional[str] = None
+    ) -> None:
+        configure_environment()
+        self.postgrest = PostgrestStub()
+        self.gemini = FakeGemini(gemini_config)
+        self.redis: Optional[FakeRedis] = None
+        self.thread_ids: List[str] = []
+        self._servers: List[Any] = []
+        if cache is not None:
+            os.environ["CACHE_BACKEND"] = cache
+        if cache == "redis":
+            self.redis = FakeRedis()
+            os.environ["CACHE_URL"] = self.redis.start()
+
+    def start(self) -> str:
+        """
+        Start the PostgREST stub and the API server.
+
+        Returns:
+            str: Base URL of the API server
+        """
+        postgrest_port = free_port()
+        self._servers.append(serve_in_thread(self.postgrest.app, postgrest_port))
+
+        from supabase import create_client
+
+        from api.auth.stack_auth import verify_stack_token
+        from api.core.dependencies import get_gemini_client, get_supabase_client
+        from api.main import app
+
+        supabase = create_client(f"http://127.0.0.1:{postgrest_port}", "benchmark")
+        app.dependency_overrides[get_supabase_client] = lambda: supabase
+        app.dependency_overrides[get_gemini_client] = lambda: self.gemini
+        app.dependency_overrides[verify_stack_token] = lambda: {"id": "benchmark"}
+
+        api_port = free_port()
+        self._servers.append(serve_in_thread(app, api_port))
+        self._seed()
+        return f"http://127.0.0.1:{api_port}"
+
+    def stop(self) -> None:
+        """Stop all servers."""
+        for server in self._servers:
+            server.should_exit = True
+        if self.redis is not None:
+            self.redis.stop()
+
+    def _seed(self) -> None:
+        for index in range(SEED_THREADS):
+            thread_id = str(uuid.uuid4())
+            self.thread_ids.append(thread_id)
+            self.postgrest.insert(
+                "resume",
+                {
+                    "thread_id": thread_id,
+                    "file_name": "resume.pdf",
+                    "name": f"files/seed-{index}",
+                    "mime_type": "application/pdf",
+                    "extracted_text": RESUME_TEXT,
+                },
+            )
+            for turn in range(SEED_MESSAGES):
+                self.postgrest.insert(
+                    "message",
+                    {
+                        "thread_id": thread_id,
+                        "sender": "user" if turn % 2 == 0 else "model",
+                        "content": f"Seeded message {turn} " * 20,
+                    },
+                )
+
+
+async def run_chat(client: httpx.AsyncClient, thread_id: str) -> Optional[float]:
+    """Send one chat turn and return time to the first text delta."""
+    start = time.perf_counter()
+    ttft = None
+    payload = {
+        "id": thread_id,
+        "messages": [{"role": "user", "content": "Review my resume"}],
+    }
+    async with client.stream("POST", "/api/chat", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if ttft is None and '"type":"text-delta"' in line:
+                ttft = time.perf_counter() - start
+    return ttft
+
+
+async def run_upload(client: httpx.AsyncClient, thread_id: str) -> None:
+    """Upload a resume to a thread."""
+    response = await client.post(
+        "/api/resume/upload",
+        files={"file": ("resume.pdf", RESUME_BYTES, "application/pdf")},
+        data={"uuid": thread_id},
+    )
+    response.raise_for_status()
+
+
+async def run_history(client: httpx.AsyncClient, thread_id: str) -> None:
+    """Fetch a thread's chat history."""
+    response = await client.get(f"/api/chat/history/{thread_id}")
+    response.raise_for_status()
+
+
+RUNNERS: Dict[str, Callable[[httpx.AsyncClient, str], Awaitable[Any]]] = {
+    "chat": run_chat,
+    "upload": run_upload,
+    "history": run_history,
+}
+
+
+async def drive(
+    base_url: str,
+    scenario: str,
+    thread_ids: List[str],
+    concurrency: int,
+    total: int,
+) -> ScenarioResult:
+    """
+    Issue ``total`` requests for a scenario with ``concurrency`` workers.
+
+    Args:
+        base_url: API base URL
+        scenario: Scenario name
+        thread_ids: Seeded thread identifiers to spread requests over
+        concurrency: Number of concurrent workers
+        total: Total number of requests
+
+    Returns:
+        ScenarioResult: Collected samples
+    """
+    result = ScenarioResult(scenario)
+    runner = RUNNERS[scenario]
+    issued = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+
+        async def worker() -> None:
+            for index in issued:
+                thread_id = thread_ids[index % len(thread_ids)]
+                start = time.perf_counter()
+                try:
+                    ttft = await runner(client, thread_id)
+                except Exception:
+                    result.errors += 1
+                    continue
+                result.latencies.append(time.perf_counter() - start)
+                if ttft is not None:
+                    result.ttfts.append(ttft)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.elapsed = time.perf_counter() - start
+    return result
+
+
+def print_table(summaries: List[Dict[str, Any]]) -> None:
+    """Print scenario summaries as an aligned table."""
+    columns = list(summaries[0].keys())
+    widths = [
+        max(len(column), *(len(str(row[column])) for row in summaries))
+        for column in columns
+    ]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in summaries:
+        print("  ".join(str(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=(*SCENARIOS, "all"), default="all")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake TTFT (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--upload-delay", type=float, default=0.5)
+    parser.add_argument("--cache", choices=("none", "memory", "redis"))
+    parser.add_argument("--json", dest="json_path", help="write results here")
+    args = parser.parse_args()
+
+    harness = LoadTestHarness(
+        FakeGeminiConfig(
+            ttft=args.ttft,
+            token_delay=args.token_delay,
+            tokens=args.tokens,
+            upload_delay=args.upload_delay,
+        ),
+        cache=args.cache,
+    )
+    base_url = harness.start()
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    try:
+        summaries = [
+            asyncio.run(
+                drive(
+                    base_url,
+                    scenario,
+                    harness.thread_ids,
+                    args.concurrency,
+                    args.requests,
+                )
+            ).summary()
+            for scenario in scenarios
+        ]
+    finally:
+        harness.stop()
+
+    print_table(summaries)
+    if args.json_path:
+        with open(args.json_path, "w") as handle:
+            json.dump(summaries, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
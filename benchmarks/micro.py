@@ -0,0 +1,369 @@
+"""
+Micro-benchmarks for per-request and per-chunk hot paths.
+
+Each benchmark is timed with ``timeit`` (best of several repeats) and compared
+against the stored baseline in ``benchmarks/baselines/micro.json``. A benchmark
+slower than its baseline by more than ``--threshold`` fails the run.
+
+Usage:
+    python -m benchmarks.micro                  # compare against baselines
+    python -m benchmarks.micro --save           # record new baselines
+    python -m benchmarks.micro -k history       # run matching benchmarks only
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import sys
+import timeit
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fakes import (
+    PostgrestStub,
+    configure_environment,
+    free_port,
+    serve_in_thread,
+)
+
+configure_environment()
+
+from google.genai import types  # noqa: E402
+
+from api.chat.router import encode_chat_history  # noqa: E402
+from api.core.middleware import COMPRESSORS  # noqa: E402
+from api.core.schemas import (  # noqa: E402
+    ChatHistoryResponse,
+    ClientMessage,
+    MessagePart,
+    UIMessage,
+)
+from api.db.service import _extract_file_data, get_messages  # noqa: E402
+from api.services.gemini import format_sse  # noqa: E402
+from api.services.matching import match_documents  # noqa: E402
+from api.services.prompts import convert_to_openai_messages  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+BENCHMARKS: Dict[str, Callable[[], Any]] = {}
+
+
+def benchmark(name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    """Register a zero-argument callable as a named benchmark."""
+
+    def register(func: Callable[[], Any]) -> Callable[[], Any]:
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+# Fixtures
+
+
+def make_stored_messages(count: int) -> List[Dict[str, Any]]:
+    """Message rows as returned by ``get_messages`` (newest first)."""
+    return [
+        {
+            "id": count - index,
+            "sender": "model" if index % 2 == 0 else "user",
+            "content": (
+                "Consider quantifying this bullet: reduced p95 latency by 40% "
+                "by adding Redis caching to the pricing service. " * 4
+            ),
+            "sent_at": f"2025-01-01T{index // 3600 % 24:02d}:"
+            f"{index // 60 % 60:02d}:{index % 60:02d}+00:00",
+        }
+        for index in range(count)
+    ]
+
+
+@lru_cache(maxsize=1)
+def message_store() -> Any:
+    """
+    Serve a 10000-message thread from a PostgREST stub, started on first use.
+
+    Rows carry every stored column, including a 256-dimension embedding, so
+    the fetch pays for whatever the query selects.
+
+    Returns:
+        Client: Supabase client for the stub
+    """
+    from supabase import create_client
+
+    postgrest = PostgrestStub()
+    embedding = base64.b64encode(bytes(256 * 4)).decode()
+    for row in make_stored_messages(10000):
+        postgrest.insert(
+            "message",
+            {
+                **row,
+                "thread_id": "thread-1",
+                "truncated": False,
+                "token_count": 60,
+                "embedding": embedding,
+            },
+        )
+    port = free_port()
+    serve_in_thread(postgrest.app, port)
+    return create_client(f"http://127.0.0.1:{port}", "benchmark")
+
+
+LOOP = asyncio.new_event_loop()
+
+
+def validated_chat_history(stored_messages: List[Dict[str, Any]]) -> bytes:
+    """
+    The history body as built before ``encode_chat_history``: a model per row,
+    validated again as the response model, then dumped.
+    """
+    response = ChatHistoryResponse(
+        messages=[
+            UIMessage(
+                id=str(message["id"]),
+                role="assistant" if message["sender"] == "model" else "user",
+                parts=[MessagePart(type="text", text=message["content"])],
+            )
+            for message in stored_messages
+        ][::-1]
+    )
+    return (
+        ChatHistoryResponse.model_validate(response.model_dump())
+        .model_dump_json()
+        .encode()
+    )
+
+
+def make_client_messages(turns: int) -> List[ClientMessage]:
+    """A long UI thread mixing text, file and tool parts and tool invocations."""
+    messages = []
+    for turn in range(turns):
+        messages.append(
+            ClientMessage(
+                role="user",
+                parts=[
+                    {"type": "text", "text": f"Question {turn}: rewrite my summary."},
+                    {
+                        "type": "file",
+                        "contentType": "image/png",
+                        "url": "https://example.invalid/screenshot.png",
+                    },
+                    {
+                        "type": "file",
+                        "contentType": "application/pdf",
+                        "url": "https://example.invalid/resume.pdf",
+                    },
+                ],
+            )
+        )
+        messages.append(
+            ClientMessage(
+                role="assistant",
+                parts=[
+                    {"type": "text", "text": "Let me check our earlier discussion."},
+                    {
+                        "type": "tool-get_message_history",
+                        "toolCallId": f"call-{turn}",
+                        "state": "output-available",
+                        "input": {"thread_id": "thread-1"},
+                        "output": [f"Earlier message {i}" for i in range(10)],
+                    },
+                    {"type": "text", "text": "Here is a sharper summary. " * 10},
+                ],
+                toolInvocations=[
+                    {
+                        "state": "result",
+                        "toolCallId": f"invocation-{turn}",
+                        "toolName": "get_message_history",
+                        "args": {"thread_id": "thread-1"},
+                        "result": ["Earlier message"] * 5,
+                    }
+                ],
+            )
+        )
+    return messages
+
+
+GEMINI_FILE = types.File(
+    name="files/abc123def456",
+    display_name="resume.pdf",
+    mime_type="application/pdf",
+    size_bytes=245_760,
+    create_time="2025-01-01T00:00:00Z",
+    expiration_time="2025-01-03T00:00:00Z",
+    update_time="2025-01-01T00:00:01Z",
+    sha256_hash="a" * 64,
+    uri="https://generativelanguage.googleapis.com/v1beta/files/abc123def456",
+    state=types.FileState.ACTIVE,
+    source=types.FileSource.UPLOADED,
+)
+TEXT_DELTA = {
+    "type": "text-delta",
+    "id": "text-1",
+    "delta": "Quantify the impact: **reduced p95 latency by 40%** ",
+}
+METADATA_FRAME = {
+    "type": "message-metadata",
+    "messageMetadata": {
+        "serverTiming": {f"db.function_{i}": 12.34 for i in range(10)},
+    },
+}
+JOB_DESCRIPTION_TEXT = (
+    "Senior Backend Engineer. 5+ years with Python, Go lang, PostgreSQL, "
+    "Kubernetes (k8s), AWS, CI/CD pipelines, REST APIs, microservices and Kafka. "
+    "Machine learning is a plus. Terraform, Docker, GraphQL, Redis.\n"
+) * 15
+RESUME_TEXT = (
+    "Backend engineer. Built REST services in Python/FastAPI on Postgres, "
+    "deployed with Docker and K8S on Amazon Web Services; reduced p95 latency "
+    "by 40% with Redis caching and set up continuous integration.\n"
+) * 25
+HISTORY_20 = make_stored_messages(20)
+HISTORY_1000 = make_stored_messages(1000)
+HISTORY_10000 = make_stored_messages(10000)
+HISTORY_BODY_10000 = encode_chat_history(HISTORY_10000)
+THREAD_10 = make_client_messages(10)
+THREAD_100 = make_client_messages(100)
+
+
+# Benchmarks
+
+
+@benchmark("format_sse.text_delta")
+def bench_format_sse_text_delta() -> Any:
+    return format_sse(TEXT_DELTA)
+
+
+@benchmark("format_sse.metadata")
+def bench_format_sse_metadata() -> Any:
+    return format_sse(METADATA_FRAME)
+
+
+@benchmark("convert_to_openai_messages.10_turns")
+def bench_convert_10() -> Any:
+    return convert_to_openai_messages(THREAD_10)
+
+
+@benchmark("convert_to_openai_messages.100_turns")
+def bench_convert_100() -> Any:
+    return convert_to_openai_messages(THREAD_100)
+
+
+@benchmark("extract_file_data")
+def bench_extract_file_data() -> Any:
+    return _extract_file_data("thread-1", "resume.pdf", GEMINI_FILE)
+
+
+@benchmark("history.encode.20")
+def bench_history_20() -> Any:
+    return encode_chat_history(HISTORY_20)
+
+
+@benchmark("history.encode.1000")
+def bench_history_1000() -> Any:
+    return encode_chat_history(HISTORY_1000)
+
+
+@benchmark("history.encode.10000")
+def bench_history_10000() -> Any:
+    return encode_chat_history(HISTORY_10000)
+
+
+@benchmark("history.fetch.1000")
+def bench_history_fetch_1000() -> Any:
+    return LOOP.run_until_complete(get_messages(message_store(), "thread-1", 1000))
+
+
+@benchmark("history.fetch.10000")
+def bench_history_fetch_10000() -> Any:
+    return LOOP.run_until_complete(get_messages(message_store(), "thread-1", 10000))
+
+
+@benchmark("history.validated.1000")
+def bench_history_validated_1000() -> Any:
+    return validated_chat_history(HISTORY_1000)
+
+
+@benchmark("history.validated.10000")
+def bench_history_validated_10000() -> Any:
+    return validated_chat_history(HISTORY_10000)
+
+
+@benchmark("history.compress_br.10000")
+def bench_history_compress_br() -> Any:
+    return COMPRESSORS["br"](HISTORY_BODY_10000)
+
+
+@benchmark("history.compress_gzip.10000")
+def bench_history_compress_gzip() -> Any:
+    return COMPRESSORS["gzip"](HISTORY_BODY_10000)
+
+
+@benchmark("matching.match_documents")
+def bench_match_documents() -> Any:
+    return match_documents(RESUME_TEXT, JOB_DESCRIPTION_TEXT)
+
+
+# Runner
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Time a callable.
+
+    Args:
+        func: Zero-argument callable
+        repeat: Number of timing repeats
+
+    Returns:
+        float: Best observed nanoseconds per call
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", action="store_true", help="record baselines")
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-k", dest="pattern", default="", help="name filter")
+    args = parser.parse_args()
+
+    baselines: Dict[str, float] = (
+        json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    )
+    regressions = []
+
+    print(f"{'benchmark':40} {'ns/op':>14} {'baseline':>14} {'change':>8}")
+    for name, func in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+        result = measure(func, args.repeat)
+        baseline = baselines.get(name)
+        change = ""
+        if baseline:
+            ratio = result / baseline - 1
+            change = f"{ratio:+.0%}"
+            if ratio > args.threshold:
+                regressions.append(name)
+        print(f"{name:40} {result:14.0f} {baseline or 0:14.0f} {change:>8}")
+        if args.save:
+            baselines[name] = round(result)
+
+    if args.save:
+        BASELINE_PATH.parent.mkdir(exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baselines to {BASELINE_PATH}")
+        return 0
+
+    if regressions:
+        print(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
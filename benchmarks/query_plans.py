@@ -0,0 +1,165 @@
+"""
+Check that the hot queries are served by index scans.
+
+Applies the shipped migrations to ``--database-url``, then, inside a
+transaction that is rolled back, seeds threads with messages and documents,
+runs ``ANALYZE`` and ``EXPLAIN``s each hot statement from ``api.db.postgres``.
+A statement whose plan scans a table sequentially instead of through an index
+fails the run. Nothing seeded is left behind.
+
+Usage:
+    python -m benchmarks.query_plans --database-url postgresql://localhost/resummate
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from api.db import postgres  # noqa: E402
+from api.db.migrate import migrate  # noqa: E402
+
+SEED_THREADS = 500
+SEED_MESSAGES = 40
+
+
+class PlanCheck(NamedTuple):
+    """A hot statement and sample arguments."""
+
+    name: str
+    sql: str
+    args: Tuple[Any, ...]
+
+
+CHECKS = (
+    PlanCheck("get_messages", postgres.SELECT_MESSAGES, ("thread-7", 20)),
+    PlanCheck("get_history_window", postgres.SELECT_HISTORY_WINDOW, ("thread-7", 50)),
+    PlanCheck("get_thread_messages", postgres.SELECT_THREAD_MESSAGES, ("thread-7", 10, 1000)),
+    PlanCheck("get_message_page", postgres.SELECT_MESSAGE_PAGE, ("thread-7", 10, 1000)),
+    PlanCheck("get_resume", postgres.SELECT_DOCUMENT.format(table="resume"), ("thread-7",)),
+    PlanCheck("get_job_description", postgres.SELECT_DOCUMENT.format(table="job_description"), ("thread-7",)),
+    PlanCheck("resume_by_hash", "select thread_id from resume where sha256_hash = $1", ("hash-7",)),
+)  # fmt: skip
+
+SEED_SQL = """
+insert into message (thread_id, sender, content, sent_at)
+select
+    'thread-' || thread,
+    case when turn % 2 = 0 then 'user' else 'model' end,
+    repeat('Seeded message ', 20),
+    now() - (turn || ' minutes')::interval
+from generate_series(1, {threads}) as thread,
+     generate_series(1, {messages}) as turn;
+
+insert into message_archive (id, thread_id, sender, content, sent_at)
+select
+    1000000 + thread * 1000 + turn,
+    'archived-' || thread,
+    case when turn % 2 = 0 then 'user' else 'model' end,
+    repeat('Archived message ', 20),
+    now() - interval '1 year' - (turn || ' minutes')::interval
+from generate_series(1, {threads}) as thread,
+     generate_series(1, {messages}) as turn;
+
+insert into resume (thread_id, file_name, sha256_hash)
+select 'thread-' || thread, 'resume.pdf', 'hash-' || thread
+from generate_series(1, {threads}) as thread;
+
+insert into job_description (thread_id, file_name, sha256_hash)
+select 'thread-' || thread, 'job_description.pdf', 'jd-hash-' || thread
+from generate_series(1, {threads}) as thread;
+
+analyze message;
+analyze message_archive;
+analyze resume;
+analyze job_description;
+"""
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Walk an ``EXPLAIN (FORMAT JSON)`` plan tree depth first."""
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def evaluate(plan: Dict[str, Any]) -> Tuple[bool, str]:
+    """
+    Decide whether a plan reads through an index without sequential scans.
+
+    Args:
+        plan: Root node of the statement's plan
+
+    Returns:
+        Tuple[bool, str]: Whether the plan passes and a one-line summary
+    """
+    nodes = list(plan_nodes(plan))
+    summary = " > ".join(
+        node["Node Type"] + (f" ({node['Index Name']})" if "Index Name" in node else "")
+        for node in nodes
+    )
+    sequential = any(node["Node Type"] == "Seq Scan" for node in nodes)
+    indexed = any("Index Name" in node for node in nodes)
+    return indexed and not sequential, summary
+
+
+async def run(database_url: str) -> List[Tuple[PlanCheck, bool, str]]:
+    """
+    Migrate, seed in a rolled-back transaction and explain every check.
+
+    Args:
+        database_url: Postgres connection URL
+
+    Returns:
+        List[Tuple[PlanCheck, bool, str]]: Each check with its result and plan
+    """
+    import asyncpg
+
+    await migrate(database_url)
+    connection = await asyncpg.connect(database_url)
+    results = []
+    try:
+        transaction = connection.transaction()
+        await transaction.start()
+        try:
+            await connection.execute(
+                SEED_SQL.format(threads=SEED_THREADS, messages=SEED_MESSAGES)
+            )
+            for check in CHECKS:
+                raw = await connection.fetchval(
+                    f"explain (format json) {check.sql}", *check.args
+                )
+                plan = json.loads(raw)[0]["Plan"]
+                passed, summary = evaluate(plan)
+                results.append((check, passed, summary))
+        finally:
+            await transaction.rollback()
+    finally:
+        await connection.close()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.database_url))
+    failures = []
+    for check, passed, summary in results:
+        print(f"{'ok' if passed else 'FAIL':4}  {check.name:22} {summary}")
+        if not passed:
+            failures.append(check.name)
+    if failures:
+        print(f"Not served by an index: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Streaming throughput through the Vercel headers middleware.
+
+Serves a synthetic SSE endpoint under uvicorn, once wrapped in the legacy
+``@app.middleware("http")`` implementation (BaseHTTPMiddleware) and once in the
+pure ASGI ``VercelHeadersMiddleware``, and reports frames per second and time
+to first byte for concurrent streaming clients.
+
+Usage:
+    python -m benchmarks.streaming --frames 2000 --concurrency 20 --streams 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from vercel.headers import set_headers
+
+from benchmarks.fakes import configure_environment, free_port, serve_in_thread
+
+configure_environment()
+
+from api.core.middleware import VercelHeadersMiddleware  # noqa: E402
+from api.services.gemini import format_sse  # noqa: E402
+
+# Headers a request through the Vercel edge typically carries
+REQUEST_HEADERS = {
+    "authorization": "Bearer " + "x" * 600,
+    "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+    "accept": "text/event-stream",
+    "x-forwarded-for": "203.0.113.7",
+    "x-real-ip": "203.0.113.7",
+    "x-vercel-id": "fra1::iad1::abcde-1700000000000-0123456789ab",
+    "x-vercel-ip-country": "DE",
+    "x-vercel-ip-city": "Berlin",
+    "x-vercel-oidc-token": "y" * 800,
+    **{f"x-custom-{index}": "value" for index in range(10)},
+}
+
+
+def build_app(variant: str, frames: int) -> FastAPI:
+    """
+    Build an app streaming ``frames`` text-delta frames per request.
+
+    Args:
+        variant: ``base_http``, ``asgi`` or ``none``
+        frames: Frames per response
+
+    Returns:
+        FastAPI: Application under test
+    """
+    app = FastAPI()
+    frame = format_sse({"type": "text-delta", "id": "text-1", "delta": "token "})
+
+    async def generate():
+        for _ in range(frames):
+            # Yield to the loop between frames, as a real model stream does
+            await asyncio.sleep(0)
+            yield frame
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    if variant == "base_http":
+
+        @app.middleware("http")
+        async def vercel_headers_middleware(request: Request, call_next):
+            set_headers(dict(request.headers))
+            return await call_next(request)
+
+    elif variant == "asgi":
+        app.add_middleware(VercelHeadersMiddleware)
+    return app
+
+
+async def drive(
+    base_url: str, concurrency: int, total: int, frames: int
+) -> Dict[str, Any]:
+    """
+    Stream ``total`` responses with ``concurrency`` clients.
+
+    Args:
+        base_url: Server base URL
+        concurrency: Concurrent clients
+        total: Number of streamed responses
+        frames: Expected frames per response
+
+    Returns:
+        Dict[str, Any]: Frames per second and TTFB percentiles
+    """
+    ttfbs: List[float] = []
+    received = 0
+    issued = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=REQUEST_HEADERS, limits=limits, timeout=60
+    ) as client:
+
+        async def worker() -> None:
+            nonlocal received
+            for _ in issued:
+                start = time.perf_counter()
+                first = True
+                async with client.stream("GET", "/stream") as response:
+                    async for chunk in response.aiter_bytes():
+                        if first:
+                            ttfbs.append(time.perf_counter() - start)
+                            first = False
+                        received += chunk.count(b"\n\n")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if received != total * frames:
+        raise RuntimeError(f"expected {total * frames} frames, got {received}")
+    ordered = sorted(ttfbs)
+    return {
+        "frames_per_s": round(received / elapsed),
+        "ttfb_p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "ttfb_p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--streams", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    variants: Dict[str, Callable[[], FastAPI]] = {
+        name: (lambda name=name: build_app(name, args.frames))
+        for name in ("none", "base_http", "asgi")
+    }
+    print(f"{'middleware':12} {'frames/s':>10} {'ttfb p50 ms':>12} {'ttfb p95 ms':>12}")
+    for name, factory in variants.items():
+        port = free_port()
+        server = serve_in_thread(factory(), port)
+        try:
+            # Best of several rounds to damp scheduler noise
+            results = [
+                asyncio.run(
+                    drive(
+                        f"http://127.0.0.1:{port}",
+                        args.concurrency,
+                        args.streams,
+                        args.frames,
+                    )
+                )
+                for _ in range(args.rounds)
+            ]
+        finally:
+            server.should_exit = True
+        best = max(results, key=lambda result: result["frames_per_s"])
+        print(
+            f"{name:12} {best['frames_per_s']:>10} "
+            f"{best['ttfb_p50_ms']:>12} {best['ttfb_p95_ms']:>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())